@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Latency/throughput benchmark of every module against the mock XIQ-SE.
+
+Each module is executed the way Ansible runs it on the target: a fresh
+Python process reading its arguments from a JSON file. For every inventory
+size the suite reports wall time, requests and handshakes seen by the mock
+server, token requests, and the peak RSS of the module process.
+
+    python benchmarks/bench_modules.py --sizes 10,1000,50000
+    python benchmarks/bench_modules.py --sizes 1000 --modules device_version --latency 0.02
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+sys.path.insert(0, HERE)
+
+from mock_xiqse import Inventory, MockServer, self_signed_context  # noqa: E402
+
+
+def load_client():
+    path = os.path.join(ROOT, "plugins", "module_utils", "xiqse.py")
+    spec = importlib.util.spec_from_file_location("xiqse", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.XIQSE
+
+
+def collections_root(workdir):
+    namespace = os.path.join(workdir, "ansible_collections", "tchevalleraud")
+    os.makedirs(namespace)
+    os.symlink(ROOT, os.path.join(namespace, "extremenetworks_xiqse"))
+    return workdir
+
+
+def cases(inventory, bulk_limit):
+    ips = list(inventory.devices)
+    bulk = ips[:bulk_limit]
+    first = ips[0]
+    counter = iter(range(10 ** 6))
+
+    return [
+        ("xiqse_version", "xiqse_version", lambda: {}),
+        ("xiqse_sites", "xiqse_sites", lambda: {}),
+        ("xiqse_site gathered", "xiqse_site", lambda: {"site_path": "/World/EU", "state": "gathered"}),
+        ("xiqse_site present", "xiqse_site", lambda: {"site_path": f"/World/Bench{next(counter)}", "state": "present"}),
+        ("xiqse_query devices", "xiqse_query", lambda: {"query": "query { network { devices { ip sysName sitePath } } }"}),
+        ("xiqse_mutation", "xiqse_mutation", lambda: {"mutation": 'mutation { network { createSite(input: {siteLocation: "/World/Mutation%d"}) { status } } }' % next(counter)}),
+        ("xiqse_devices", "xiqse_devices", lambda: {}),
+        ("xiqse_devices site_prefix", "xiqse_devices", lambda: {"site_prefix": "/World/EU", "fields": ["ip"]}),
+        ("xiqse_add_device", "xiqse_add_device", lambda: {"ip_address": f"172.16.{next(counter) % 250}.1", "profile_name": "public_v2", "site_path": "/World"}),
+        ("device_version", "device_version", lambda: {"ip_address": first}),
+        (f"device_version x{len(ips)}", "device_version", lambda: {"ip_addresses": ips}),
+        ("device_read", "device_read", lambda: {"ip_address": first}),
+        (f"device_read x{len(bulk)}", "device_read", lambda: {"ip_addresses": bulk}),
+        ("device_enforce", "device_enforce", lambda: {"ip_address": first}),
+    ]
+
+
+# ru_maxrss survives exec() and would report the benchmark process itself, so
+# the module process reports its own high-water mark (VmHWM) when it exits.
+LAUNCHER = """
+import atexit, runpy, sys
+def report(path=sys.argv[3]):
+    try:
+        kb = next(line for line in open("/proc/self/status") if line.startswith("VmHWM")).split()[1]
+    except (OSError, StopIteration):
+        import resource
+        kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with open(path, "w") as f:
+        f.write(str(kb))
+atexit.register(report)
+sys.argv = sys.argv[1:3]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+def run_module(root, workdir, name, args):
+    args_path = os.path.join(workdir, "args.json")
+    with open(args_path, "w") as f:
+        json.dump({"ANSIBLE_MODULE_ARGS": args}, f)
+
+    env = dict(os.environ, PYTHONPATH=root)
+    out_path = os.path.join(workdir, "out.json")
+    rss_path = os.path.join(workdir, "rss")
+    with open(out_path, "w") as out:
+        start = time.perf_counter()
+        subprocess.call(
+            [sys.executable, "-c", LAUNCHER, os.path.join(ROOT, "plugins", "modules", name + ".py"), args_path, rss_path],
+            stdout=out, stderr=subprocess.DEVNULL, env=env, cwd=workdir
+        )
+        elapsed = time.perf_counter() - start
+
+    with open(rss_path) as f:
+        peak_kb = int(f.read() or 0)
+
+    try:
+        with open(out_path) as f:
+            result = json.load(f)
+    except ValueError:
+        result = {"failed": True, "msg": "module did not return JSON"}
+
+    return elapsed, peak_kb / 1024.0, os.path.getsize(out_path), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,1000,50000", help="comma separated inventory sizes")
+    parser.add_argument("--modules", default="", help="comma separated module names to run (default: all)")
+    parser.add_argument("--bulk-limit", type=int, default=1000, help="maximum number of devices passed to bulk mutations")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds of server latency per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--no-tls", action="store_true", help="serve the mock over plain HTTP")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    selected = set(filter(None, args.modules.split(",")))
+    workdir = tempfile.mkdtemp(prefix="xiqse_bench_")
+    results = []
+
+    try:
+        root = collections_root(workdir)
+        context = None if args.no_tls else self_signed_context(workdir)
+
+        for size in [int(size) for size in args.sizes.split(",") if size]:
+            inventory = Inventory(size)
+            server = MockServer(inventory, context=context, latency=args.latency, error_rate=args.error_rate).start()
+            provider = server.provider(token_cache_path=os.path.join(workdir, f"tokens-{size}.json"))
+
+            for label, name, build in cases(inventory, args.bulk_limit):
+                if selected and name not in selected:
+                    continue
+
+                module_args = dict(build(), provider=provider)
+                server.stats.reset()
+                elapsed, peak_mb, output_bytes, result = run_module(root, workdir, name, module_args)
+                stats = server.stats.snapshot()
+
+                results.append(dict(
+                    size=size, case=label, module=name, ok=not result.get("failed"),
+                    wall_ms=round(elapsed * 1000, 1), requests=stats["requests"],
+                    graphql=stats["graphql_requests"], tokens=stats["token_requests"],
+                    handshakes=stats["handshakes"], peak_rss_mb=round(peak_mb, 1),
+                    output_kb=round(output_bytes / 1024.0, 1), msg=result.get("msg") if result.get("failed") else None,
+                ))
+
+            server.stop()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    header = f"{'size':>7}  {'case':<28}{'ok':>4}{'wall ms':>10}{'requests':>10}{'graphql':>9}{'tokens':>8}{'handshk':>9}{'rss MB':>8}{'out KB':>9}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(f"{row['size']:>7}  {row['case']:<28}{'yes' if row['ok'] else 'NO':>4}{row['wall_ms']:>10.1f}{row['requests']:>10}"
+              f"{row['graphql']:>9}{row['tokens']:>8}{row['handshakes']:>9}{row['peak_rss_mb']:>8.1f}{row['output_kb']:>9.1f}")
+    for row in results:
+        if not row["ok"]:
+            print(f"{row['size']} {row['case']}: {row['msg']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Compare one-shot requests.post() calls with the pooled XIQSE session.
+
+The mock XIQ-SE server is started over HTTPS with a self-signed
+certificate. Every accepted connection costs a TLS handshake, so the
+server-side connection count is the handshake count.
+
+    python benchmarks/bench_session.py --requests 50
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import requests
+import urllib3
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_xiqse import Inventory, MockServer, self_signed_context  # noqa: E402
+from bench_modules import load_client  # noqa: E402
+
+QUERY = "query { administration { serverInfo { version } } }"
+
+
+def run_oneshot(server, count):
+    base = f"https://127.0.0.1:{server.port}"
+    token = requests.post(
+        f"{base}/oauth/token/access-token?grant_type=client_credentials",
+        auth=("bench", "bench"), verify=False, timeout=30
+    ).json()["access_token"]
+    for _ in range(count):
+        requests.post(
+            f"{base}/nbi/graphql", json={"query": QUERY, "variables": {}},
+            headers={"Authorization": f"Bearer {token}"}, verify=False, timeout=30
+        ).json()
+
+
+def run_pooled(server, count, XIQSE):
+    with XIQSE("127.0.0.1", "bench", "bench", port=server.port, validate_certs=False) as xiqse:
+        for _ in range(count):
+            xiqse.graphql(QUERY)
+
+
+def measure(server, label, func):
+    server.stats.reset()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    return label, server.stats.snapshot()["handshakes"], elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="GraphQL requests per run (plus one token request)")
+    args = parser.parse_args()
+
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    XIQSE = load_client()
+
+    workdir = tempfile.mkdtemp(prefix="xiqse_bench_")
+    try:
+        server = MockServer(Inventory(10), context=self_signed_context(workdir)).start()
+        results = [
+            measure(server, "requests.post", lambda: run_oneshot(server, args.requests)),
+            measure(server, "XIQSE session", lambda: run_pooled(server, args.requests, XIQSE)),
+        ]
+        server.stop()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    calls = args.requests + 1
+    print(f"{'client':<16}{'handshakes':>12}{'total ms':>12}{'ms/request':>12}")
+    for label, handshakes, elapsed in results:
+        print(f"{label:<16}{handshakes:>12}{elapsed * 1000:>12.1f}{elapsed * 1000 / calls:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Startup cost of a small module with the requests and stdlib transports.
+
+xiqse_version is run against the mock XIQ-SE with each value of the
+provider transport option. The suite reports the module process wall
+time (median over --runs), the number of Python modules it loaded and
+whether requests/urllib3 were among them. When ansible-playbook is
+available it also runs a playbook of --tasks tasks per transport and
+reports the AnsiballZ payload size and the wall time per task.
+
+    python benchmarks/bench_startup.py --runs 20
+    python benchmarks/bench_startup.py --runs 20 --tasks 0
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+sys.path.insert(0, HERE)
+
+from mock_xiqse import Inventory, MockServer, self_signed_context  # noqa: E402
+from bench_modules import collections_root  # noqa: E402
+
+TRANSPORTS = ("requests", "stdlib")
+
+# The module process reports what it imported when it exits.
+LAUNCHER = """
+import atexit, runpy, sys
+def report(path=sys.argv[3]):
+    with open(path, "w") as f:
+        f.write("%d %d" % (len(sys.modules), any(name.split(".")[0] in ("requests", "urllib3") for name in sys.modules)))
+atexit.register(report)
+sys.argv = sys.argv[1:3]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+PLAYBOOK = """
+- hosts: localhost
+  gather_facts: false
+  tasks:
+"""
+
+TASK = """
+    - tchevalleraud.extremenetworks_xiqse.xiqse_version:
+        provider: {provider}
+"""
+
+
+def run_module(root, workdir, args):
+    args_path = os.path.join(workdir, "args.json")
+    with open(args_path, "w") as f:
+        json.dump({"ANSIBLE_MODULE_ARGS": args}, f)
+
+    report_path = os.path.join(workdir, "report")
+    out_path = os.path.join(workdir, "out.json")
+    with open(out_path, "w") as out:
+        start = time.perf_counter()
+        subprocess.call(
+            [sys.executable, "-c", LAUNCHER, os.path.join(ROOT, "plugins", "modules", "xiqse_version.py"), args_path, report_path],
+            stdout=out, stderr=subprocess.DEVNULL, env=dict(os.environ, PYTHONPATH=root), cwd=workdir
+        )
+        elapsed = time.perf_counter() - start
+
+    with open(report_path) as f:
+        modules, third_party = f.read().split()
+    with open(out_path) as f:
+        ok = not json.load(f).get("failed")
+    return elapsed, int(modules), third_party == "1", ok
+
+
+def run_playbook(root, workdir, provider, tasks, label):
+    path = os.path.join(workdir, f"playbook-{label}-{tasks}.yml")
+    with open(path, "w") as f:
+        f.write(PLAYBOOK + TASK.format(provider=json.dumps(provider)) * tasks)
+
+    remote_tmp = os.path.join(workdir, f"remote-{label}-{tasks}")
+    env = dict(
+        os.environ,
+        ANSIBLE_COLLECTIONS_PATH=root,
+        ANSIBLE_KEEP_REMOTE_FILES="1",
+        ANSIBLE_REMOTE_TMP=remote_tmp,
+        ANSIBLE_LOCALHOST_WARNING="0",
+        ANSIBLE_INVENTORY_UNPARSED_WARNING="0",
+    )
+    start = time.perf_counter()
+    code = subprocess.call(
+        ["ansible-playbook", path, "-e", f"ansible_python_interpreter={sys.executable}"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, cwd=workdir
+    )
+    elapsed = time.perf_counter() - start
+
+    payloads = glob.glob(os.path.join(remote_tmp, "*", "AnsiballZ_xiqse_version.py"))
+    return elapsed, code == 0, os.path.getsize(payloads[0]) if payloads else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="module processes started per transport")
+    parser.add_argument("--tasks", type=int, default=10, help="tasks of the playbook run per transport, 0 to skip it")
+    parser.add_argument("--no-tls", action="store_true", help="serve the mock over plain HTTP")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="xiqse_bench_")
+    results = []
+
+    try:
+        root = collections_root(workdir)
+        context = None if args.no_tls else self_signed_context(workdir)
+        server = MockServer(Inventory(10), context=context).start()
+        playbook = args.tasks > 0 and shutil.which("ansible-playbook")
+
+        for transport in TRANSPORTS:
+            provider = server.provider(token_cache_path=os.path.join(workdir, "tokens.json"), transport=transport)
+            # The first run mints the token, the measured runs all reuse it.
+            run_module(root, workdir, {"provider": provider})
+
+            runs = [run_module(root, workdir, {"provider": provider}) for _ in range(args.runs)]
+            row = dict(
+                transport=transport,
+                ok=all(run[3] for run in runs),
+                module_ms=round(statistics.median(run[0] for run in runs) * 1000, 1),
+                modules_loaded=runs[-1][1],
+                third_party=runs[-1][2],
+                payload_kb=None,
+                task_ms=None,
+            )
+
+            if playbook:
+                # The difference with a single task run removes the start of ansible-playbook itself.
+                single, single_ok, payload = run_playbook(root, workdir, provider, 1, transport)
+                many, many_ok, _ = run_playbook(root, workdir, provider, args.tasks, transport)
+                row["ok"] = row["ok"] and single_ok and many_ok
+                row["payload_kb"] = round(payload / 1024.0, 1) if payload else None
+                row["task_ms"] = round((many - single) / max(1, args.tasks - 1) * 1000, 1)
+
+            results.append(row)
+
+        server.stop()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    header = f"{'transport':<10}{'ok':>4}{'module ms':>11}{'modules':>9}{'requests':>10}{'payload KB':>12}{'task ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        payload = f"{row['payload_kb']:.1f}" if row["payload_kb"] is not None else "-"
+        task = f"{row['task_ms']:.1f}" if row["task_ms"] is not None else "-"
+        print(f"{row['transport']:<10}{'yes' if row['ok'] else 'NO':>4}{row['module_ms']:>11.1f}{row['modules_loaded']:>9}"
+              f"{'yes' if row['third_party'] else 'no':>10}{payload:>12}{task:>9}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,558 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Self-contained mock of the XIQ-SE northbound API.
+
+Implements ``/oauth/token/access-token`` and ``/nbi/graphql`` for the
+operations used by ``XIQSE.query`` and ``XIQSE.mutation`` on top of a small
+GraphQL parser, so aliased and batched documents are executed the same way
+XIQ-SE would. The inventory is synthetic (N devices spread over sites), and
+latency, HTTP errors and token lifetime can be injected.
+
+Counters are exposed on ``GET /stats`` and reset with ``GET /reset``.
+
+    python benchmarks/mock_xiqse.py --devices 1000 --port 8443 --tls
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class GraphQLError(Exception):
+    pass
+
+
+TOKEN_RE = re.compile(r"""
+    (?P<ignored>[\s,]+|\#[^\n]*)
+  | (?P<spread>\.\.\.)
+  | (?P<punct>[{}()\[\]:!$=@])
+  | (?P<string>"(?:\\.|[^"\\])*")
+  | (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<name>[_A-Za-z][_0-9A-Za-z]*)
+""", re.VERBOSE)
+
+
+def tokenize(source):
+    tokens = []
+    position = 0
+    while position < len(source):
+        match = TOKEN_RE.match(source, position)
+        if not match:
+            raise GraphQLError(f"Syntax error: unexpected character {source[position]!r} at {position}")
+        position = match.end()
+        kind = match.lastgroup
+        if kind == "ignored":
+            continue
+        if kind == "spread":
+            raise GraphQLError("Fragments are not supported by the mock server")
+        tokens.append((kind, match.group(kind)))
+    tokens.append(("eof", None))
+    return tokens
+
+
+class Parser:
+    def __init__(self, source):
+        self.tokens = tokenize(source)
+        self.index = 0
+
+    def peek(self, value=None):
+        kind, token = self.tokens[self.index]
+        return token if value is None else token == value
+
+    def take(self, value=None):
+        kind, token = self.tokens[self.index]
+        if value is not None and token != value:
+            raise GraphQLError(f"Syntax error: expected {value!r}, found {token!r}")
+        if kind == "eof":
+            raise GraphQLError("Syntax error: unexpected end of document")
+        self.index += 1
+        return kind, token
+
+    def name(self):
+        kind, token = self.take()
+        if kind != "name":
+            raise GraphQLError(f"Syntax error: expected a name, found {token!r}")
+        return token
+
+    def document(self):
+        operation = "query"
+        variables = {}
+        if self.peek() in ("query", "mutation", "subscription"):
+            operation = self.name()
+            if self.tokens[self.index][0] == "name":
+                self.name()
+            if self.peek("("):
+                variables = self.variable_definitions()
+        selections = self.selection_set()
+        if self.tokens[self.index][0] != "eof":
+            raise GraphQLError("Only one operation per document is supported")
+        return operation, variables, selections
+
+    def variable_definitions(self):
+        definitions = {}
+        self.take("(")
+        while not self.peek(")"):
+            self.take("$")
+            name = self.name()
+            self.take(":")
+            self.type_reference()
+            default = None
+            if self.peek("="):
+                self.take("=")
+                default = self.value(constant=True)
+            definitions[name] = default
+        self.take(")")
+        return definitions
+
+    def type_reference(self):
+        if self.peek("["):
+            self.take("[")
+            self.type_reference()
+            self.take("]")
+        else:
+            self.name()
+        if self.peek("!"):
+            self.take("!")
+
+    def selection_set(self):
+        selections = []
+        self.take("{")
+        while not self.peek("}"):
+            alias = name = self.name()
+            if self.peek(":"):
+                self.take(":")
+                name = self.name()
+            arguments = self.arguments() if self.peek("(") else {}
+            children = self.selection_set() if self.peek("{") else None
+            selections.append((alias, name, arguments, children))
+        self.take("}")
+        return selections
+
+    def arguments(self):
+        arguments = {}
+        self.take("(")
+        while not self.peek(")"):
+            name = self.name()
+            self.take(":")
+            arguments[name] = self.value()
+        self.take(")")
+        return arguments
+
+    def value(self, constant=False):
+        kind, token = self.take()
+        if token == "$" and not constant:
+            return ("var", self.name())
+        if kind == "string":
+            return json.loads(token)
+        if kind == "number":
+            return float(token) if any(c in token for c in ".eE") else int(token)
+        if token == "[":
+            items = []
+            while not self.peek("]"):
+                items.append(self.value(constant))
+            self.take("]")
+            return items
+        if token == "{":
+            fields = {}
+            while not self.peek("}"):
+                name = self.name()
+                self.take(":")
+                fields[name] = self.value(constant)
+            self.take("}")
+            return fields
+        if kind == "name":
+            return {"true": True, "false": False, "null": None}.get(token, token)
+        raise GraphQLError(f"Syntax error: unexpected {token!r}")
+
+
+def substitute(value, variables):
+    if isinstance(value, tuple) and value[0] == "var":
+        if value[1] not in variables:
+            raise GraphQLError(f"Variable ${value[1]} is not defined")
+        return variables[value[1]]
+    if isinstance(value, list):
+        return [substitute(item, variables) for item in value]
+    if isinstance(value, dict):
+        return dict((key, substitute(item, variables)) for key, item in value.items())
+    return value
+
+
+class Inventory:
+    """Synthetic XIQ-SE data set with N devices spread over a site tree."""
+
+    REGIONS = ("EU", "US", "APAC", "LATAM")
+
+    def __init__(self, devices=10, devices_per_site=20, operation_delay=0.0, seed=1):
+        self.lock = threading.Lock()
+        self.operation_delay = operation_delay
+        self.devices = {}
+        self.sites = {"/World": self.site_record("/World")}
+        self.pending = {}
+        rng = random.Random(seed)
+
+        site_count = max(1, (devices + devices_per_site - 1) // devices_per_site)
+        leaves = []
+        for i in range(site_count):
+            region = self.REGIONS[i % len(self.REGIONS)]
+            leaf = f"/World/{region}/City{i // 8}/B{i % 8}"
+            leaves.append(leaf)
+            self.add_site(leaf)
+
+        for i in range(devices):
+            ip = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+            self.devices[ip] = {
+                "deviceId": i + 1,
+                "ip": ip,
+                "sysName": f"VSP-{i:05d}",
+                "nickName": f"switch-{i:05d}",
+                "sitePath": leaves[i % len(leaves)],
+                "firmware": f"9.{rng.randint(0, 3)}.{rng.randint(0, 9)}.0",
+                "deviceDisplayFamily": "VSP Series",
+                "serialNumber": f"SN{i:08d}",
+                "sysContact": "noc@example.com",
+                "sysLocation": leaves[i % len(leaves)],
+                "sysUpTime": str(rng.randint(1000, 10 ** 7)),
+                "status": "UP",
+            }
+
+    @staticmethod
+    def site_record(location):
+        return {"location": location, "siteName": location.rsplit("/", 1)[-1], "siteId": abs(hash(location)) % 10 ** 6}
+
+    def add_site(self, location):
+        parts = [part for part in location.split("/") if part]
+        for depth in range(1, len(parts) + 1):
+            path = "/" + "/".join(parts[:depth])
+            if path not in self.sites:
+                self.sites[path] = self.site_record(path)
+        return self.sites[location]
+
+    def device(self, ip):
+        record = self.devices.get(ip)
+        if record is None:
+            return None
+        record = dict(record)
+        record["operationStatus"] = "IN_PROGRESS" if self.pending.get(ip, 0) > time.time() else "SUCCESS"
+        return record
+
+    def start_operation(self, ip):
+        if ip not in self.devices:
+            return False
+        self.pending[ip] = time.time() + self.operation_delay
+        return True
+
+    def query_root(self):
+        return {
+            "administration": {
+                "serverInfo": {"version": "24.10.12.14", "uptime": "123456", "upTime": "123456"},
+            },
+            "network": {
+                "device": lambda ip: self.device(ip),
+                "devices": self.list_devices,
+                "sites": lambda: list(self.sites.values()),
+                "siteByLocation": lambda location: self.sites.get(location),
+            },
+        }
+
+    def list_devices(self, offset=None, limit=None):
+        devices = list(self.devices.values())
+        if offset is not None or limit is not None:
+            offset = offset or 0
+            devices = devices[offset:offset + limit if limit is not None else None]
+        return devices
+
+    def mutation_root(self):
+        return {"network": {
+            "createSite": self.create_site,
+            "deleteSite": self.delete_site,
+            "createDevices": self.create_devices,
+            "configureDevice": self.configure_device,
+            "readDevices": self.read_devices,
+        }}
+
+    def create_site(self, input):
+        location = input.get("siteLocation")
+        with self.lock:
+            if not location or not location.startswith("/World") or location in self.sites:
+                return {"errorCode": 1, "siteId": None, "siteLocation": location, "status": "ERROR"}
+            parent = location.rsplit("/", 1)[0]
+            if parent not in self.sites:
+                return {"errorCode": 2, "siteId": None, "siteLocation": location, "status": "ERROR"}
+            site = self.add_site(location)
+        return {"errorCode": 0, "siteId": site["siteId"], "siteLocation": location, "status": "SUCCESS"}
+
+    def delete_site(self, input):
+        location = input.get("siteLocation")
+        with self.lock:
+            children = [path for path in self.sites if path.startswith(location + "/")]
+            if location not in self.sites or location == "/World" or children:
+                return {"errorCode": 1, "siteId": None, "siteLocation": location, "status": "ERROR"}
+            site = self.sites.pop(location)
+        return {"errorCode": 0, "siteId": site["siteId"], "siteLocation": location, "status": "SUCCESS"}
+
+    def create_devices(self, input):
+        devices = input.get("devices") or []
+        if isinstance(devices, dict):
+            devices = [devices]
+
+        results = []
+        with self.lock:
+            for device in devices:
+                ip = device.get("ipAddress")
+                if ip in self.devices:
+                    results.append({"deviceId": self.devices[ip]["deviceId"], "ipAddress": ip, "message": "Device already exists", "seriallNumber": None, "status": "ERROR"})
+                    continue
+                record = {
+                    "deviceId": len(self.devices) + 1, "ip": ip, "sysName": None, "nickName": None,
+                    "sitePath": device.get("siteLocation"), "firmware": None, "serialNumber": None, "status": "UP",
+                }
+                self.devices[ip] = record
+                results.append({"deviceId": record["deviceId"], "ipAddress": ip, "message": "Device added", "seriallNumber": None, "status": "SUCCESS"})
+        return {"results": results}
+
+    def configure_device(self, input):
+        ip = (input.get("deviceConfig") or {}).get("ipAddress")
+        return {"status": "SUCCESS" if self.start_operation(ip) else "ERROR"}
+
+    def read_devices(self, input):
+        devices = input.get("devices") or []
+        if isinstance(devices, dict):
+            devices = [devices]
+        ok = all(self.start_operation(device.get("ipAddress")) for device in devices)
+        return {"errorCode": 0 if ok else 1, "status": "SUCCESS" if ok else "ERROR"}
+
+
+def resolve(value, selections, path, errors):
+    if value is None or selections is None:
+        return value
+    if isinstance(value, list):
+        return [resolve(item, selections, path + [i], errors) for i, item in enumerate(value)]
+
+    result = {}
+    for alias, name, arguments, children in selections:
+        field = value.get(name) if isinstance(value, dict) else None
+        try:
+            if callable(field):
+                field = field(**arguments)
+            result[alias] = resolve(field, children, path + [alias], errors)
+        except TypeError as e:
+            errors.append({"message": f"Invalid arguments for field {name}: {e}", "path": path + [alias]})
+            result[alias] = None
+    return result
+
+
+def execute(inventory, query, variables):
+    operation, definitions, selections = Parser(query).document()
+    values = dict((name, default) for name, default in definitions.items())
+    values.update(variables or {})
+
+    def bind(selections):
+        return [(alias, name, substitute(arguments, values), bind(children) if children else children)
+                for alias, name, arguments, children in selections]
+
+    root = inventory.mutation_root() if operation == "mutation" else inventory.query_root()
+    errors = []
+    selections = bind(selections)
+    data = resolve(root, selections, [], errors)
+    operations = sum(len(children or ()) or 1 for _, _, _, children in selections)
+    return ({"data": data, "errors": errors} if errors else {"data": data}), operations
+
+
+class Stats:
+    FIELDS = ("requests", "token_requests", "graphql_requests", "operations", "handshakes", "errors", "bytes_in", "bytes_out")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.values = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, **counters):
+        with self.lock:
+            for key, value in counters.items():
+                self.values[key] += value
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.values)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+        self.server.stats.add(bytes_out=len(payload))
+
+    def do_GET(self):
+        if self.path == "/reset":
+            self.server.stats.reset()
+        self.reply(200, self.server.stats.snapshot())
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        server.stats.add(requests=1, bytes_in=len(body))
+
+        if server.latency:
+            time.sleep(server.latency + random.uniform(0, server.jitter))
+
+        if server.error_rate and random.random() < server.error_rate:
+            server.stats.add(errors=1)
+            self.reply(503, {"error": "Service Unavailable"}, {"Retry-After": str(server.retry_after)})
+            return
+
+        if self.path.startswith("/oauth/token/access-token"):
+            server.stats.add(token_requests=1)
+            token = server.issue_token()
+            self.reply(200, {"access_token": token, "token_type": "bearer", "expires_in": server.token_ttl})
+            return
+
+        if self.path.startswith("/nbi/graphql"):
+            server.stats.add(graphql_requests=1)
+            authorization = self.headers.get("Authorization", "")
+            if not server.valid_token(authorization[7:] if authorization.startswith("Bearer ") else None):
+                server.stats.add(errors=1)
+                self.reply(401, {"error": "invalid_token"})
+                return
+            try:
+                request = json.loads(body or b"{}")
+                result, operations = execute(server.inventory, request.get("query") or "", request.get("variables"))
+                server.stats.add(operations=operations)
+                self.reply(200, result)
+            except (GraphQLError, ValueError) as e:
+                self.reply(200, {"data": None, "errors": [{"message": str(e)}]})
+            return
+
+        self.reply(404, {"error": "Not Found"})
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512
+
+    def __init__(self, inventory, host="127.0.0.1", port=0, context=None, latency=0.0, jitter=0.0,
+                 error_rate=0.0, retry_after=1, token_ttl=3600):
+        super().__init__((host, port), MockHandler)
+        self.inventory = inventory
+        self.context = context
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.token_ttl = token_ttl
+        self.tokens = {}
+        self.tokens_lock = threading.Lock()
+        self.stats = Stats()
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    @property
+    def protocol(self):
+        return "https" if self.context else "http"
+
+    def provider(self, **extra):
+        provider = dict(host="127.0.0.1", port=self.port, protocol=self.protocol, client_id="benchmark-client",
+                        client_secret="benchmark-secret", verify=False)
+        provider.update(extra)
+        return provider
+
+    def get_request(self):
+        sock, address = super().get_request()
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stats.add(handshakes=1)
+        if self.context:
+            sock = self.context.wrap_socket(sock, server_side=True)
+        return sock, address
+
+    def issue_token(self):
+        token = os.urandom(16).hex()
+        with self.tokens_lock:
+            self.tokens[token] = time.time() + self.token_ttl
+        return token
+
+    def valid_token(self, token):
+        with self.tokens_lock:
+            return self.tokens.get(token, 0) > time.time()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def self_signed_context(workdir):
+    cert = os.path.join(workdir, "cert.pem")
+    key = os.path.join(workdir, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-keyout", key, "-out", cert],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--tls", action="store_true", help="serve HTTPS with a throwaway self-signed certificate")
+    parser.add_argument("--devices", type=int, default=10, help="number of synthetic devices")
+    parser.add_argument("--devices-per-site", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency, in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After value sent with 503 answers")
+    parser.add_argument("--token-ttl", type=int, default=3600, help="expires_in of issued tokens")
+    parser.add_argument("--operation-delay", type=float, default=0.0, help="seconds a read/enforce stays IN_PROGRESS")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="xiqse_mock_")
+    try:
+        server = MockServer(
+            Inventory(args.devices, args.devices_per_site, args.operation_delay),
+            host=args.host, port=args.port, context=self_signed_context(workdir) if args.tls else None,
+            latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+            retry_after=args.retry_after, token_ttl=args.token_ttl,
+        )
+        print(f"Mock XIQ-SE listening on {server.protocol}://{args.host}:{server.port} with {args.devices} devices", flush=True)
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+DOCUMENTATION = r"""
+---
+name: xiqse_metrics
+type: aggregate
+author:
+  - Thibault Chevalleraud (@tchevalleraud)
+short_description: Aggregates the XIQ-SE API metrics returned by the modules of the play.
+description:
+  - This callback plugin collects the RV(xiqse_metrics) returned by the modules when the O(provider.metrics) option is enabled.
+  - At the end of the play, it displays the number of requests and the p50, p95 and p99 latencies per GraphQL operation and per task,
+    next to the number of token requests, cache hits and retries.
+  - It is compatible with ExtremeCloudIQ - Site Engine.
+requirements:
+  - Enable it in the configuration with C(callbacks_enabled = tchevalleraud.extremenetworks_xiqse.xiqse_metrics).
+options:
+  output_path:
+    description:
+      - Path of a JSON file where the aggregated metrics are also written.
+    type: path
+    env:
+      - name: XIQSE_METRICS_OUTPUT
+    ini:
+      - section: callback_xiqse_metrics
+        key: output_path
+"""
+
+EXAMPLES = r"""
+# ansible.cfg
+[defaults]
+callbacks_enabled = tchevalleraud.extremenetworks_xiqse.xiqse_metrics
+
+[callback_xiqse_metrics]
+output_path = ./xiqse_metrics.json
+"""
+
+import json
+import math
+
+from ansible.plugins.callback import CallbackBase
+
+
+class CallbackModule(CallbackBase):
+
+    CALLBACK_VERSION        = 2.0
+    CALLBACK_TYPE           = "aggregate"
+    CALLBACK_NAME           = "tchevalleraud.extremenetworks_xiqse.xiqse_metrics"
+    CALLBACK_NEEDS_ENABLED  = True
+
+    COUNTERS                = ("auth_requests", "token_cache_hits", "response_cache_hits", "retries")
+
+    def __init__(self):
+        super(CallbackModule, self).__init__()
+        self.operations = {}
+        self.tasks      = {}
+        self.counters   = dict((name, 0) for name in self.COUNTERS)
+
+    def v2_runner_on_ok(self, result):
+        self.collect(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self.collect(result)
+
+    # A loop reports its metrics per item, the final result only holds them under results.
+    def v2_runner_item_on_ok(self, result):
+        self.collect(result)
+
+    def v2_runner_item_on_failed(self, result):
+        self.collect(result)
+
+    def collect(self, result):
+        metrics = result._result.get("xiqse_metrics")
+        if not isinstance(metrics, dict):
+            return
+
+        task = result._task.get_name()
+        for entry in metrics.get("requests") or []:
+            operation = self.operations.setdefault(entry.get("operation") or "unknown", {"latencies": [], "bytes_in": 0, "bytes_out": 0, "errors": 0})
+            operation["latencies"].append(entry.get("total_ms") or 0)
+            operation["bytes_in"]   += entry.get("bytes_in") or 0
+            operation["bytes_out"]  += entry.get("bytes_out") or 0
+            operation["errors"]     += 1 if entry.get("error") or (entry.get("status") or 0) >= 400 else 0
+            self.tasks.setdefault(task, []).append(entry.get("total_ms") or 0)
+
+        for name in self.COUNTERS:
+            self.counters[name] += metrics.get(name) or 0
+
+    @staticmethod
+    def percentile(values, percent):
+        ordered = sorted(values)
+        return ordered[max(0, int(math.ceil(percent / 100.0 * len(ordered))) - 1)]
+
+    def summary(self, latencies):
+        return dict(
+            requests=len(latencies),
+            total_ms=round(sum(latencies), 3),
+            p50_ms=round(self.percentile(latencies, 50), 3),
+            p95_ms=round(self.percentile(latencies, 95), 3),
+            p99_ms=round(self.percentile(latencies, 99), 3),
+            max_ms=round(max(latencies), 3)
+        )
+
+    def v2_playbook_on_stats(self, stats):
+        if not self.operations:
+            return
+
+        report = dict(
+            self.counters,
+            operations=dict((name, dict(self.summary(data["latencies"]), bytes_in=data["bytes_in"], bytes_out=data["bytes_out"], errors=data["errors"]))
+                            for name, data in self.operations.items()),
+            tasks=dict((name, self.summary(latencies)) for name, latencies in self.tasks.items())
+        )
+
+        self._display.banner("XIQ-SE API METRICS")
+        for title, rows in (("operation", report["operations"]), ("task", report["tasks"])):
+            width = max(len(title), max(len(name) for name in rows))
+            self._display.display(f"{title:<{width}}  {'requests':>8}  {'p50 ms':>9}  {'p95 ms':>9}  {'p99 ms':>9}  {'total ms':>10}")
+            for name, row in sorted(rows.items(), key=lambda item: -item[1]["total_ms"]):
+                self._display.display(f"{name:<{width}}  {row['requests']:>8}  {row['p50_ms']:>9.1f}  {row['p95_ms']:>9.1f}  {row['p99_ms']:>9.1f}  {row['total_ms']:>10.1f}")
+            self._display.display("")
+        self._display.display(", ".join(f"{name}: {self.counters[name]}" for name in self.COUNTERS))
+
+        output_path = self.get_option("output_path")
+        if output_path:
+            with open(output_path, "w") as f:
+                json.dump(report, f, indent=2)
\ No newline at end of file
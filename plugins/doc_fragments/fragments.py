@@ -1,31 +1,8 @@
 # plugins/doc_fragments/fragments.py
 # -*- coding: utf-8 -*-
 
-class ModuleDocFragment:
-    OPTIONS_IPADDRESS       = r"""
-      options:
-        ip_address:
-          description:
-            - Device IP Address
-          type: str
-          required: true
-    """
-    OPTIONS_MUTATION        = r"""
-      options:
-        mutation:
-          description:
-            - GraphQL mutation for XIQ-SE
-          type: str
-          required: true
-    """
-    OPTIONS_PROVIDER        = r"""
-      options:
-        provider:
-          description:
-            - Connection information for accessing the ExtremeCloud IQ - Site Engine (XIQ-SE) API.
-          required: true
-          type: dict
-          suboptions:
+# Suboptions shared by the provider option and by each entry of the providers option.
+PROVIDER_SUBOPTIONS = r"""
             protocol:
               description:
                 - Protocol to use for API communication.
@@ -59,7 +36,180 @@ class ModuleDocFragment:
                 - Whether to validate the SSL certificate.
               type: bool
               default: true
+            token_cache:
+              description:
+                - Whether to share the OAuth2 access token between module invocations through an on-disk cache.
+                - The token is stored per host, port and client ID until it expires, so a single token serves a whole play.
+              type: bool
+              default: true
+            token_cache_path:
+              description:
+                - Path of the token cache file. The file and its lock are created with C(0600) permissions.
+                - Defaults to C(~/.ansible/tmp/xiqse_token_cache.json) on the host running the module.
+              type: path
+            pool_size:
+              description:
+                - Maximum number of keep-alive connections the client keeps open to XIQ-SE.
+                - Requests issued by the same module reuse these connections instead of opening a new TCP/TLS session each time.
+              type: int
+              default: 10
+            retries:
+              description:
+                - Number of times a request is retried after a connection error, a timeout or a V(429), V(502), V(503) or V(504) response.
+                - Mutations are not retried after a read timeout, a connection lost once they were sent, or a V(502) or V(504) response,
+                  since XIQ-SE may already have applied them.
+              type: int
+              default: 3
+            retry_backoff:
+              description:
+                - Base delay in seconds of the exponential backoff between retries. Each delay is drawn at random between 0 and C(retry_backoff * 2^attempt).
+                - A C(Retry-After) header sent by XIQ-SE is honoured when it asks for a longer delay.
+              type: float
+              default: 0.5
+            retry_max_delay:
+              description:
+                - Maximum delay in seconds between two retries.
+              type: float
+              default: 30
+            circuit_breaker_threshold:
+              description:
+                - Number of consecutive connection errors or server errors (V(5xx) responses) after which requests to the XIQ-SE server fail immediately.
+                - The state is shared on disk between module invocations, so a play stops hammering an unavailable server. V(0) disables the circuit breaker.
+              type: int
+              default: 5
+            circuit_breaker_cooldown:
+              description:
+                - Time in seconds during which the circuit stays open before a new request is let through.
+              type: int
+              default: 30
+            circuit_breaker_path:
+              description:
+                - Path of the circuit breaker state file.
+                - Defaults to C(~/.ansible/tmp/xiqse_circuit.json) on the host running the module.
+              type: path
+            metrics:
+              description:
+                - Whether to return the metrics of the API requests sent by the module in RV(xiqse_metrics).
+                - Each HTTP attempt is listed with its operation, status, sizes and its C(total_ms), C(connect_ms) (DNS and TCP, new connections only),
+                  C(tls_ms), C(server_ms), C(transfer_ms) and C(decode_ms) timings, next to the number of token requests, cache hits and retries.
+                - Without O(provider), set the C(XIQSE_METRICS=1) environment variable on the task instead.
+                - The C(tchevalleraud.extremenetworks_xiqse.xiqse_metrics) callback plugin aggregates them for the whole play.
+              type: bool
+              default: false
+            response_cache:
+              description:
+                - Whether to cache the responses of read-only queries on the host running the module, so that later tasks reuse them.
+                - Entries are keyed by the normalised query, its variables and the XIQ-SE server. Any mutation sent by the collection drops the entries it affects,
+                  C(createSite) and C(deleteSite) drop the site queries, C(createDevices), C(configureDevice) and C(readDevices) drop the device queries,
+                  and any other mutation empties the cache.
+              type: bool
+              default: false
+            response_cache_path:
+              description:
+                - Directory of the response cache. Files are created with C(0600) permissions.
+                - Defaults to C(~/.ansible/tmp/xiqse_responses) on the host running the module.
+              type: path
+            response_cache_ttl:
+              description:
+                - Time in seconds a cached response is kept when none of its fields has a specific lifetime.
+              type: int
+              default: 60
+            response_cache_ttls:
+              description:
+                - Lifetime in seconds of the responses per queried field, merged with the defaults,
+                  V(3600) for C(serverInfo), V(300) for C(sites) and C(siteByLocation), V(60) for C(devices) and C(device).
+                - A query selecting several fields is kept for the shortest of their lifetimes.
+              type: dict
+            response_cache_size:
+              description:
+                - Maximum number of responses kept in the cache, the least recently used ones are evicted first.
+              type: int
+              default: 256
+            transport:
+              description:
+                - HTTP client used to talk to XIQ-SE.
+                - V(requests) uses the C(requests) library, which honours the C(HTTPS_PROXY) and C(REQUESTS_CA_BUNDLE) environment variables.
+                - V(stdlib) only uses C(http.client) and C(ssl) from the Python standard library. It needs no third-party package on the host running the module
+                  and starts faster, which matters for short tasks, but it does not go through proxies.
+                  Certificates are validated against the system CA store, or C(SSL_CERT_FILE) when set.
+              type: str
+              default: requests
+              choices: [requests, stdlib]
+            broker:
+              description:
+                - Whether to send the read-only queries through a broker process shared by the forks running on the same host.
+                - The first module that needs it starts the broker on a Unix socket. The broker gathers the queries received within O(provider.broker_window),
+                  merges them into aliased GraphQL requests, and answers identical queries in flight with a single request.
+                - Modules share a broker only when they use the same server, credentials, O(provider.verify), O(provider.transport), O(provider.pool_size),
+                  O(timeout) and retry settings. The broker stops after 60 seconds without requests.
+                - Mutations are always sent by the module itself. If the broker cannot be reached, the module sends its queries itself.
+              type: bool
+              default: false
+            broker_path:
+              description:
+                - Directory of the broker socket. There is one broker per XIQ-SE server, client ID and connection settings, and the socket is created with C(0600) permissions.
+                - Defaults to C(~/.ansible/tmp) on the host running the module.
+              type: path
+            broker_window:
+              description:
+                - Time in seconds during which the broker collects queries before it sends them to XIQ-SE.
+              type: float
+              default: 0.01
+"""
+
+class ModuleDocFragment:
+    OPTIONS_IPADDRESS       = r"""
+      options:
+        ip_address:
+          description:
+            - Device IP Address
+          type: str
+          required: true
+    """
+    OPTIONS_MUTATION        = r"""
+      options:
+        mutation:
+          description:
+            - GraphQL mutation for XIQ-SE
+          type: str
+          required: true
     """
+    OPTIONS_PROVIDER        = r"""
+      options:
+        provider:
+          description:
+            - Connection information for accessing the ExtremeCloud IQ - Site Engine (XIQ-SE) API.
+            - When omitted, the module uses the persistent connection of the play, set with C(ansible_connection=ansible.netcommon.httpapi)
+              and C(ansible_network_os=tchevalleraud.extremenetworks_xiqse.xiqse), and keeps one authenticated session for all the tasks.
+            - The OAuth2 access token is renewed shortly before it expires, and a request rejected with V(401) is replayed once with a new token,
+              so long bulk operations outlive the token lifetime.
+          required: false
+          type: dict
+          suboptions:
+""" + PROVIDER_SUBOPTIONS + r"""    """
+    OPTIONS_PROVIDERS       = r"""
+      options:
+        providers:
+          description:
+            - List of XIQ-SE servers to query concurrently, instead of the single O(provider).
+            - Each entry takes the suboptions of O(provider), plus O(providers[].name) and O(providers[].timeout).
+            - The results of all the servers are merged and each record is tagged with the name of its server.
+              The state of each server is returned in RV(servers), and the module fails when a server did not answer.
+            - Mutually exclusive with O(provider).
+          type: list
+          elements: dict
+          suboptions:
+            name:
+              description:
+                - Name the results of this server are tagged with. Defaults to O(providers[].host).
+              type: str
+            timeout:
+              description:
+                - Time in seconds given to this server to answer, from the start of the module. A server still running then is reported as V(TIMEOUT),
+                  so the slowest server sets the duration of the task.
+                - It also caps the timeout of each HTTP request sent to this server. Defaults to O(timeout).
+              type: int
+""" + PROVIDER_SUBOPTIONS + r"""    """
     OPTIONS_QUERY           = r"""
       options:
         query:
@@ -122,4 +272,20 @@ class ModuleDocFragment:
             - Connection timeout in seconds.
           type: int
           default: 30
+    """
+    OPTIONS_WAIT            = r"""
+      options:
+        wait:
+          description:
+            - Wait for XIQ-SE to finish the operation on the device before returning.
+            - The device operation state is polled with an exponential backoff, starting at 1 second and capped at 15 seconds.
+            - The state is read from the C(operationStatus) field of the device. The module fails when XIQ-SE returns an error for it or leaves it empty,
+              rather than returning before the operation is complete.
+          type: bool
+          default: false
+        wait_timeout:
+          description:
+            - Maximum time in seconds to wait for the operation to complete when O(wait) is enabled.
+          type: int
+          default: 300
     """
\ No newline at end of file
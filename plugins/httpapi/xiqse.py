@@ -0,0 +1,92 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+DOCUMENTATION = r"""
+---
+author:
+  - Thibault Chevalleraud (@tchevalleraud)
+name: xiqse
+short_description: HttpApi plugin for ExtremeCloud IQ - Site Engine (XIQ-SE).
+description:
+  - This HttpApi plugin lets the modules of this collection talk to the XIQ-SE GraphQL API through the persistent connection of Ansible.
+  - The OAuth2 access token is requested once, and the same keep-alive HTTPS session is reused by every task of the play.
+  - An expired token is renewed transparently the first time XIQ-SE answers with V(401).
+  - It requires the C(ansible.netcommon) collection and is selected with C(ansible_connection=ansible.netcommon.httpapi)
+    and C(ansible_network_os=tchevalleraud.extremenetworks_xiqse.xiqse).
+  - The OAuth2 client ID and secret are given with C(ansible_user) and C(ansible_httpapi_pass).
+  - It is compatible with ExtremeCloudIQ - Site Engine.
+"""
+
+EXAMPLES = r"""
+# inventory
+[xiqse_api]
+xiqse01 ansible_host=10.0.0.254
+
+[xiqse_api:vars]
+ansible_connection=ansible.netcommon.httpapi
+ansible_network_os=tchevalleraud.extremenetworks_xiqse.xiqse
+ansible_httpapi_use_ssl=true
+ansible_httpapi_validate_certs=false
+ansible_httpapi_port=8443
+ansible_user=xxxxxxxxxx
+ansible_httpapi_pass=xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxxxx
+
+# playbook, the modules are called without provider
+- name: Read the XIQ-SE version
+  hosts: xiqse_api
+  gather_facts: no
+  tasks:
+    - name: Get the XIQ-SE version
+      tchevalleraud.extremenetworks_xiqse.xiqse_version:
+"""
+
+import base64
+import json
+
+from ansible.module_utils.common.text.converters import to_text
+from ansible.module_utils.connection import ConnectionError
+from ansible.plugins.httpapi import HttpApiBase
+
+TOKEN_PATH      = "/oauth/token/access-token?grant_type=client_credentials"
+GRAPHQL_PATH    = "/nbi/graphql"
+
+
+class HttpApi(HttpApiBase):
+
+    def login(self, username, password):
+        if not username or not password:
+            raise ConnectionError("The XIQ-SE OAuth2 client ID and secret must be set with ansible_user and ansible_httpapi_pass.")
+
+        credentials = base64.b64encode(f"{username}:{password}".encode("utf-8")).decode("ascii")
+        headers     = {"Authorization": f"Basic {credentials}", "Accept": "application/json"}
+
+        self.connection._auth = None
+        response, response_data = self.connection.send(TOKEN_PATH, None, method="POST", headers=headers)
+        token = self.handle_response(response, response_data).get("access_token")
+
+        if not token:
+            raise ConnectionError("Unable to get an access token from XIQ-SE.")
+        self.connection._auth = {"Authorization": f"Bearer {token}"}
+
+    def update_auth(self, response, response_text):
+        return None
+
+    def send_request(self, query, variables=None):
+        data = json.dumps({"query": query, "variables": variables or {}})
+        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+
+        response, response_data = self.connection.send(GRAPHQL_PATH, data, method="POST", headers=headers)
+        return self.handle_response(response, response_data)
+
+    def handle_response(self, response, response_data):
+        text = to_text(response_data.getvalue())
+        code = getattr(response, "code", None) or getattr(response, "status", 200)
+
+        try:
+            data = json.loads(text) if text else {}
+        except ValueError:
+            raise ConnectionError(f"XIQ-SE returned an invalid response (HTTP {code}): {text[:200]}")
+
+        if code >= 400 and (not isinstance(data, dict) or "data" not in data):
+            raise ConnectionError(f"XIQ-SE request failed (HTTP {code}): {text[:200]}", code=code)
+        return data
\ No newline at end of file
@@ -0,0 +1,204 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+DOCUMENTATION = r"""
+---
+name: xiqse
+author:
+  - Thibault Chevalleraud (@tchevalleraud)
+short_description: Builds an inventory from the devices managed by XIQ-SE.
+description:
+  - This inventory plugin retrieves the devices managed by XIQ-SE through the C(network.devices) GraphQL query.
+  - Each device becomes a host, and is placed in one group per level of its site path.
+  - The result can be stored in the Ansible inventory cache so that later runs do not query XIQ-SE again until the cache expires.
+  - It is compatible with ExtremeCloudIQ - Site Engine.
+  - Uses a YAML configuration file that ends with C(xiqse.yml) or C(xiqse.yaml).
+extends_documentation_fragment:
+  - ansible.builtin.constructed
+  - ansible.builtin.inventory_cache
+options:
+  plugin:
+    description:
+      - The name of this plugin, it should always be set to V(tchevalleraud.extremenetworks_xiqse.xiqse) for this plugin to recognize it as its own.
+    type: str
+    required: true
+    choices: ["tchevalleraud.extremenetworks_xiqse.xiqse"]
+  host:
+    description:
+      - IP address or FQDN of the XIQ-SE server.
+    type: str
+    required: true
+    env:
+      - name: XIQSE_HOST
+  port:
+    description:
+      - Port to use for API communication.
+    type: int
+    default: 8443
+    env:
+      - name: XIQSE_PORT
+  protocol:
+    description:
+      - Protocol to use for API communication.
+    type: str
+    default: https
+    choices: [http, https]
+  client_id:
+    description:
+      - OAuth2 client ID used for authentication.
+    type: str
+    required: true
+    env:
+      - name: XIQSE_CLIENT_ID
+  client_secret:
+    description:
+      - OAuth2 secret associated with the client ID.
+    type: str
+    required: true
+    env:
+      - name: XIQSE_CLIENT_SECRET
+  verify:
+    description:
+      - Whether to validate the SSL certificate.
+    type: bool
+    default: true
+    env:
+      - name: XIQSE_VERIFY
+  timeout:
+    description:
+      - Connection timeout in seconds.
+    type: int
+    default: 30
+  hostname:
+    description:
+      - Device attribute used as inventory hostname.
+      - V(sysName) falls back to the IP address when the device has no system name,
+        or when several devices share the same system name, so that no device is lost.
+    type: str
+    default: sysName
+    choices: [sysName, ip]
+  group_prefix:
+    description:
+      - Prefix added to the name of every site group.
+    type: str
+    default: site_
+"""
+
+EXAMPLES = r"""
+# xiqse.yml
+plugin: tchevalleraud.extremenetworks_xiqse.xiqse
+host: 10.0.0.254
+client_id: "xxxxxxxxxx"
+client_secret: "xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxxxx"
+verify: false
+cache: true
+cache_plugin: ansible.builtin.jsonfile
+cache_connection: ~/.ansible/cache/xiqse
+cache_timeout: 3600
+compose:
+  ansible_network_os: "'extreme.voss.voss'"
+groups:
+  voss_devices: xiqse_sys_name is match('VSP')
+"""
+
+from ansible.errors import AnsibleError
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable, Constructable
+from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_utils.xiqse import XIQSE
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+
+    NAME = "tchevalleraud.extremenetworks_xiqse.xiqse"
+
+    def verify_file(self, path):
+        if super(InventoryModule, self).verify_file(path):
+            return path.endswith(("xiqse.yml", "xiqse.yaml"))
+        return False
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path, cache)
+        self._read_config_data(path)
+
+        cache_key           = self.get_cache_key(path)
+        user_cache_setting  = self.get_option("cache")
+        read_cache          = user_cache_setting and cache
+        update_cache        = user_cache_setting and not cache
+
+        devices = None
+        if read_cache:
+            try:
+                devices = self._cache[cache_key]
+            except KeyError:
+                update_cache = True
+
+        if devices is None:
+            devices = self.fetch_devices()
+
+        if update_cache:
+            self._cache[cache_key] = devices
+
+        self.populate(devices)
+
+    def fetch_devices(self):
+        provider = dict(
+            host=self.get_option("host"),
+            port=self.get_option("port"),
+            protocol=self.get_option("protocol"),
+            client_id=self.get_option("client_id"),
+            client_secret=self.get_option("client_secret"),
+            verify=self.get_option("verify"),
+        )
+
+        try:
+            with XIQSE.from_provider(provider, self.get_option("timeout")) as xiqse:
+                result = xiqse.graphql(XIQSE.query.network.devices())
+        except Exception as e:
+            raise AnsibleError(f"Unable to retrieve devices from XIQ-SE: {e}")
+
+        devices = (result.get("data") or {}).get("network", {}).get("devices")
+        if devices is None:
+            raise AnsibleError(f"Unable to retrieve devices from XIQ-SE: {result.get('errors')}")
+        return devices
+
+    def populate(self, devices):
+        strict          = self.get_option("strict")
+        group_prefix    = self.get_option("group_prefix")
+        use_ip          = self.get_option("hostname") == "ip"
+
+        # Switches often keep their default system name, such devices are named by IP address.
+        names = {}
+        for device in devices:
+            if device.get("ip") and device.get("sysName"):
+                names.setdefault(device["sysName"], []).append(device["ip"])
+        shared = dict((name, ips) for name, ips in names.items() if len(ips) > 1)
+        if shared and not use_ip:
+            for name, ips in sorted(shared.items()):
+                self.display.warning(f"XIQ-SE devices {', '.join(ips)} share the system name {name}, they are named by IP address.")
+
+        for device in devices:
+            ip = device.get("ip")
+            if not ip:
+                continue
+
+            sys_name = device.get("sysName")
+            hostname = ip if use_ip or not sys_name or sys_name in shared else sys_name
+            self.inventory.add_host(hostname)
+            self.inventory.set_variable(hostname, "ansible_host", ip)
+            self.inventory.set_variable(hostname, "xiqse_sys_name", device.get("sysName"))
+            self.inventory.set_variable(hostname, "xiqse_site_path", device.get("sitePath"))
+
+            parent = None
+            levels = [level for level in (device.get("sitePath") or "").split("/") if level]
+            for depth in range(len(levels)):
+                group = self.inventory.add_group(self._sanitize_group_name(group_prefix + "_".join(levels[:depth + 1])))
+                if parent:
+                    self.inventory.add_child(parent, group)
+                parent = group
+
+            if parent:
+                self.inventory.add_child(parent, hostname)
+
+            hostvars = self.inventory.get_host(hostname).get_vars()
+            self._set_composite_vars(self.get_option("compose"), hostvars, hostname, strict=strict)
+            self._add_host_to_composed_groups(self.get_option("groups"), hostvars, hostname, strict=strict)
+            self._add_host_to_keyed_groups(self.get_option("keyed_groups"), hostvars, hostname, strict=strict)
@@ -0,0 +1,175 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+DOCUMENTATION = r"""
+---
+name: xiqse_device
+author:
+  - Thibault Chevalleraud (@tchevalleraud)
+short_description: Looks up devices managed by XIQ-SE by IP address.
+description:
+  - This lookup returns the XIQ-SE information of the devices matching the given IP addresses.
+  - The device table is fetched once, indexed by IP address and stored both in memory and in an on-disk cache shared by all forks, so templating many hosts costs a single API call until O(ttl) expires.
+  - Unknown IP addresses return V(None).
+  - It is compatible with ExtremeCloudIQ - Site Engine.
+options:
+  _terms:
+    description:
+      - IP addresses of the devices to look up.
+    type: list
+    elements: str
+    required: true
+  host:
+    description:
+      - IP address or FQDN of the XIQ-SE server.
+    type: str
+    required: true
+    env:
+      - name: XIQSE_HOST
+  port:
+    description:
+      - Port to use for API communication.
+    type: int
+    default: 8443
+    env:
+      - name: XIQSE_PORT
+  protocol:
+    description:
+      - Protocol to use for API communication.
+    type: str
+    default: https
+    choices: [http, https]
+  client_id:
+    description:
+      - OAuth2 client ID used for authentication.
+    type: str
+    required: true
+    env:
+      - name: XIQSE_CLIENT_ID
+  client_secret:
+    description:
+      - OAuth2 secret associated with the client ID.
+    type: str
+    required: true
+    env:
+      - name: XIQSE_CLIENT_SECRET
+  verify:
+    description:
+      - Whether to validate the SSL certificate.
+    type: bool
+    default: true
+    env:
+      - name: XIQSE_VERIFY
+  timeout:
+    description:
+      - Connection timeout in seconds.
+    type: int
+    default: 30
+  fields:
+    description:
+      - Device fields stored in the index. V(ip) is always included.
+    type: list
+    elements: str
+    default: [ip, sysName, sitePath, firmware]
+  page_size:
+    description:
+      - Number of devices requested per GraphQL request while building the index.
+    type: int
+    default: 500
+  ttl:
+    description:
+      - Number of seconds the device index is reused before it is fetched again from XIQ-SE.
+    type: int
+    default: 300
+  refresh:
+    description:
+      - Fetch the device table again, even if a cached index is still valid.
+      - Use it on a single task, for example with C(run_once), to prime the cache for the rest of the play.
+    type: bool
+    default: false
+  cache_path:
+    description:
+      - Path of the on-disk index cache. The file is created with C(0600) permissions.
+    type: path
+    default: ~/.ansible/tmp/xiqse_device_index.json
+"""
+
+EXAMPLES = r"""
+- name: Display the site of every inventory device
+  ansible.builtin.debug:
+    msg: "{{ lookup('tchevalleraud.extremenetworks_xiqse.xiqse_device', ansible_host, host=xiqse_host, client_id=xiqse_client, client_secret=xiqse_secret).sitePath }}"
+
+- name: Template a configuration with the XIQ-SE information of the device
+  ansible.builtin.template:
+    src: config.j2
+    dest: "/tmp/{{ inventory_hostname }}.cfg"
+  vars:
+    xiqse_device: "{{ lookup('tchevalleraud.extremenetworks_xiqse.xiqse_device', ansible_host, host=xiqse_host, client_id=xiqse_client, client_secret=xiqse_secret, ttl=3600) }}"
+  delegate_to: localhost
+"""
+
+RETURN = r"""
+_raw:
+  description: The devices matching the IP addresses, or V(None) when an IP address is not managed by XIQ-SE.
+  type: list
+  elements: dict
+"""
+
+import hashlib
+import time
+
+from ansible.errors import AnsibleError
+from ansible.plugins.lookup import LookupBase
+from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_utils.xiqse import XIQSE
+
+INDEXES = {}
+
+
+class LookupModule(LookupBase):
+
+    def run(self, terms, variables=None, **kwargs):
+        self.set_options(var_options=variables, direct=kwargs)
+
+        index = self.get_index()
+        return [index.get(str(term).strip()) for term in terms]
+
+    def get_index(self):
+        provider = dict(
+            host=self.get_option("host"),
+            port=self.get_option("port"),
+            protocol=self.get_option("protocol"),
+            client_id=self.get_option("client_id"),
+            client_secret=self.get_option("client_secret"),
+            verify=self.get_option("verify"),
+        )
+        fields  = list(dict.fromkeys(["ip"] + self.get_option("fields")))
+        refresh = self.get_option("refresh")
+        ttl     = self.get_option("ttl")
+
+        xiqse   = XIQSE.from_provider(provider, self.get_option("timeout"))
+        key     = hashlib.sha256((xiqse.cache_key() + "|" + ",".join(fields)).encode("utf-8")).hexdigest()
+
+        cached = INDEXES.get(key)
+        if cached and not refresh and cached[0] > time.time():
+            return cached[1]
+
+        store = XIQSE.FileCache(self.get_option("cache_path"))
+        index = None if refresh else store.get(key)
+
+        if index is None:
+            # Other forks wait for the one building the index instead of querying XIQ-SE themselves.
+            with store.lock(exclusive=True):
+                index = None if refresh else store.get(key, locked=True)
+                if index is None:
+                    index = self.fetch_index(xiqse, fields)
+                    store.put(key, index, time.time() + ttl)
+
+        xiqse.close()
+        INDEXES[key] = (time.time() + ttl, index)
+        return index
+
+    def fetch_index(self, xiqse, fields):
+        try:
+            return dict((device["ip"], device) for device in xiqse.iter_devices(fields, self.get_option("page_size")) if device.get("ip"))
+        except Exception as e:
+            raise AnsibleError(f"Unable to retrieve devices from XIQ-SE: {e}")
@@ -1,8 +1,48 @@
-import requests
-import urllib3
+import fcntl
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# requests, urllib3, http.client, ssl, concurrent.futures and email.utils are imported where they are used,
+# so that a short-lived module only pays for the transport it selected.
 
 class XIQSE:
-    def __init__(self, host, client_id, client_secret, port=8443, protocol="https", validate_certs=True, timeout=30):
+    TOKEN_CACHE_PATH    = "~/.ansible/tmp/xiqse_token_cache.json"
+    TOKEN_EXPIRY_MARGIN = 30
+    POOL_SIZE           = 10
+    CIRCUIT_PATH        = "~/.ansible/tmp/xiqse_circuit.json"
+    RESPONSE_CACHE_PATH = "~/.ansible/tmp/xiqse_responses"
+    BROKER_PATH         = "~/.ansible/tmp"
+    RESPONSE_CACHE_TTLS = {"serverInfo": 3600, "sites": 300, "siteByLocation": 300, "devices": 60, "device": 60}
+    RESPONSE_CACHE_INVALIDATES = {
+        "createSite": ("sites", "siteByLocation"),
+        "deleteSite": ("sites", "siteByLocation"),
+        "createDevices": ("devices", "device"),
+        "configureDevice": ("devices", "device"),
+        "readDevices": ("devices", "device"),
+    }
+    DEVICE_FACT_SUBSETS = {
+        "identity": ("deviceId", "ip", "sysName", "nickName", "serialNumber"),
+        "software": ("firmware", "deviceDisplayFamily"),
+        "location": ("sitePath", "sysLocation", "sysContact"),
+        "status": ("status", "sysUpTime"),
+    }
+    RETRY_STATUSES      = (429, 502, 503, 504)
+    REJECTED_STATUSES   = (429, 503)
+    TRANSPORTS          = ("requests", "stdlib")
+    PENDING_STATES      = ("PENDING", "QUEUED", "RUNNING", "IN_PROGRESS")
+    FAILED_STATES       = ("ERROR", "FAILED", "FAILURE", "TIMEOUT")
+    FIELD_PATTERN       = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+    def __init__(self, host, client_id, client_secret, port=8443, protocol="https", validate_certs=True, timeout=30, token_cache=None, pool_size=POOL_SIZE,
+                 retries=3, retry_backoff=0.5, retry_max_delay=30, circuit_breaker=None, circuit_threshold=5, circuit_cooldown=30, connection=None,
+                 response_cache=None, response_cache_ttl=60, response_cache_ttls=None, response_cache_size=256, metrics=False, transport="requests",
+                 broker=None, broker_window=0.01):
         self.host           = host
         self.client_id      = client_id
         self.client_secret  = client_secret
@@ -11,62 +51,1249 @@ class XIQSE:
         self.validate_certs = validate_certs
         self.timeout        = timeout
         self.token          = None
+        self.token_expires  = None
+        self.token_cache    = XIQSE.FileCache(token_cache) if token_cache else None
+        self.token_lock     = threading.Lock()
+        self.retries        = retries
+        self.retry_backoff  = retry_backoff
+        self.retry_max_delay= retry_max_delay
+        self.circuit        = XIQSE.FileCache(circuit_breaker) if circuit_breaker and circuit_threshold > 0 else None
+        self.circuit_threshold  = circuit_threshold
+        self.circuit_cooldown   = circuit_cooldown
+        self.connection         = connection
+        self.response_cache     = XIQSE.ResponseCache(response_cache, response_cache_size) if response_cache else None
+        self.response_cache_ttl = response_cache_ttl
+        self.response_cache_ttls= dict(XIQSE.RESPONSE_CACHE_TTLS, **(response_cache_ttls or {}))
+        self.metrics            = XIQSE.Metrics() if metrics else None
+        self.pool_size          = pool_size
+        self.transport_name     = transport
+        self.transport          = None if connection is not None else self.create_transport(transport, pool_size)
+        self.broker             = None
+        if broker and connection is None:
+            from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_utils.xiqse_broker import Broker
+            self.broker = Broker(self, broker, broker_window)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def create_transport(self, transport, pool_size):
+        if transport == "stdlib":
+            return XIQSE.StdlibTransport(pool_size, self.validate_certs, self.timeout)
+        if transport == "requests":
+            return XIQSE.RequestsTransport(pool_size, self.validate_certs, self.timeout, instrument=self.metrics is not None)
+        raise Exception("Unknown transport " + str(transport) + ", expected one of: " + ", ".join(XIQSE.TRANSPORTS))
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+    @classmethod
+    def from_module(cls, module, provider=None):
+        provider    = provider or module.params.get("provider")
+        xiqse       = cls.from_provider(provider, module.params.get("timeout") or 30, module._socket_path)
+
+        # Every exit of the module carries the metrics of the requests it sent.
+        if xiqse.metrics is not None:
+            for name in ("exit_json", "fail_json"):
+                method = getattr(module, name)
+                setattr(module, name, lambda method=method, **kwargs: method(**dict(kwargs, xiqse_metrics=xiqse.metrics.report())))
+        return xiqse
+
+    @classmethod
+    def from_provider(cls, provider, timeout=30, socket_path=None):
+        if not provider:
+            return cls.from_connection(socket_path)
+
+        token_cache = None
+        if provider.get("token_cache", True):
+            token_cache = provider.get("token_cache_path") or cls.TOKEN_CACHE_PATH
+
+        circuit_breaker = None
+        if provider.get("circuit_breaker_threshold", 5):
+            circuit_breaker = provider.get("circuit_breaker_path") or cls.CIRCUIT_PATH
+
+        response_cache = None
+        if provider.get("response_cache"):
+            response_cache = provider.get("response_cache_path") or cls.RESPONSE_CACHE_PATH
+
+        broker = None
+        if provider.get("broker"):
+            broker = provider.get("broker_path") or cls.BROKER_PATH
+
+        return cls(
+            host=provider["host"],
+            client_id=provider["client_id"],
+            client_secret=provider["client_secret"],
+            port=provider["port"],
+            protocol=provider["protocol"],
+            validate_certs=provider["verify"],
+            timeout=timeout,
+            token_cache=token_cache,
+            pool_size=provider.get("pool_size") or cls.POOL_SIZE,
+            retries=provider.get("retries", 3),
+            retry_backoff=provider.get("retry_backoff", 0.5),
+            retry_max_delay=provider.get("retry_max_delay", 30),
+            circuit_breaker=circuit_breaker,
+            circuit_threshold=provider.get("circuit_breaker_threshold", 5),
+            circuit_cooldown=provider.get("circuit_breaker_cooldown", 30),
+            response_cache=response_cache,
+            response_cache_ttl=provider.get("response_cache_ttl", 60),
+            response_cache_ttls=provider.get("response_cache_ttls"),
+            response_cache_size=provider.get("response_cache_size", 256),
+            metrics=provider.get("metrics", False),
+            transport=provider.get("transport") or "requests",
+            broker=broker,
+            broker_window=provider.get("broker_window", 0.01)
+        )
+
+    @classmethod
+    def from_connection(cls, socket_path):
+        if not socket_path:
+            raise Exception("No provider given and no persistent connection available, set provider or use ansible_connection=ansible.netcommon.httpapi with ansible_network_os=tchevalleraud.extremenetworks_xiqse.xiqse")
+
+        from ansible.module_utils.connection import Connection
+        metrics = os.environ.get("XIQSE_METRICS", "").lower() in ("1", "true", "yes", "on")
+        return cls(host=None, client_id=None, client_secret=None, connection=Connection(socket_path), metrics=metrics)
+
+    @classmethod
+    def fan_out(cls, module, func):
+        timeout = module.params.get("timeout") or 30
+        servers = {}
+        for provider in module.params["providers"]:
+            name = provider.get("name") or provider["host"]
+            if name in servers:
+                raise Exception("Provider " + name + " is listed twice, give each provider a distinct name.")
+            deadline        = provider.get("timeout") or timeout
+            servers[name]   = dict(client=cls.from_provider(provider, min(timeout, deadline)), deadline=deadline)
+
+        reports = dict((name, server["client"].metrics) for name, server in servers.items() if server["client"].metrics is not None)
+        if reports:
+            for method_name in ("exit_json", "fail_json"):
+                method = getattr(module, method_name)
+                setattr(module, method_name, lambda method=method, **kwargs: method(**dict(kwargs, xiqse_metrics=XIQSE.Metrics.merge(reports))))
+
+        def run(server):
+            start = time.monotonic()
+            try:
+                server["result"] = func(server["client"])
+            except Exception as e:
+                server["error"] = str(e)
+            finally:
+                server["duration"] = time.monotonic() - start
+                server["client"].close()
 
-        if not self.validate_certs:
-            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        threads = dict((name, threading.Thread(target=run, args=(server,), daemon=True)) for name, server in servers.items())
+        for thread in threads.values():
+            thread.start()
+
+        # Each server is waited for until its own deadline. A server still running is reported as TIMEOUT
+        # and its daemon thread is dropped when the module exits.
+        start   = time.monotonic()
+        results = {}
+        for name, thread in threads.items():
+            server = servers[name]
+            thread.join(max(0, start + server["deadline"] - time.monotonic()))
+            if thread.is_alive():
+                results[name] = dict(status="TIMEOUT", duration=round(time.monotonic() - start, 3), msg=f"No answer within {server['deadline']} seconds.")
+            elif "error" in server:
+                results[name] = dict(status="ERROR", duration=round(server["duration"], 3), msg=server["error"])
+            else:
+                results[name] = dict(status="SUCCESS", duration=round(server["duration"], 3), msg=None, result=server["result"])
+        return results
 
     def base_url(self):
         return f"{self.protocol}://{self.host}:{self.port}"
 
-    def authenticate(self):
+    @staticmethod
+    def chunks(items, size):
+        size = max(1, size)
+        for i in range(0, len(items), size):
+            yield items[i:i + size]
+
+    @staticmethod
+    def in_site(site_path, site_prefix):
+        site_prefix = "/" + site_prefix.strip("/")
+        return site_path == site_prefix or (site_path or "").startswith(site_prefix.rstrip("/") + "/")
+
+    @staticmethod
+    def run_concurrently(func, items, max_concurrency):
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        results = {}
+        if not items:
+            return results
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(items)))) as executor:
+            futures = dict((executor.submit(func, item), item) for item in items)
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    results[futures[future]] = e
+        return results
+
+    def cache_key(self):
+        identity = f"{self.protocol}://{self.host}:{self.port}|{self.client_id}"
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+    def authenticate(self, use_cache=True):
+        if self.token_cache is None:
+            return self.request_token()
+
+        key = self.cache_key()
+        if use_cache:
+            cached = self.token_cache.get(key, with_expiry=True)
+            if cached:
+                return self.use_cached_token(*cached)
+
+        # Only one process mints a token, the others pick it up once the lock is released.
+        with self.token_cache.lock(exclusive=True):
+            if use_cache:
+                cached = self.token_cache.get(key, locked=True, with_expiry=True)
+                if cached:
+                    return self.use_cached_token(*cached)
+
+            token, expires_in = self.request_token(with_expiry=True)
+            if expires_in:
+                self.token_cache.put(key, token, time.time() + expires_in - self.TOKEN_EXPIRY_MARGIN)
+            return token
+
+    def use_cached_token(self, token, expires_at):
+        self.token          = token
+        self.token_expires  = time.monotonic() + expires_at - time.time()
+        self.count("token_cache_hits")
+        return self.token
+
+    def get_token(self):
+        # The token is renewed shortly before it expires. One thread renews it while the others wait for the new one.
+        token = self.token
+        if token is None or (self.token_expires is not None and time.monotonic() >= self.token_expires):
+            with self.token_lock:
+                if self.token is token:
+                    self.authenticate()
+        return self.token
+
+    def renew_token(self, rejected):
+        # Threads rejected with the same token share a single renewal.
+        with self.token_lock:
+            if self.token == rejected:
+                if self.token_cache is not None:
+                    self.token_cache.discard(self.cache_key(), rejected)
+                self.authenticate()
+        return self.token
+
+    def request_token(self, with_expiry=False):
         token_url   = f"{self.base_url()}/oauth/token/access-token?grant_type=client_credentials"
         headers     = {"Content-Type": "application/x-www-form-urlencoded"}
 
+        self.count("auth_requests")
         try:
-            response = requests.post(
+            response = self.post(
                 token_url,
+                operation="token",
                 auth=(self.client_id, self.client_secret),
-                headers=headers,
-                verify=self.validate_certs,
-                timeout=self.timeout
+                headers=headers
             )
             response.raise_for_status()
             result = response.json()
 
             if "access_token" in result:
-                self.token = result["access_token"]
+                try:
+                    expires_in = int(result.get("expires_in") or 0)
+                except (TypeError, ValueError):
+                    expires_in = 0
+
+                self.token          = result["access_token"]
+                self.token_expires  = time.monotonic() + expires_in - min(self.TOKEN_EXPIRY_MARGIN, expires_in / 2) if expires_in else None
+                if with_expiry:
+                    return self.token, expires_in
                 return self.token
             else:
                 raise Exception("Authentication failed: No access_token in response")
-        except requests.exceptions.RequestException as e:
+        except XIQSE.TransportError as e:
             raise Exception(f"Auth request failed: {e}")
 
-    def graphql(self, query, variables=None):
-        if self.token is None:
-            self.authenticate()
+    def graphql(self, query, variables=None, cache=True):
+        if self.response_cache is None:
+            return self.send_graphql(query, variables)
+
+        kind, fields = XIQSE.operation_fields(query)
+        if kind == "mutation":
+            try:
+                return self.send_graphql(query, variables)
+            finally:
+                affected = set()
+                for field in fields:
+                    affected.update(XIQSE.RESPONSE_CACHE_INVALIDATES.get(field, ()))
+                # An unknown mutation may change anything, drop the whole cache.
+                self.response_cache.invalidate(affected if affected and fields <= set(XIQSE.RESPONSE_CACHE_INVALIDATES) else None)
+
+        key     = self.response_key(query, variables)
+        result  = self.response_cache.get(key) if cache else None
+        if result is not None:
+            self.count("response_cache_hits")
+            return result
+
+        result  = self.send_graphql(query, variables)
+        if result.get("data") is not None and not result.get("errors"):
+            ttls = [self.response_cache_ttls[field] for field in fields if field in self.response_cache_ttls]
+            self.response_cache.put(key, result, min(ttls) if ttls else self.response_cache_ttl, sorted(fields))
+        return result
+
+    def response_key(self, query, variables):
+        tokens      = [match.group() for match in XIQSE.Batch.TOKEN_PATTERN.finditer(query) if match.lastgroup not in ("comment", "space")]
+        identity    = getattr(self.connection, "socket_path", None) or self.cache_key()
+        document    = json.dumps([identity, " ".join(tokens), variables or {}], sort_keys=True)
+        return hashlib.sha256(document.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def operation_name(query):
+        kind, fields = XIQSE.operation_fields(query)
+        return kind + " " + (",".join(sorted(fields)) or "unknown")
+
+    def count(self, name, value=1):
+        if self.metrics is not None:
+            self.metrics.count(name, value)
+
+    @staticmethod
+    def operation_fields(query):
+        tokens  = [(match.lastgroup, match.group()) for match in XIQSE.Batch.TOKEN_PATTERN.finditer(query) if match.lastgroup not in ("comment", "space")]
+        kind    = tokens[0][1] if tokens and tokens[0][1] in ("query", "mutation", "subscription") else "query"
+        fields  = set()
+        depth   = 0
+        parens  = 0
+
+        # Field names of the first two levels, so that "network { sites }" gives network and sites.
+        for index, (token_kind, text) in enumerate(tokens):
+            if text == "{":
+                depth += 1
+            elif text == "}":
+                depth -= 1
+            elif text == "(":
+                parens += 1
+            elif text == ")":
+                parens -= 1
+            elif token_kind == "name" and 1 <= depth <= 2 and not parens:
+                following = tokens[index + 1][1] if index + 1 < len(tokens) else None
+                previous  = tokens[index - 1][1] if index else None
+                if following != ":" and previous not in ("@", "$", "...") and text != "on":
+                    fields.add(text)
+        return kind, fields - {"network", "administration"}
+
+    def send_graphql(self, query, variables=None):
+        # The persistent connection daemon owns the token and the keep-alive session.
+        if self.connection is not None:
+            start   = time.perf_counter()
+            result  = self.connection.send_request(query, variables or {})
+            if self.metrics is not None:
+                self.metrics.record(operation=XIQSE.operation_name(query), total_ms=(time.perf_counter() - start) * 1000)
+            return result
+
+        # Queries of concurrent forks are merged by the broker, mutations are always sent by the module itself.
+        if self.broker is not None and XIQSE.operation_fields(query)[0] != "mutation":
+            start   = time.perf_counter()
+            result  = self.broker.request(query, variables or {})
+            if result is not None:
+                if self.metrics is not None:
+                    self.metrics.record(operation=XIQSE.operation_name(query), total_ms=(time.perf_counter() - start) * 1000, broker=True)
+                return result
 
         if variables is None:
             variables = {}
 
+        token       = self.get_token()
+        response    = self.post_graphql(query, variables, token)
+
+        # The token may have expired or been revoked server side, renew it and replay the request once.
+        if response.status_code == 401:
+            response = self.post_graphql(query, variables, self.renew_token(token))
+
+        try:
+            response.raise_for_status()
+            start   = time.perf_counter()
+            result  = response.json()
+            entry   = getattr(response, "xiqse_metrics", None)
+            if entry is not None:
+                entry["decode_ms"] = (time.perf_counter() - start) * 1000
+            return result
+        except XIQSE.TransportError as e:
+            raise Exception(f"GraphQL request failed: {e}")
+
+    def batch(self, max_operations=None, max_bytes=None, cache=True):
+        return XIQSE.Batch(self, max_operations or XIQSE.Batch.MAX_OPERATIONS, max_bytes or XIQSE.Batch.MAX_BYTES, cache)
+
+    def iter_devices(self, fields, page_size=500):
+        for field in fields:
+            if not XIQSE.FIELD_PATTERN.match(field):
+                raise Exception("Invalid device field name: "+field)
+
+        offset = 0
+        while True:
+            result  = self.graphql(XIQSE.query.network.devicesPage(fields), {"offset": offset, "limit": page_size})
+            devices = (result.get("data") or {}).get("network", {}).get("devices")
+
+            if devices is None and offset == 0:
+                # Servers without paging arguments on network.devices only support a single full fetch.
+                result  = self.graphql(XIQSE.query.network.devicesFields(fields))
+                devices = (result.get("data") or {}).get("network", {}).get("devices")
+                page_size = None
+
+            if devices is None:
+                errors = result.get("errors") or [{}]
+                raise Exception("Unable to get devices: " + str(errors[0].get("message", "no data returned")))
+
+            for device in devices:
+                yield device
+
+            if page_size is None or len(devices) != page_size:
+                return
+            offset += page_size
+
+    @staticmethod
+    def operation_state(ip_address, result):
+        errors = result.get("errors")
+        if errors:
+            raise Exception("Unable to read the operation state of device "+ip_address+": "+"; ".join(str(error.get("message", error)) for error in errors))
+
+        device = ((result.get("data") or {}).get("network") or {}).get("device")
+        if device is None:
+            raise Exception("Device "+ip_address+" not found while waiting for the operation to complete.")
+
+        # Without a state, the end of the operation cannot be told apart from a server that does not report it.
+        state = str(device.get("operationStatus") or "").upper()
+        if not state:
+            raise Exception("Device "+ip_address+" reports no operationStatus, unable to wait for the operation to complete.")
+        return state
+
+    def wait_for_device(self, ip_address, deadline, delay=1, max_delay=15):
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise Exception("Timed out waiting for the operation on device "+ip_address+" to complete.")
+
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, max_delay)
+
+            result  = self.graphql(XIQSE.query.network.device.operationState(), {"ipAddress": ip_address}, cache=False)
+            state   = XIQSE.operation_state(ip_address, result)
+            if state in XIQSE.FAILED_STATES:
+                raise Exception("Operation on device "+ip_address+" ended with status "+state+".")
+            if state not in XIQSE.PENDING_STATES:
+                return state
+
+    def wait_for_devices(self, ip_addresses, deadline, delay=1, max_delay=15):
+        # The state of every pending device is read with one batched request per round.
+        done    = {}
+        pending = list(ip_addresses)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, max_delay)
+
+            batch = self.batch(cache=False)
+            for ip_address in pending:
+                batch.add(XIQSE.query.network.device.operationState(), {"ipAddress": ip_address})
+
+            now = time.monotonic()
+            for ip_address, result in zip(pending, batch.execute()):
+                try:
+                    state = XIQSE.operation_state(ip_address, result)
+                except Exception as e:
+                    done[ip_address] = (None, now, str(e))
+                    continue
+
+                if state not in XIQSE.PENDING_STATES:
+                    done[ip_address] = (state, now, None)
+            pending = [ip_address for ip_address in pending if ip_address not in done]
+        return done
+
+    def post_graphql(self, query, variables, token):
         url = f"{self.base_url()}/nbi/graphql"
         headers = {
-            "Authorization": f"Bearer {self.token}",
+            "Authorization": f"Bearer {token}",
             "Content-Type": "application/json"
         }
 
+        # A mutation that timed out or lost its connection while waiting for the answer may have been applied, never replay it.
+        is_mutation = XIQSE.operation_fields(query)[0] == "mutation"
+
         try:
-            response = requests.post(
+            return self.post(
                 url,
-                json={"query": query, "variables": variables},
-                headers=headers,
-                timeout=self.timeout,
-                verify=self.validate_certs
+                operation=XIQSE.operation_name(query) if self.metrics is not None else None,
+                idempotent=not is_mutation,
+                body=json.dumps({"query": query, "variables": variables}).encode("utf-8"),
+                headers=headers
             )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+        except XIQSE.TransportError as e:
             raise Exception(f"GraphQL request failed: {e}")
 
+    def post(self, url, operation=None, idempotent=True, body=None, headers=None, auth=None):
+        attempt = 0
+        while True:
+            self.circuit_check()
+            if self.metrics is not None:
+                self.metrics.start()
+            try:
+                response = self.transport.post(url, body, headers or {}, auth)
+            except XIQSE.TransportError as e:
+                if self.metrics is not None:
+                    self.metrics.finish(operation, attempt, error=type(e.__cause__ or e).__name__)
+                # ConnectError covers refused and reset connections as well as connect timeouts, the request never reached XIQ-SE.
+                # After a read timeout or a connection aborted once the request was sent, only idempotent requests are replayed.
+                unsent = isinstance(e, XIQSE.ConnectError) and not isinstance(e, XIQSE.ConnectionAborted)
+                if not unsent and not (idempotent and isinstance(e, (XIQSE.ConnectionAborted, XIQSE.ReadTimeout))):
+                    raise
+                self.circuit_failure()
+                if attempt >= self.retries:
+                    raise
+                delay = self.backoff(attempt)
+            else:
+                if self.metrics is not None:
+                    response.xiqse_metrics = self.metrics.finish(operation, attempt, response=response)
+                # A gateway answering 502 or 504 may already have passed the request to XIQ-SE, only 429 and 503 mean it was refused.
+                retry_statuses = XIQSE.RETRY_STATUSES if idempotent else XIQSE.REJECTED_STATUSES
+                if response.status_code not in retry_statuses:
+                    if response.status_code >= 500:
+                        self.circuit_failure()
+                    else:
+                        self.circuit_success()
+                    return response
+                if response.status_code != 429:
+                    self.circuit_failure()
+                if attempt >= self.retries:
+                    return response
+                delay = max(self.backoff(attempt), self.retry_after(response))
+
+            attempt += 1
+            self.count("retries")
+            time.sleep(min(delay, self.retry_max_delay))
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.retry_max_delay, self.retry_backoff * (2 ** attempt)))
+
+    @staticmethod
+    def retry_after(response):
+        value = response.headers.get("Retry-After")
+        if not value:
+            return 0
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        from email.utils import parsedate_to_datetime
+
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return 0
+
+    def circuit_key(self):
+        return hashlib.sha256(self.base_url().encode("utf-8")).hexdigest()
+
+    def circuit_check(self):
+        if self.circuit is None:
+            return
+
+        state = self.circuit.get(self.circuit_key())
+        if state and state.get("open_until", 0) > time.time():
+            raise XIQSE.ConnectError(
+                f"Circuit breaker open for {self.base_url()} after {state.get('failures')} consecutive failures, "
+                f"retry in {int(state['open_until'] - time.time()) + 1}s"
+            )
+
+    def circuit_failure(self):
+        if self.circuit is None:
+            return
+
+        now = time.time()
+        with self.circuit.lock(exclusive=True):
+            state       = self.circuit.get(self.circuit_key(), locked=True) or {"failures": 0, "open_until": 0}
+            failures    = state["failures"] + 1
+            open_until  = now + self.circuit_cooldown if failures >= self.circuit_threshold else state["open_until"]
+            self.circuit.put(self.circuit_key(), {"failures": failures, "open_until": open_until}, max(open_until, now) + self.circuit_cooldown)
+
+    def circuit_success(self):
+        if self.circuit is None:
+            return
+
+        if self.circuit.get(self.circuit_key()):
+            self.circuit.discard(self.circuit_key())
+
+    class TransportError(Exception):
+        pass
+
+    class ConnectError(TransportError):
+        pass
+
+    class ConnectionAborted(ConnectError):
+        pass
+
+    class ReadTimeout(TransportError):
+        pass
+
+    class Response:
+        def __init__(self, url, status_code, reason, headers, content, elapsed, bytes_out):
+            self.url            = url
+            self.status_code    = status_code
+            self.reason         = reason
+            self.headers        = headers
+            self.content        = content
+            self.elapsed        = elapsed
+            self.bytes_out      = bytes_out
+
+        def json(self):
+            try:
+                return json.loads(self.content.decode("utf-8"))
+            except ValueError as e:
+                raise XIQSE.TransportError(f"Invalid JSON in the response of {self.url}: {e}")
+
+        def raise_for_status(self):
+            if self.status_code >= 400:
+                kind = "Client" if self.status_code < 500 else "Server"
+                raise XIQSE.TransportError(f"{self.status_code} {kind} Error: {self.reason} for url: {self.url}")
+
+    class RequestsTransport:
+        def __init__(self, pool_size, validate_certs, timeout, instrument=False):
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self.requests       = requests
+            self.validate_certs = validate_certs
+            self.timeout        = timeout
+            self.session        = requests.Session()
+            self.session.headers.update({"Connection": "keep-alive"})
+
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+
+            if instrument:
+                self.instrument()
+
+            if not validate_certs:
+                import urllib3
+                urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+        def instrument(self):
+            import urllib3
+
+            class TimedHTTPConnection(XIQSE.Metrics.TimedConnection, urllib3.connection.HTTPConnection):
+                pass
+
+            class TimedHTTPSConnection(XIQSE.Metrics.TimedConnection, urllib3.connection.HTTPSConnection):
+                tls = True
+
+            class TimedHTTPConnectionPool(urllib3.HTTPConnectionPool):
+                ConnectionCls = TimedHTTPConnection
+
+            class TimedHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+                ConnectionCls = TimedHTTPSConnection
+
+            for adapter in set(self.session.adapters.values()):
+                adapter.poolmanager.pool_classes_by_scheme = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+        def post(self, url, body, headers, auth=None):
+            exceptions = self.requests.exceptions
+            try:
+                response = self.session.post(url, data=body, headers=headers, auth=auth, timeout=self.timeout, verify=self.validate_certs)
+            except exceptions.ConnectionError as e:
+                from urllib3.exceptions import ProtocolError
+
+                # urllib3 reports a connection lost while sending or receiving as a ProtocolError, the request may have been processed.
+                if any(isinstance(arg, ProtocolError) for arg in e.args):
+                    raise XIQSE.ConnectionAborted(str(e)) from e
+                raise XIQSE.ConnectError(str(e)) from e
+            except exceptions.Timeout as e:
+                raise XIQSE.ReadTimeout(str(e)) from e
+            except exceptions.RequestException as e:
+                raise XIQSE.TransportError(str(e)) from e
+
+            return XIQSE.Response(url, response.status_code, response.reason, response.headers, response.content,
+                                  response.elapsed.total_seconds(), len(body or b""))
+
+        def close(self):
+            self.session.close()
+
+    class StdlibTransport:
+        def __init__(self, pool_size, validate_certs, timeout):
+            self.validate_certs = validate_certs
+            self.timeout        = timeout
+            self.context        = None
+            self.idle           = []
+            self.lock           = threading.Lock()
+            self.slots          = threading.BoundedSemaphore(max(1, pool_size))
+
+        def ssl_context(self):
+            import ssl
+
+            if self.context is None:
+                context = ssl.create_default_context()
+                if not self.validate_certs:
+                    context.check_hostname  = False
+                    context.verify_mode     = ssl.CERT_NONE
+                self.context = context
+            return self.context
+
+        def acquire(self, scheme, host, port):
+            import http.client
+            import select
+
+            with self.lock:
+                while self.idle:
+                    key, connection = self.idle.pop()
+                    # A keep-alive connection the server has closed in the meantime reads as ready, drop it.
+                    if key == (scheme, host, port) and not select.select([connection.sock], [], [], 0)[0]:
+                        return connection
+                    connection.close()
+            return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+        def connect(self, connection, scheme):
+            import socket
+
+            start = time.perf_counter()
+            sock  = socket.create_connection((connection.host, connection.port), self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            XIQSE.Metrics.timings.connect = time.perf_counter() - start
+            if scheme == "https":
+                try:
+                    sock = self.ssl_context().wrap_socket(sock, server_hostname=connection.host)
+                except BaseException:
+                    sock.close()
+                    raise
+                XIQSE.Metrics.timings.handshake = time.perf_counter() - start
+            connection.sock = sock
+
+        def post(self, url, body, headers, auth=None):
+            import base64
+            import http.client
+            import socket
+            from urllib.parse import urlsplit
+
+            parts   = urlsplit(url)
+            path    = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+            headers = dict(headers, Connection="keep-alive")
+            if auth:
+                credentials = base64.b64encode(f"{auth[0]}:{auth[1]}".encode("utf-8")).decode("ascii")
+                headers["Authorization"] = f"Basic {credentials}"
+
+            with self.slots:
+                connection  = self.acquire(parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+                start       = time.perf_counter()
+                sent        = False
+                try:
+                    if connection.sock is None:
+                        try:
+                            self.connect(connection, parts.scheme)
+                        except OSError as e:
+                            raise XIQSE.ConnectError(f"Unable to connect to {parts.hostname}:{connection.port}: {e}") from e
+
+                    connection.request("POST", path, body=body or b"", headers=headers)
+                    sent        = True
+                    response    = connection.getresponse()
+                    elapsed     = time.perf_counter() - start
+                    content     = response.read()
+                except XIQSE.TransportError:
+                    connection.close()
+                    raise
+                except socket.timeout as e:
+                    connection.close()
+                    raise XIQSE.ReadTimeout(f"Read timed out after {self.timeout}s for url: {url}") from e
+                except (OSError, http.client.HTTPException) as e:
+                    connection.close()
+                    error = XIQSE.ConnectionAborted if sent else XIQSE.ConnectError
+                    raise error(f"Connection to {parts.hostname}:{connection.port} aborted: {e!r}") from e
+
+                if response.will_close:
+                    connection.close()
+                else:
+                    with self.lock:
+                        self.idle.append(((parts.scheme, parts.hostname, connection.port), connection))
+
+            return XIQSE.Response(url, response.status, response.reason, response.headers, content, elapsed, len(body or b""))
+
+        def close(self):
+            with self.lock:
+                while self.idle:
+                    self.idle.pop()[1].close()
+
+    class Batch:
+        TOKEN_PATTERN   = re.compile(r'(?P<string>"""(?:\\.|[^\\])*?"""|"(?:\\.|[^"\\\n])*")|(?P<comment>#[^\n]*)|(?P<name>[_A-Za-z][_0-9A-Za-z]*)|(?P<space>[\s,]+)|(?P<punct>\.\.\.|\S)')
+        MAX_OPERATIONS  = 50
+        MAX_BYTES       = 256 * 1024
+
+        def __init__(self, client, max_operations=MAX_OPERATIONS, max_bytes=MAX_BYTES, cache=True):
+            self.client         = client
+            self.max_operations = max_operations
+            self.max_bytes      = max_bytes
+            self.cache          = cache
+            self.operations     = []
+
+        def add(self, query, variables=None):
+            self.operations.append((query, variables or {}))
+            return len(self.operations) - 1
+
+        def execute(self):
+            results = [None] * len(self.operations)
+            groups  = {}
+
+            for index, (query, variables) in enumerate(self.operations):
+                try:
+                    kind = self.split(query, "")[0]
+                except ValueError:
+                    results[index] = self.client.graphql(query, variables, cache=self.cache)
+                    continue
+                groups.setdefault(kind, []).append(index)
+
+            for kind, indexes in groups.items():
+                for chunk in self.chunk(indexes):
+                    for index, result in zip(chunk, self.send(kind, chunk)):
+                        results[index] = result
+
+            self.operations = []
+            return results
+
+        def chunk(self, indexes):
+            chunk, size = [], 0
+            for index in indexes:
+                length = len(self.operations[index][0])
+                if chunk and (len(chunk) >= self.max_operations or size + length > self.max_bytes):
+                    yield chunk
+                    chunk, size = [], 0
+                chunk.append(index)
+                size += length
+            if chunk:
+                yield chunk
+
+        def send(self, kind, chunk):
+            if len(chunk) == 1:
+                return [self.client.graphql(*self.operations[chunk[0]], cache=self.cache)]
+
+            definitions, selections, variables = [], [], {}
+            for position, index in enumerate(chunk):
+                query, values = self.operations[index]
+                prefix = f"b{position}_"
+                definition, selection = self.split(query, prefix)[1:]
+                if definition:
+                    definitions.append(definition)
+                selections.append(selection)
+                variables.update((prefix + name, value) for name, value in values.items())
+
+            header      = f"{kind} Batch({', '.join(definitions)})" if definitions else kind
+            document    = header + " {\n" + "\n".join(selections) + "\n}"
+            result      = self.client.graphql(document, variables, cache=self.cache)
+            data        = result.get("data")
+            results     = [{"data": None if data is None else {}} for _ in chunk]
+
+            for key, value in (data or {}).items():
+                position, name = self.demux(key)
+                if position is not None and position < len(chunk):
+                    results[position]["data"][name] = value
+
+            unassigned = []
+            for error in result.get("errors") or []:
+                path = error.get("path") or []
+                position, name = self.demux(path[0]) if path and isinstance(path[0], str) else (None, None)
+                if position is None or position >= len(chunk):
+                    unassigned.append(error)
+                    continue
+                results[position].setdefault("errors", []).append(dict(error, path=[name] + list(path[1:])))
+
+            # An error without a path rejects the whole document before execution, most often a
+            # validation error in one of the operations: run them one by one to isolate it.
+            if unassigned and data is None:
+                return [self.client.graphql(*self.operations[index], cache=self.cache) for index in chunk]
+            for result in results:
+                if unassigned:
+                    result.setdefault("errors", []).extend(unassigned)
+            return results
+
+        @staticmethod
+        def demux(key):
+            match = re.match(r"^b(\d+)_(.+)$", key)
+            if not match:
+                return None, None
+            return int(match.group(1)), match.group(2)
+
+        @classmethod
+        def split(cls, query, prefix):
+            tokens  = [(match.lastgroup, match.group()) for match in cls.TOKEN_PATTERN.finditer(query) if match.lastgroup != "comment"]
+            solid   = [index for index, (kind, text) in enumerate(tokens) if kind != "space"]
+
+            # Variable names follow a $, possibly after ignored characters.
+            for previous, index in zip(solid, solid[1:]):
+                if tokens[previous][1] == "$" and tokens[index][0] == "name":
+                    tokens[index] = ("name", prefix + tokens[index][1])
+
+            if not solid:
+                raise ValueError("Empty GraphQL document")
+
+            position, kind = 0, "query"
+            if tokens[solid[0]][1] in ("query", "mutation", "subscription"):
+                kind, position = tokens[solid[0]][1], 1
+                if position < len(solid) and tokens[solid[position]][0] == "name":
+                    position += 1
+
+            definition = ""
+            if position < len(solid) and tokens[solid[position]][1] == "(":
+                end = cls.closing(tokens, solid, position, "(", ")")
+                definition = "".join(text for kind_, text in tokens[solid[position] + 1:solid[end]]).strip()
+                position = end + 1
+
+            if position >= len(solid) or tokens[solid[position]][1] != "{":
+                raise ValueError("Unsupported GraphQL document")
+            end = cls.closing(tokens, solid, position, "{", "}")
+            if end != len(solid) - 1:
+                raise ValueError("Only one operation per document can be batched")
+
+            depth       = 0
+            previous    = None
+            for index in solid[position + 1:end]:
+                token_kind, text = tokens[index]
+                if depth == 0 and token_kind == "name" and previous not in (":", "@", "$") and text != "on":
+                    following = next((tokens[i][1] for i in solid if i > index), None)
+                    tokens[index] = (token_kind, prefix + text if following == ":" else f"{prefix}{text}: {text}")
+                if depth == 0 and text == "...":
+                    raise ValueError("Fragments can not be batched")
+                if text in ("{", "("):
+                    depth += 1
+                elif text in ("}", ")"):
+                    depth -= 1
+                previous = text
+
+            selection = "".join(text for kind_, text in tokens[solid[position] + 1:solid[end]]).strip()
+            return kind, definition, selection
+
+        @staticmethod
+        def closing(tokens, solid, position, opening, closing):
+            depth = 0
+            for index in range(position, len(solid)):
+                text = tokens[solid[index]][1]
+                if text == opening:
+                    depth += 1
+                elif text == closing:
+                    depth -= 1
+                    if depth == 0:
+                        return index
+            raise ValueError("Unbalanced GraphQL document")
+
+    class Metrics:
+        timings = threading.local()
+
+        class TimedConnection:
+            tls = False
+
+            def _new_conn(self):
+                start = time.perf_counter()
+                try:
+                    return super()._new_conn()
+                finally:
+                    XIQSE.Metrics.timings.connect = time.perf_counter() - start
+
+            def connect(self):
+                start = time.perf_counter()
+                try:
+                    return super().connect()
+                finally:
+                    if self.tls:
+                        XIQSE.Metrics.timings.handshake = time.perf_counter() - start
+
+        def __init__(self):
+            self.lock       = threading.Lock()
+            self.requests   = []
+            self.counters   = {"auth_requests": 0, "token_cache_hits": 0, "response_cache_hits": 0, "retries": 0}
+
+        def count(self, name, value=1):
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+        def start(self):
+            XIQSE.Metrics.timings.connect   = None
+            XIQSE.Metrics.timings.handshake = None
+            XIQSE.Metrics.timings.started   = time.perf_counter()
+
+        def finish(self, operation, attempt, response=None, error=None):
+            timings = XIQSE.Metrics.timings
+            entry   = {"operation": operation or "unknown", "attempt": attempt, "total_ms": (time.perf_counter() - timings.started) * 1000}
+
+            # DNS resolution is part of connect_ms, tls_ms is only measured for HTTPS connections.
+            if timings.connect is not None:
+                entry["connect_ms"] = timings.connect * 1000
+                if timings.handshake is not None:
+                    entry["tls_ms"] = (timings.handshake - timings.connect) * 1000
+            if response is not None:
+                entry["status"]     = response.status_code
+                entry["server_ms"]  = response.elapsed * 1000 - (timings.handshake or timings.connect or 0) * 1000
+                entry["transfer_ms"]= entry["total_ms"] - response.elapsed * 1000
+                entry["bytes_out"]  = response.bytes_out
+                entry["bytes_in"]   = len(response.content)
+            if error is not None:
+                entry["error"] = error
+            return self.record(**entry)
+
+        def record(self, **entry):
+            with self.lock:
+                self.requests.append(entry)
+            return entry
+
+        def report(self):
+            with self.lock:
+                entries = [dict((key, round(value, 3) if isinstance(value, float) else value) for key, value in entry.items()) for entry in self.requests]
+                return dict(self.counters, requests=entries, total_ms=round(sum(entry["total_ms"] for entry in self.requests), 3))
+
+        @staticmethod
+        def merge(servers):
+            merged = dict(requests=[], total_ms=0)
+            for server, metrics in servers.items():
+                report = metrics.report()
+                for name, value in report.items():
+                    if name not in ("requests", "total_ms"):
+                        merged[name] = merged.get(name, 0) + value
+                merged["requests"] += [dict(entry, server=server) for entry in report["requests"]]
+                merged["total_ms"] = round(merged["total_ms"] + report["total_ms"], 3)
+            return merged
+
+    class SiteIndex:
+        class Node:
+            __slots__ = ("path", "site", "children", "devices")
+
+            def __init__(self, path):
+                self.path       = path
+                self.site       = None
+                self.children   = {}
+                self.devices    = []
+
+        def __init__(self, sites=(), devices=()):
+            self.root = XIQSE.SiteIndex.Node("/")
+            for site in sites:
+                self.add_site(site)
+            for device in devices:
+                self.add_device(device)
+
+        @classmethod
+        def from_client(cls, xiqse, device_fields=None, page_size=500, site_prefix=None):
+            result  = xiqse.graphql(XIQSE.query.network.sites())
+            sites   = ((result.get("data") or {}).get("network") or {}).get("sites")
+            if sites is None:
+                errors = result.get("errors") or [{}]
+                raise Exception("Unable to get sites: " + str(errors[0].get("message", "no data returned")))
+
+            index = cls(sites)
+            # The devices are not read when the subtree does not exist, and the ones outside of it are dropped as each page is decoded.
+            if device_fields is not None and (not site_prefix or index.node(site_prefix) is not None):
+                fields = device_fields if "sitePath" in device_fields else list(device_fields) + ["sitePath"]
+                for device in xiqse.iter_devices(fields, page_size):
+                    if not site_prefix or XIQSE.in_site(device.get("sitePath"), site_prefix):
+                        index.add_device(device)
+            return index
+
+        @staticmethod
+        def levels(site_path):
+            return [level for level in (site_path or "").split("/") if level]
+
+        @staticmethod
+        def normalize(site_path):
+            return "/" + "/".join(XIQSE.SiteIndex.levels(site_path))
+
+        def node(self, site_path, create=False):
+            node = self.root
+            for level in self.levels(site_path):
+                child = node.children.get(level)
+                if child is None:
+                    if not create:
+                        return None
+                    child = node.children[level] = XIQSE.SiteIndex.Node(node.path.rstrip("/") + "/" + level)
+                node = child
+            return node
+
+        def add_site(self, site):
+            self.node(site.get("location"), create=True).site = site
+
+        def add_device(self, device):
+            self.node(device.get("sitePath"), create=True).devices.append(device)
+
+        def get(self, site_path):
+            node = self.node(site_path)
+            return node.site if node is not None else None
+
+        def __contains__(self, site_path):
+            return self.get(site_path) is not None
+
+        def ancestors(self, site_path):
+            paths, node = [], self.root
+            for level in self.levels(site_path)[:-1]:
+                node = node.children.get(level)
+                if node is None:
+                    break
+                if node.site is not None:
+                    paths.append(node.path)
+            return paths
+
+        def walk(self, site_path="/"):
+            node = self.node(site_path)
+            stack = [node] if node is not None else []
+            # Depth first, parents before their children and siblings in name order.
+            while stack:
+                node = stack.pop()
+                yield node
+                stack.extend(node.children[level] for level in sorted(node.children, reverse=True))
+
+        def descendants(self, site_path="/", include_self=True):
+            start = self.normalize(site_path)
+            return [node.path for node in self.walk(start) if node.site is not None and (include_self or node.path != start)]
+
+        def sites(self, site_path="/"):
+            return [node.site for node in self.walk(site_path) if node.site is not None]
+
+        def devices(self, site_path="/"):
+            return [device for node in self.walk(site_path) for device in node.devices]
+
+    class FileCache:
+        def __init__(self, path):
+            self.path       = os.path.abspath(os.path.expanduser(path))
+            self.lock_path  = self.path + ".lock"
+
+        @contextmanager
+        def lock(self, exclusive=False):
+            directory = os.path.dirname(self.path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory, mode=0o700, exist_ok=True)
+
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+        def read(self):
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return {}
+            return data if isinstance(data, dict) else {}
+
+        def write(self, data):
+            now     = time.time()
+            data    = dict((k, v) for k, v in data.items() if v.get("expires_at", 0) > now)
+            XIQSE.FileCache.dump(self.path, data)
+
+        @staticmethod
+        def dump(path, data):
+            import tempfile
+
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".xiqse_")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(data, f)
+                os.chmod(tmp_path, 0o600)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+
+        def get(self, key, locked=False, with_expiry=False):
+            if locked:
+                entry = self.read().get(key)
+            else:
+                with self.lock():
+                    entry = self.read().get(key)
+
+            if isinstance(entry, dict) and entry.get("expires_at", 0) > time.time():
+                return (entry.get("value"), entry["expires_at"]) if with_expiry else entry.get("value")
+            return None
+
+        def put(self, key, value, expires_at):
+            data        = self.read()
+            data[key]   = {"value": value, "expires_at": expires_at}
+            self.write(data)
+
+        def discard(self, key, value=None):
+            with self.lock(exclusive=True):
+                data = self.read()
+                if key in data and (value is None or data[key].get("value") == value):
+                    del data[key]
+                    self.write(data)
+
+    class ResponseCache:
+        def __init__(self, path, size=256):
+            self.path   = os.path.abspath(os.path.expanduser(path))
+            self.size   = size
+            self.index  = XIQSE.FileCache(os.path.join(self.path, "index.json"))
+
+        def entry_path(self, key):
+            return os.path.join(self.path, key + ".json")
+
+        def get(self, key):
+            if self.index.get(key) is None:
+                return None
+            try:
+                with open(self.entry_path(key), "r") as f:
+                    entry = json.load(f)
+                if entry.get("expires_at", 0) <= time.time():
+                    return None
+                # The modification time of an entry is its last use, for the LRU eviction.
+                os.utime(self.entry_path(key))
+            except (OSError, ValueError):
+                return None
+            return entry.get("value")
+
+        def put(self, key, value, ttl, fields):
+            expires_at = time.time() + ttl
+            with self.index.lock(exclusive=True):
+                import tempfile
+
+                fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix=".xiqse_")
+                try:
+                    with os.fdopen(fd, "w") as f:
+                        json.dump({"value": value, "expires_at": expires_at}, f)
+                    os.chmod(tmp_path, 0o600)
+                    os.replace(tmp_path, self.entry_path(key))
+                except Exception:
+                    if os.path.exists(tmp_path):
+                        os.unlink(tmp_path)
+                    raise
+
+                data        = self.index.read()
+                data[key]   = {"value": fields, "expires_at": expires_at}
+                self.evict(data)
+
+        def invalidate(self, fields=None):
+            with self.index.lock(exclusive=True):
+                data = self.index.read()
+                for key in list(data):
+                    if fields is None or set(data[key].get("value") or []) & set(fields):
+                        del data[key]
+                self.evict(data)
+
+        def last_used(self, key):
+            try:
+                return os.path.getmtime(self.entry_path(key))
+            except OSError:
+                return 0
+
+        def evict(self, data):
+            now     = time.time()
+            live    = [key for key, entry in data.items() if entry.get("expires_at", 0) > now]
+            keep    = set(sorted(live, key=self.last_used, reverse=True)[:max(0, self.size)])
+
+            for name in os.listdir(self.path):
+                if name.endswith(".json") and name != "index.json" and name[:-5] not in keep:
+                    try:
+                        os.unlink(os.path.join(self.path, name))
+                    except OSError:
+                        pass
+            self.index.write(dict((key, data[key]) for key in keep))
+
     class mutation:
         @staticmethod
         def network_addDevice():
@@ -92,6 +1319,30 @@ class XIQSE:
           }
           """
 
+        @staticmethod
+        def network_addDevices(count):
+          variables = ", ".join(f"$deviceIp{i}: String!, $profileName{i}: String!, $sitePath{i}: String!" for i in range(count))
+          devices   = "\n".join(f"{{ ipAddress: $deviceIp{i}, profileName: $profileName{i}, siteLocation: $sitePath{i} }}" for i in range(count))
+          return f"""
+          mutation Devices({variables}) {{
+            network {{
+              createDevices(input: {{
+                devices: [
+                  {devices}
+                ]
+              }}){{
+                results {{
+                  deviceId
+                  ipAddress
+                  message
+                  seriallNumber
+                  status
+                }}
+              }}
+            }}
+          }}
+          """
+
         @staticmethod
         def network_enforceAllDevices():
           return """
@@ -126,6 +1377,18 @@ class XIQSE:
             }
           """
 
+        @staticmethod
+        def network_createSites(count):
+          variables = ", ".join(f"$sitePath{i}: String!" for i in range(count))
+          fields    = "\n".join(f"s{i}: createSite(input: {{ siteLocation: $sitePath{i} }}){{ errorCode siteId siteLocation status }}" for i in range(count))
+          return f"""
+            mutation Sites({variables}) {{
+              network {{
+                {fields}
+              }}
+            }}
+          """
+
         @staticmethod
         def network_deleteSite():
           return """
@@ -143,6 +1406,18 @@ class XIQSE:
             }
           """
 
+        @staticmethod
+        def network_deleteSites(count):
+          variables = ", ".join(f"$sitePath{i}: String!" for i in range(count))
+          fields    = "\n".join(f"s{i}: deleteSite(input: {{ siteLocation: $sitePath{i} }}){{ errorCode siteId siteLocation status }}" for i in range(count))
+          return f"""
+            mutation Sites({variables}) {{
+              network {{
+                {fields}
+              }}
+            }}
+          """
+
         @staticmethod
         def network_readDevices():
             return """
@@ -205,6 +1480,30 @@ class XIQSE:
               }
             """
 
+          @staticmethod
+          def devicesPage(fields):
+            return f"""
+              query Devices($offset: Int!, $limit: Int!) {{
+                network {{
+                  devices(offset: $offset, limit: $limit) {{
+                    {" ".join(fields)}
+                  }}
+                }}
+              }}
+            """
+
+          @staticmethod
+          def devicesFields(fields):
+            return f"""
+              query {{
+                network {{
+                  devices {{
+                    {" ".join(fields)}
+                  }}
+                }}
+              }}
+            """
+
           @staticmethod
           def sites():
             return """
@@ -235,6 +1534,22 @@ class XIQSE:
                 }
               """
 
+            @staticmethod
+            def facts(fields):
+              for field in fields:
+                if not XIQSE.FIELD_PATTERN.match(field):
+                  raise Exception("Invalid device field name: "+field)
+
+              return f"""
+                query Device($ipAddress: String!) {{
+                  network {{
+                    device(ip: $ipAddress){{
+                      {" ".join(fields)}
+                    }}
+                  }}
+                }}
+              """
+
             @staticmethod
             def getFirmware():
               return """
@@ -247,6 +1562,31 @@ class XIQSE:
                 }
               """
 
+            @staticmethod
+            def operationState():
+              return """
+                query Device($ipAddress: String!) {
+                  network {
+                    device(ip: $ipAddress){
+                      ip
+                      operationStatus
+                    }
+                  }
+                }
+              """
+
+            @staticmethod
+            def getFirmwares(count):
+              variables = ", ".join(f"$ip{i}: String!" for i in range(count))
+              fields    = "\n".join(f"d{i}: device(ip: $ip{i}){{ firmware }}" for i in range(count))
+              return f"""
+                query Devices({variables}) {{
+                  network {{
+                    {fields}
+                  }}
+                }}
+              """
+
           class site:
             @staticmethod
             def byLocation():
@@ -264,37 +1604,147 @@ class XIQSE:
 
     class params:
         @staticmethod
-        def get_ipAddress():
-            return dict(type="str", required=True)
+        def get_batch_size():
+            return dict(type="int", required=False, default=50)
+
+        @staticmethod
+        def get_chunk_size():
+            return dict(type="int", required=False, default=100)
+
+        @staticmethod
+        def get_devices():
+            return dict(
+                type="list", elements="dict", required=False, options=dict(
+                    ip=dict(type="str", required=True),
+                    profile=dict(type="str", required=False),
+                    site=dict(type="str", required=False)
+                )
+            )
+
+        @staticmethod
+        def get_flatten():
+            return dict(type="bool", required=False, default=False)
 
         @staticmethod
-        def get_mutation():
-            return dict(type="str", required=True)
+        def get_fields(default):
+            return dict(type="list", elements="str", required=False, default=default)
+
+        @staticmethod
+        def get_gather_subset():
+            return dict(type="list", elements="str", required=False, default=["all"])
+
+        @staticmethod
+        def get_include(choices, default):
+            return dict(type="list", elements="str", required=False, choices=choices, default=default)
+
+        @staticmethod
+        def get_index_by():
+            return dict(type="str", required=False)
+
+        @staticmethod
+        def get_ipAddress(required=True):
+            return dict(type="str", required=required)
+
+        @staticmethod
+        def get_ipAddresses():
+            return dict(type="list", elements="str", required=False)
+
+        @staticmethod
+        def get_max_concurrency():
+            return dict(type="int", required=False, default=10)
+
+        @staticmethod
+        def get_mutation(required=True):
+            return dict(type="str", required=required)
+
+        @staticmethod
+        def get_mutations():
+            return dict(
+                type="list", elements="dict", required=False, options=dict(
+                    mutation=dict(type="str", required=True),
+                    variables=dict(type="dict", required=False, default={})
+                )
+            )
         
         @staticmethod
-        def get_profile_name():
-            return dict(type="str", required=True)
+        def get_page_size():
+            return dict(type="int", required=False, default=500)
+
+        @staticmethod
+        def get_profile_name(required=True):
+            return dict(type="str", required=required)
 
         @staticmethod
         def get_provider():
+            return dict(type="dict", required=False, options=XIQSE.params.get_provider_options())
+
+        @staticmethod
+        def get_provider_options():
+            return dict(
+                protocol=dict(type="str", required=False, default="https"),
+                host=dict(type="str", required=True),
+                port=dict(type="int", required=False, default=8443),
+                client_id=dict(type="str", required=True, no_log=True),
+                client_secret=dict(type="str", required=True, no_log=True),
+                verify=dict(type="bool", required=False, default=True),
+                token_cache=dict(type="bool", required=False, default=True),
+                token_cache_path=dict(type="path", required=False),
+                pool_size=dict(type="int", required=False, default=10),
+                retries=dict(type="int", required=False, default=3),
+                retry_backoff=dict(type="float", required=False, default=0.5),
+                retry_max_delay=dict(type="float", required=False, default=30),
+                circuit_breaker_threshold=dict(type="int", required=False, default=5),
+                circuit_breaker_cooldown=dict(type="int", required=False, default=30),
+                circuit_breaker_path=dict(type="path", required=False),
+                metrics=dict(type="bool", required=False, default=False),
+                response_cache=dict(type="bool", required=False, default=False),
+                response_cache_path=dict(type="path", required=False),
+                response_cache_ttl=dict(type="int", required=False, default=60),
+                response_cache_ttls=dict(type="dict", required=False),
+                response_cache_size=dict(type="int", required=False, default=256),
+                transport=dict(type="str", required=False, default="requests", choices=["requests", "stdlib"]),
+                broker=dict(type="bool", required=False, default=False),
+                broker_path=dict(type="path", required=False),
+                broker_window=dict(type="float", required=False, default=0.01),
+            )
+
+        @staticmethod
+        def get_providers():
+            options = dict(XIQSE.params.get_provider_options(), name=dict(type="str", required=False), timeout=dict(type="int", required=False))
+            return dict(type="list", elements="dict", required=False, options=options)
+
+        @staticmethod
+        def get_queries():
             return dict(
-                type="dict", required=True, options=dict(
-                    protocol=dict(type="str", required=False, default="https"),
-                    host=dict(type="str", required=True),
-                    port=dict(type="int", required=False, default=8443),
-                    client_id=dict(type="str", required=True, no_log=True),
-                    client_secret=dict(type="str", required=True, no_log=True),
-                    verify=dict(type="bool", required=False, default=True),
+                type="list", elements="dict", required=False, options=dict(
+                    query=dict(type="str", required=True),
+                    variables=dict(type="dict", required=False, default={})
                 )
             )
 
         @staticmethod
-        def get_query():
-            return dict(type="str", required=True)
+        def get_query(required=True):
+            return dict(type="str", required=required)
+
+        @staticmethod
+        def get_select():
+            return dict(type="str", required=False)
+
+        @staticmethod
+        def get_site_prefix():
+            return dict(type="str", required=False)
+
+        @staticmethod
+        def get_sitePath(required=True):
+            return dict(type="str", required=required)
+
+        @staticmethod
+        def get_sitePaths():
+            return dict(type="list", elements="str", required=False)
 
         @staticmethod
-        def get_sitePath():
-            return dict(type="str", required=True)
+        def get_snapshot_path():
+            return dict(type="path", required=True)
 
         @staticmethod
         def get_state():
@@ -322,4 +1772,16 @@ class XIQSE:
 
         @staticmethod
         def get_timeout():
-            return dict(type="int", required=False, default=30)
\ No newline at end of file
+            return dict(type="int", required=False, default=30)
+
+        @staticmethod
+        def get_update_snapshot():
+            return dict(type="bool", required=False, default=True)
+
+        @staticmethod
+        def get_wait():
+            return dict(type="bool", required=False, default=False)
+
+        @staticmethod
+        def get_wait_timeout():
+            return dict(type="int", required=False, default=300)
\ No newline at end of file
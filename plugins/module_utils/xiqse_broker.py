@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import Future
+
+from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_utils.xiqse import XIQSE
+
+class Broker:
+    IDLE_TIMEOUT = 60
+
+    def __init__(self, client, path, window=0.01):
+        # Clients with different credentials, certificate validation or transport settings never share a broker.
+        settings    = (client.client_secret, client.validate_certs, client.transport_name, client.pool_size, client.timeout,
+                       client.retries, client.retry_backoff, client.retry_max_delay)
+        identity    = client.cache_key() + "|" + json.dumps(settings)
+        name        = "xiqse_broker_" + hashlib.sha256(identity.encode("utf-8")).hexdigest()[:16] + ".sock"
+        self.client = client
+        self.path   = os.path.join(os.path.abspath(os.path.expanduser(path)), name)
+        self.window = window
+
+    def request(self, query, variables):
+        # Any failure to reach the broker makes the client send the query itself.
+        try:
+            sock = self.connect()
+        except OSError:
+            return None
+
+        try:
+            with sock, sock.makefile("rb") as reader:
+                sock.settimeout(self.client.timeout * (self.client.retries + 2) + self.window)
+                sock.sendall((json.dumps({"query": query, "variables": variables}) + "\n").encode("utf-8"))
+                line = reader.readline()
+        except (OSError, socket.timeout):
+            return None
+        if not line:
+            return None
+
+        response = json.loads(line.decode("utf-8"))
+        if "error" in response:
+            raise Exception(response["error"])
+        return response["result"]
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+            return sock
+        except OSError:
+            sock.close()
+
+        # A single fork starts the broker, the others connect to it once the lock is released.
+        with XIQSE.FileCache(self.path).lock(exclusive=True):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.connect(self.path)
+                return sock
+            except OSError:
+                sock.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            self.spawn()
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def spawn(self):
+        # The socket listens before the fork, so that connections queue until the broker accepts them.
+        listener    = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask       = os.umask(0o177)
+        try:
+            listener.bind(self.path)
+        finally:
+            os.umask(umask)
+        listener.listen(128)
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.setsid()
+                if os.fork() == 0:
+                    # Ansible waits for the end of the module output, the broker must not hold it open.
+                    devnull = os.open(os.devnull, os.O_RDWR)
+                    for fd in (0, 1, 2):
+                        os.dup2(devnull, fd)
+                    self.serve(listener)
+            finally:
+                os._exit(0)
+
+        os.waitpid(pid, 0)
+        listener.close()
+
+    def serve(self, listener):
+        client              = self.client
+        client.broker       = None
+        client.metrics      = None
+        client.token_lock   = threading.Lock()
+        client.transport    = client.create_transport(client.transport_name, client.pool_size)
+
+        self.lock       = threading.Lock()
+        self.pending    = []
+        self.inflight   = {}
+        self.last_used  = time.monotonic()
+        inode           = os.stat(self.path).st_ino
+
+        listener.settimeout(1)
+        while True:
+            try:
+                connection = listener.accept()[0]
+            except socket.timeout:
+                with self.lock:
+                    if not self.inflight and time.monotonic() - self.last_used > self.IDLE_TIMEOUT:
+                        break
+                continue
+            connection.settimeout(None)
+            threading.Thread(target=self.handle, args=(connection,), daemon=True).start()
+
+        # A broker started after this one may already own the path.
+        try:
+            if os.stat(self.path).st_ino == inode:
+                os.unlink(self.path)
+        except OSError:
+            pass
+        listener.close()
+
+    def handle(self, connection):
+        try:
+            with connection, connection.makefile("rb") as reader:
+                request     = json.loads(reader.readline().decode("utf-8"))
+                if XIQSE.operation_fields(request["query"])[0] == "mutation":
+                    response = {"error": "The broker does not send mutations."}
+                else:
+                    response = self.submit(request["query"], request.get("variables") or {}).result()
+                connection.sendall((json.dumps(response) + "\n").encode("utf-8"))
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def submit(self, query, variables):
+        key = self.client.response_key(query, variables)
+        with self.lock:
+            self.last_used = time.monotonic()
+            # Identical queries in flight share a single answer.
+            future = self.inflight.get(key)
+            if future is not None:
+                return future
+
+            future = self.inflight[key] = Future()
+            self.pending.append((key, query, variables, future))
+            if len(self.pending) == 1:
+                timer = threading.Timer(self.window, self.flush)
+                timer.daemon = True
+                timer.start()
+        return future
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, []
+
+        # The modules consult their own response cache before asking the broker, polls sent with cache=False must reach XIQ-SE.
+        batch = self.client.batch(cache=False)
+        for key, query, variables, future in pending:
+            batch.add(query, variables)
+        try:
+            responses = [{"result": result} for result in batch.execute()]
+        except Exception as e:
+            responses = [{"error": str(e)}] * len(pending)
+
+        with self.lock:
+            for key, query, variables, future in pending:
+                self.inflight.pop(key, None)
+            self.last_used = time.monotonic()
+        for (key, query, variables, future), response in zip(pending, responses):
+            future.set_result(response)
\ No newline at end of file
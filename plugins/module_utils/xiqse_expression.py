@@ -0,0 +1,142 @@
+import json
+import re
+
+class Expression:
+    UNSUPPORTED   = {"|": "pipes '|'", "&": "'&&' conditions", "@": "current node references '@'", "<": "ordering comparisons", ">": "ordering comparisons"}
+    TOKEN_PATTERN = re.compile(r"\s*(?:(?P<name>[A-Za-z_][A-Za-z0-9_]*)|(?P<number>-?\d+)|'(?P<string>(?:\\.|[^'\\])*)'|`(?P<literal>[^`]*)`|(?P<op>==|!=|\[\]|[.\[\]{}(),:?*]))")
+
+    def __init__(self, expression):
+        self.expression = expression
+        self.tokens     = self.tokenize(expression)
+        self.position   = 0
+        self.steps      = self.parse_steps()
+        if self.peek() is not None:
+            self.fail(f"unexpected {self.peek()[1]!r}")
+
+    def tokenize(self, expression):
+        tokens, position = [], 0
+        expression = expression.strip()
+        while position < len(expression):
+            match = self.TOKEN_PATTERN.match(expression, position)
+            if not match or match.end() == position:
+                position += len(expression[position:]) - len(expression[position:].lstrip())
+                character = expression[position]
+                if character in self.UNSUPPORTED:
+                    self.fail(f"{self.UNSUPPORTED[character]} are not supported")
+                self.fail(f"unexpected character {character!r}")
+            kind = match.lastgroup
+            value = match.group(kind)
+            if kind == "number":
+                value = int(value)
+            elif kind == "string":
+                value = re.sub(r"\\(.)", r"\1", value)
+            elif kind == "literal":
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    self.fail(f"invalid literal `{value}`")
+            tokens.append((kind, value))
+            position = match.end()
+        return tokens
+
+    def fail(self, message):
+        raise ValueError(f"Invalid select expression {self.expression!r}: {message}")
+
+    def peek(self, offset=0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def take(self, value=None):
+        token = self.peek()
+        if token is None or (value is not None and token != ("op", value)):
+            self.fail(f"expected {value!r}" if value else "unexpected end of expression")
+        self.position += 1
+        return token
+
+    def parse_steps(self, stop=(",", "}", "==", "!=", "]")):
+        steps = []
+        while self.peek() is not None and self.peek() not in [("op", value) for value in stop]:
+            kind, value = self.peek()
+            if kind == "name":
+                self.take()
+                steps.append(("field", value))
+            elif (kind, value) == ("op", "."):
+                self.take()
+                if self.peek() is None or self.peek()[0] != "name" and self.peek() != ("op", "{"):
+                    self.fail("expected a field name after '.'")
+            elif (kind, value) == ("op", "[]"):
+                self.take()
+                steps.append(("flatten",))
+            elif (kind, value) == ("op", "["):
+                self.take()
+                steps.append(self.parse_bracket())
+            elif (kind, value) == ("op", "{"):
+                steps.append(self.parse_multiselect())
+            else:
+                self.fail(f"unexpected {value!r}")
+        return steps
+
+    def parse_bracket(self):
+        kind, value = self.take()
+        if (kind, value) == ("op", "*"):
+            self.take("]")
+            return ("project",)
+        if kind == "number":
+            self.take("]")
+            return ("index", value)
+        if (kind, value) == ("op", "?"):
+            path = self.parse_steps()
+            operator = self.take()[1]
+            if operator not in ("==", "!="):
+                self.fail("filters compare with == or !=")
+            kind, literal = self.take()
+            if kind not in ("string", "number", "literal"):
+                self.fail("filters compare with a 'string', a number or a `literal`")
+            self.take("]")
+            return ("filter", path, operator, literal)
+        self.fail(f"unexpected {value!r} in brackets")
+
+    def parse_multiselect(self):
+        self.take("{")
+        pairs = []
+        while True:
+            kind, key = self.take()
+            if kind != "name":
+                self.fail("expected a key in '{...}'")
+            if self.peek() == ("op", ":"):
+                self.take(":")
+                pairs.append((key, self.parse_steps()))
+            else:
+                pairs.append((key, [("field", key)]))
+            if self.take()[1] == "}":
+                return ("multiselect", pairs)
+
+    def search(self, data):
+        return self.evaluate(data, self.steps)
+
+    def evaluate(self, value, steps):
+        for index, step in enumerate(steps):
+            if value is None:
+                return None
+            kind = step[0]
+
+            if kind == "field":
+                value = value.get(step[1]) if isinstance(value, dict) else None
+            elif kind == "index":
+                value = value[step[1]] if isinstance(value, list) and -len(value) <= step[1] < len(value) else None
+            elif kind == "multiselect":
+                value = dict((key, self.evaluate(value, path)) for key, path in step[1])
+            else:
+                if not isinstance(value, list):
+                    return None
+                if kind == "flatten":
+                    items = [item for entry in value for item in (entry if isinstance(entry, list) else [entry])]
+                elif kind == "filter":
+                    items = [item for item in value if (self.evaluate(item, step[1]) == step[3]) == (step[2] == "==")]
+                else:
+                    items = value
+                # Like JMESPath, the expression up to the next [] applies to every element and null results are dropped.
+                end     = next((i for i in range(index + 1, len(steps)) if steps[i][0] == "flatten"), len(steps))
+                results = [self.evaluate(item, steps[index + 1:end]) for item in items]
+                return self.evaluate([result for result in results if result is not None], steps[end:])
+        return value
\ No newline at end of file
@@ -6,18 +6,58 @@ DOCUMENTATION = r"""
 module: device_enforce
 author:
   - Thibault Chevalleraud (@tchevalleraud)
-short_description: TODO
+short_description: Enforce the configuration of devices from XIQ-SE.
 description:
   - This module performs synchronization between a device and XIQ-SE.
   - It is compatible with ExtremeCloudIQ - Site Engine.
+  - When O(ip_addresses) is used, the enforce requests are sent concurrently from a single process sharing one authenticated session.
+    With O(wait), the operation state of all the devices still running is then read with one batched request per polling round,
+    and the devices not done when O(wait_timeout) expires are reported as V(TIMEOUT) instead of holding the task.
+options:
+  ip_address:
+    description:
+      - Device IP Address.
+      - Mutually exclusive with O(ip_addresses).
+    type: str
+  ip_addresses:
+    description:
+      - List of device IP Addresses to enforce in bulk.
+      - Mutually exclusive with O(ip_address).
+    type: list
+    elements: str
+  max_concurrency:
+    description:
+      - Maximum number of enforce requests in flight at the same time when O(ip_addresses) is used.
+    type: int
+    default: 10
 extends_documentation_fragment:
-  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_IPADDRESS
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_PROVIDER
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_TIMEOUT
+  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_WAIT
 """
 
 EXAMPLES = r"""
-- name: TODO
+- name: Enforce the configuration of a device and wait until XIQ-SE is done
+  tchevalleraud.extremenetworks_xiqse.device_enforce:
+    ip_address: "{{ ansible_host }}"
+    wait: true
+    provider:
+      host: "{{ xiqse_host }}"
+      client_id: "{{ xiqse_client }}"
+      client_secret: "{{ xiqse_secret }}"
+
+- name: Enforce the whole fleet and give up on the stragglers after 10 minutes
+  tchevalleraud.extremenetworks_xiqse.device_enforce:
+    ip_addresses: "{{ groups['xiqse_devices'] | map('extract', hostvars, 'ansible_host') | list }}"
+    max_concurrency: 20
+    wait: true
+    wait_timeout: 600
+    provider:
+      host: "{{ xiqse_host }}"
+      client_id: "{{ xiqse_client }}"
+      client_secret: "{{ xiqse_secret }}"
+  run_once: true
+  delegate_to: localhost
 """
 
 RETURN = r"""
@@ -26,50 +66,177 @@ failed:
   returned: failure
   type: bool
   sample: false
+
+operation_status:
+  description: Final operation state reported by XIQ-SE for the device.
+  returned: when O(ip_address) and O(wait) are used
+  type: str
+  sample: "SUCCESS"
+
+planned:
+  description: IP addresses that would be enforced, nothing is sent to XIQ-SE in check mode.
+  returned: in check mode
+  type: list
+  elements: str
+  sample: ["10.0.0.11", "10.0.0.12"]
+
+devices:
+  description:
+    - Enforce status of each device, keyed by IP address.
+    - C(status) is V(SUCCESS), V(ERROR), or V(TIMEOUT) when the device was still running, or not yet sent, at the end of O(wait_timeout).
+    - C(duration) is the time in seconds from the enforce request to the end of the operation, or to its acceptance without O(wait).
+  returned: when O(ip_addresses) is used
+  type: dict
+  sample:
+    10.0.0.11:
+      status: SUCCESS
+      operation_status: SUCCESS
+      duration: 12.4
+    10.0.0.12:
+      status: TIMEOUT
+      operation_status: IN_PROGRESS
+      duration: 600.0
+
+xiqse_metrics:
+  description: Metrics of the XIQ-SE API requests sent by the module, see O(provider.metrics).
+  returned: when O(provider.metrics) is enabled
+  type: dict
+  sample:
+    auth_requests: 0
+    token_cache_hits: 1
+    response_cache_hits: 0
+    retries: 0
+    total_ms: 12.7
+    requests:
+      - operation: "query serverInfo"
+        attempt: 0
+        status: 200
+        total_ms: 12.7
+        connect_ms: 1.2
+        tls_ms: 6.4
+        server_ms: 4.1
+        transfer_ms: 0.3
+        decode_ms: 0.1
+        bytes_out: 95
+        bytes_in: 71
 """
 
+import time
+
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_utils.xiqse import XIQSE
 
 def run_module():
     module_args = dict(
-        ip_address  = XIQSE.params.get_ipAddress(),
-        provider    = XIQSE.params.get_provider(),
-        timeout     = XIQSE.params.get_timeout()
+        ip_address      = XIQSE.params.get_ipAddress(required=False),
+        ip_addresses    = XIQSE.params.get_ipAddresses(),
+        max_concurrency = XIQSE.params.get_max_concurrency(),
+        provider        = XIQSE.params.get_provider(),
+        timeout         = XIQSE.params.get_timeout(),
+        wait            = XIQSE.params.get_wait(),
+        wait_timeout    = XIQSE.params.get_wait_timeout()
     )
 
     module = AnsibleModule(
         argument_spec=module_args,
+        mutually_exclusive=[("ip_address", "ip_addresses")],
+        required_one_of=[("ip_address", "ip_addresses")],
         supports_check_mode=True
     )
 
     ip_address      = module.params["ip_address"]
+    ip_addresses    = module.params["ip_addresses"]
+    max_concurrency = module.params["max_concurrency"]
     provider        = module.params["provider"]
-    timeout         = module.params["timeout"]
+    wait            = module.params["wait"]
+    wait_timeout    = module.params["wait_timeout"]
 
     query   = XIQSE.mutation.network_enforceAllDevices()
     payload = {"ipAddress": ip_address}
 
+    deadline = time.monotonic() + wait_timeout
+
     try:
-        xiqse   = XIQSE(
-            host=provider["host"],
-            client_id=provider["client_id"],
-            client_secret=provider["client_secret"],
-            port=provider["port"],
-            protocol=provider["protocol"],
-            validate_certs=provider["verify"],
-            timeout=timeout
-        )
+        # Nothing is sent in check mode, the devices that would be enforced are returned instead.
+        if module.check_mode:
+            planned = list(dict.fromkeys(ip_addresses)) if ip_addresses is not None else [ip_address]
+            module.exit_json(changed=bool(planned), msg="Synchronization would be requested for "+str(len(planned))+" devices.", planned=planned)
+
+        if ip_addresses is not None:
+            if provider:
+                provider = dict(provider, pool_size=max(provider["pool_size"], max_concurrency))
+            with XIQSE.from_module(module, provider) as xiqse:
+                devices = enforce_devices(xiqse, list(dict.fromkeys(ip_addresses)), max_concurrency, deadline, wait)
+
+            action = "completed" if wait else "in progress"
+            failed = [ip for ip, device in devices.items() if device["status"] != "SUCCESS"]
+            if failed:
+                module.fail_json(msg="Unable to sync "+str(len(failed))+" of "+str(len(devices))+" devices.", devices=devices, changed=len(failed) < len(devices))
+            module.exit_json(changed=bool(devices), msg="Synchronization "+action+" for "+str(len(devices))+" devices.", devices=devices)
+
+        xiqse   = XIQSE.from_module(module, provider)
         result = xiqse.graphql(query, payload)
         status = result.get("data", {}).get("network", {}).get("configureDevice", {}).get("status", "ERROR")
 
-        if status == "SUCCESS":
+        if status == "SUCCESS" and wait:
+            state = xiqse.wait_for_device(ip_address, deadline)
+            module.exit_json(changed=True, msg="Synchronization completed for "+ip_address+".", operation_status=state)
+        elif status == "SUCCESS":
             module.exit_json(changed=True, msg="Synchronization in progress for "+ip_address+".")
         else:
             raise Exception("Unable to sync device "+ip_address+".")
     except Exception as e:
         module.fail_json(msg=str(e))
 
+def enforce_device(xiqse, ip_address, deadline):
+    # Devices not sent yet when the deadline expires are left alone.
+    if time.monotonic() >= deadline:
+        return None
+
+    result = xiqse.graphql(XIQSE.mutation.network_enforceAllDevices(), {"ipAddress": ip_address})
+    status = ((result.get("data") or {}).get("network", {}).get("configureDevice") or {}).get("status", "ERROR")
+
+    if status != "SUCCESS":
+        raise Exception("Unable to sync device "+ip_address+".")
+    return time.monotonic()
+
+def enforce_devices(xiqse, ip_addresses, max_concurrency, deadline, wait):
+    started = {}
+    ended   = {}
+    devices = {}
+
+    def enforce(ip):
+        started[ip] = time.monotonic()
+        try:
+            return enforce_device(xiqse, ip, deadline)
+        finally:
+            ended[ip] = time.monotonic()
+
+    running = []
+    for ip, accepted in XIQSE.run_concurrently(enforce, ip_addresses, max_concurrency).items():
+        if isinstance(accepted, Exception):
+            devices[ip] = {"status": "ERROR", "msg": str(accepted), "duration": round(ended[ip] - started[ip], 3)}
+        elif accepted is None:
+            devices[ip] = {"status": "TIMEOUT", "msg": "Not sent before the end of wait_timeout.", "duration": 0.0}
+        elif wait:
+            running.append(ip)
+        else:
+            devices[ip] = {"status": "SUCCESS", "duration": round(accepted - started[ip], 3)}
+
+    done = xiqse.wait_for_devices(running, deadline) if running else {}
+    for ip in running:
+        state, finished, error = done.get(ip, ("IN_PROGRESS", time.monotonic(), None))
+        device = {"status": "SUCCESS", "operation_status": state, "duration": round(finished - started[ip], 3)}
+        if ip not in done:
+            device["status"] = "TIMEOUT"
+        elif error is not None:
+            device = dict(device, status="ERROR", msg=error)
+        elif state in XIQSE.FAILED_STATES:
+            device = dict(device, status="ERROR", msg="Operation on device "+ip+" ended with status "+state+".")
+        devices[ip] = device
+
+    return dict((ip, devices[ip]) for ip in ip_addresses)
+
 def main():
     run_module()
 
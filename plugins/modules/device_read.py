@@ -10,10 +10,28 @@ short_description: Performs synchronization between the equipment and XIQ-SE.
 description:
   - This module performs synchronization between a device and XIQ-SE.
   - It is compatible with ExtremeCloudIQ - Site Engine.
+  - When O(ip_addresses) is used, the synchronization requests are sent concurrently from a single process sharing one authenticated session.
+options:
+  ip_address:
+    description:
+      - Device IP Address.
+      - Mutually exclusive with O(ip_addresses).
+    type: str
+  ip_addresses:
+    description:
+      - List of device IP Addresses to synchronize in bulk.
+      - Mutually exclusive with O(ip_address).
+    type: list
+    elements: str
+  max_concurrency:
+    description:
+      - Maximum number of synchronization requests in flight at the same time when O(ip_addresses) is used.
+    type: int
+    default: 10
 extends_documentation_fragment:
-  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_IPADDRESS
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_PROVIDER
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_TIMEOUT
+  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_WAIT
 """
 
 EXAMPLES = r"""
@@ -25,9 +43,26 @@ EXAMPLES = r"""
       client_id: "{{ xiqse_client }}"
       client_secret: "{{ xiqse_secret }}"
 
-- name: Allow time for XIQ-SE to finish synchronizing
-  ansible.builtin.wait_for:
-    timeout: 10
+- name: Synchronize a device and return once XIQ-SE has finished
+  tchevalleraud.extremenetworks_xiqse.device_read:
+    ip_address: "{{ ansible_host }}"
+    wait: true
+    wait_timeout: 120
+    provider:
+      host: "{{ xiqse_host }}"
+      client_id: "{{ xiqse_client }}"
+      client_secret: "{{ xiqse_secret }}"
+
+- name: Synchronize every device of a site with XIQ-SE from a single task
+  tchevalleraud.extremenetworks_xiqse.device_read:
+    ip_addresses: "{{ groups['site_World_EU_Paris'] | map('extract', hostvars, 'ansible_host') | list }}"
+    max_concurrency: 20
+    provider:
+      host: "{{ xiqse_host }}"
+      client_id: "{{ xiqse_client }}"
+      client_secret: "{{ xiqse_secret }}"
+  run_once: true
+  delegate_to: localhost
 """
 
 RETURN = r"""
@@ -37,6 +72,12 @@ msg:
   type: str
   sample: "Synchronization in progress for x.x.x.x."
 
+operation_status:
+  description: Final operation state reported by XIQ-SE for the device.
+  returned: when O(ip_address) and O(wait) are used
+  type: str
+  sample: "SUCCESS"
+
 changed:
   description: Indicates if the synchronization request has been successfully sent.
   returned: always
@@ -48,50 +89,135 @@ error:
   returned: when an error occurs
   type: str
   sample: "Unable to sync device x.x.x.x."
+
+planned:
+  description: IP addresses that would be synchronized, nothing is sent to XIQ-SE in check mode.
+  returned: in check mode
+  type: list
+  elements: str
+  sample: ["10.0.0.11", "10.0.0.12"]
+
+devices:
+  description: Synchronization status of each device, keyed by IP address.
+  returned: when O(ip_addresses) is used
+  type: dict
+  sample:
+    10.0.0.11:
+      status: SUCCESS
+      operation_status: SUCCESS
+    10.0.0.12:
+      status: ERROR
+      msg: "Unable to sync device 10.0.0.12."
+
+xiqse_metrics:
+  description: Metrics of the XIQ-SE API requests sent by the module, see O(provider.metrics).
+  returned: when O(provider.metrics) is enabled
+  type: dict
+  sample:
+    auth_requests: 0
+    token_cache_hits: 1
+    response_cache_hits: 0
+    retries: 0
+    total_ms: 12.7
+    requests:
+      - operation: "query serverInfo"
+        attempt: 0
+        status: 200
+        total_ms: 12.7
+        connect_ms: 1.2
+        tls_ms: 6.4
+        server_ms: 4.1
+        transfer_ms: 0.3
+        decode_ms: 0.1
+        bytes_out: 95
+        bytes_in: 71
 """
 
+import time
+
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_utils.xiqse import XIQSE
 
 def run_module():
     module_args = dict(
-        ip_address  = XIQSE.params.get_ipAddress(),
-        provider    = XIQSE.params.get_provider(),
-        timeout     = XIQSE.params.get_timeout()
+        ip_address      = XIQSE.params.get_ipAddress(required=False),
+        ip_addresses    = XIQSE.params.get_ipAddresses(),
+        max_concurrency = XIQSE.params.get_max_concurrency(),
+        provider        = XIQSE.params.get_provider(),
+        timeout         = XIQSE.params.get_timeout(),
+        wait            = XIQSE.params.get_wait(),
+        wait_timeout    = XIQSE.params.get_wait_timeout()
     )
 
     module = AnsibleModule(
         argument_spec=module_args,
+        mutually_exclusive=[("ip_address", "ip_addresses")],
+        required_one_of=[("ip_address", "ip_addresses")],
         supports_check_mode=True
     )
 
     ip_address      = module.params["ip_address"]
+    ip_addresses    = module.params["ip_addresses"]
+    max_concurrency = module.params["max_concurrency"]
     provider        = module.params["provider"]
-    timeout         = module.params["timeout"]
+    wait            = module.params["wait"]
+    wait_timeout    = module.params["wait_timeout"]
 
-    query   = XIQSE.mutation.network_readDevices()
-    payload = {"ipAddress": ip_address}
+    deadline    = time.monotonic() + wait_timeout if wait else None
+    action      = "completed" if wait else "in progress"
 
     try:
-        xiqse   = XIQSE(
-            host=provider["host"],
-            client_id=provider["client_id"],
-            client_secret=provider["client_secret"],
-            port=provider["port"],
-            protocol=provider["protocol"],
-            validate_certs=provider["verify"],
-            timeout=timeout
-        )
-        result = xiqse.graphql(query, payload)
-        status = result.get("data", {}).get("network", {}).get("readDevices", {}).get("status", "ERROR")
-
-        if status == "SUCCESS":
-            module.exit_json(changed=True, msg="Synchronization in progress for "+ip_address+".")
-        else:
-            raise Exception("Unable to sync device "+ip_address+".")
+        # Nothing is sent in check mode, the devices that would be synchronized are returned instead.
+        if module.check_mode:
+            planned = list(dict.fromkeys(ip_addresses)) if ip_addresses is not None else [ip_address]
+            module.exit_json(changed=bool(planned), msg="Synchronization would be requested for "+str(len(planned))+" devices.", planned=planned)
+
+        if ip_addresses is not None:
+            if provider:
+                provider = dict(provider, pool_size=max(provider["pool_size"], max_concurrency))
+            with XIQSE.from_module(module, provider) as xiqse:
+                devices = read_devices(xiqse, list(dict.fromkeys(ip_addresses)), max_concurrency, deadline)
+
+            failed = [ip for ip, device in devices.items() if device["status"] != "SUCCESS"]
+            if failed:
+                module.fail_json(msg="Unable to sync "+str(len(failed))+" of "+str(len(devices))+" devices.", devices=devices, changed=len(failed) < len(devices))
+            module.exit_json(changed=bool(devices), msg="Synchronization "+action+" for "+str(len(devices))+" devices.", devices=devices)
+
+        xiqse   = XIQSE.from_module(module, provider)
+        state   = read_device(xiqse, ip_address, deadline)
+
+        if wait:
+            module.exit_json(changed=True, msg="Synchronization "+action+" for "+ip_address+".", operation_status=state)
+        module.exit_json(changed=True, msg="Synchronization "+action+" for "+ip_address+".")
     except Exception as e:
         module.fail_json(msg=str(e))
 
+def read_device(xiqse, ip_address, deadline=None):
+    query   = XIQSE.mutation.network_readDevices()
+    payload = {"ipAddress": ip_address}
+
+    result = xiqse.graphql(query, payload)
+    status = ((result.get("data") or {}).get("network", {}).get("readDevices") or {}).get("status", "ERROR")
+
+    if status != "SUCCESS":
+        raise Exception("Unable to sync device "+ip_address+".")
+
+    if deadline is not None:
+        return xiqse.wait_for_device(ip_address, deadline)
+
+def read_devices(xiqse, ip_addresses, max_concurrency, deadline=None):
+    devices = {}
+
+    for ip, state in XIQSE.run_concurrently(lambda ip: read_device(xiqse, ip, deadline), ip_addresses, max_concurrency).items():
+        if isinstance(state, Exception):
+            devices[ip] = {"status": "ERROR", "msg": str(state)}
+        elif deadline is not None:
+            devices[ip] = {"status": "SUCCESS", "operation_status": state}
+        else:
+            devices[ip] = {"status": "SUCCESS"}
+
+    return devices
+
 def main():
     run_module()
 
@@ -10,9 +10,28 @@ short_description: Retrieves version information of a device via XIQ-SE.
 description:
   - This module allows the collection of equipment versions via the XIQ-SE GraphQL API.
   - It is compatible with ExtremeCloudIQ - Site Engine.
+  - When O(ip_addresses) is used, all devices are resolved with a single aliased GraphQL query per chunk instead of one query per device.
+  - With O(providers), the devices are looked up on several XIQ-SE servers concurrently, and each device is reported with the server that manages it.
+options:
+  ip_address:
+    description:
+      - Device IP Address.
+      - Mutually exclusive with O(ip_addresses).
+    type: str
+  ip_addresses:
+    description:
+      - List of device IP Addresses to resolve in bulk.
+      - Mutually exclusive with O(ip_address).
+    type: list
+    elements: str
+  chunk_size:
+    description:
+      - Maximum number of devices resolved by a single GraphQL request when O(ip_addresses) is used.
+    type: int
+    default: 100
 extends_documentation_fragment:
-  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_IPADDRESS
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_PROVIDER
+  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_PROVIDERS
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_TIMEOUT
 """
 
@@ -51,6 +70,25 @@ EXAMPLES = r"""
     - name: Displaying the Device version
       ansible.builtin.debug:
         msg: "{{ result.version }}"
+
+- name: Playbook to audit the version of every inventory device at once
+  hosts: xiqse_api
+  gather_facts: no
+  tasks:
+    - name: Execute a single bulk GraphQL query to get the versions
+      tchevalleraud.extremenetworks_xiqse.device_version:
+        ip_addresses: "{{ groups['voss_devices'] | map('extract', hostvars, 'ansible_host') | list }}"
+        chunk_size: 200
+        provider:
+          host: "10.0.0.254"
+          client_id: "xxxxxxxxxx"
+          client_secret: "xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxxxx"
+      run_once: true
+      register: result
+
+    - name: Displaying the Device versions
+      ansible.builtin.debug:
+        msg: "{{ result.versions }}"
 """
 
 RETURN = r"""
@@ -68,9 +106,54 @@ failed:
 
 version:
   description: The firmware version of the device.
-  returned: always
+  returned: when O(ip_address) is used
   type: str
   sample: "9.1.1.0_B008"
+
+versions:
+  description: The firmware version of each device, keyed by IP address.
+  returned: when O(ip_addresses) or O(providers) is used
+  type: dict
+  sample: {"10.0.0.11": "9.1.1.0_B008", "10.0.0.12": "Unknown"}
+
+managed_by:
+  description:
+    - Name of the server of O(providers) that knows each device, keyed by IP address. V(null) when no server knows it.
+    - When several servers know a device, the first one in O(providers) wins.
+  returned: when O(providers) is used
+  type: dict
+  sample: {"10.0.0.11": "emea", "10.0.0.12": null}
+
+servers:
+  description:
+    - State of each server of O(providers), keyed by server name.
+    - C(status) is V(SUCCESS), V(ERROR) or V(TIMEOUT), and C(duration) is the time in seconds the server took to answer.
+  returned: when O(providers) is used
+  type: dict
+  sample: {"emea": {"status": "SUCCESS", "duration": 0.412, "msg": null}, "apac": {"status": "TIMEOUT", "duration": 30.0, "msg": "No answer within 30 seconds."}}
+
+xiqse_metrics:
+  description: Metrics of the XIQ-SE API requests sent by the module, see O(provider.metrics).
+  returned: when O(provider.metrics) is enabled
+  type: dict
+  sample:
+    auth_requests: 0
+    token_cache_hits: 1
+    response_cache_hits: 0
+    retries: 0
+    total_ms: 12.7
+    requests:
+      - operation: "query serverInfo"
+        attempt: 0
+        status: 200
+        total_ms: 12.7
+        connect_ms: 1.2
+        tls_ms: 6.4
+        server_ms: 4.1
+        transfer_ms: 0.3
+        decode_ms: 0.1
+        bytes_out: 95
+        bytes_in: 71
 """
 
 from ansible.module_utils.basic import AnsibleModule
@@ -78,40 +161,81 @@ from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_util
 
 def run_module():
     module_args = dict(
-        ip_address  = XIQSE.params.get_ipAddress(),
+        chunk_size  = XIQSE.params.get_chunk_size(),
+        ip_address  = XIQSE.params.get_ipAddress(required=False),
+        ip_addresses= XIQSE.params.get_ipAddresses(),
         provider    = XIQSE.params.get_provider(),
+        providers   = XIQSE.params.get_providers(),
         timeout     = XIQSE.params.get_timeout()
     )
 
     module = AnsibleModule(
         argument_spec=module_args,
+        mutually_exclusive=[("ip_address", "ip_addresses"), ("provider", "providers")],
+        required_one_of=[("ip_address", "ip_addresses")],
         supports_check_mode=True
     )
 
+    chunk_size      = module.params["chunk_size"]
     ip_address      = module.params["ip_address"]
-    provider        = module.params["provider"]
-    timeout         = module.params["timeout"]
-
-    query   = XIQSE.query.network.device.getFirmware()
-    payload = {"ipAddress": ip_address}
+    ip_addresses    = module.params["ip_addresses"]
 
     try:
-        xiqse   = XIQSE(
-            host=provider["host"],
-            client_id=provider["client_id"],
-            client_secret=provider["client_secret"],
-            port=provider["port"],
-            protocol=provider["protocol"],
-            validate_certs=provider["verify"],
-            timeout=timeout
-        )
+        if module.params["providers"]:
+            result = get_versions_by_server(module, ip_addresses or [ip_address], chunk_size, ip_address)
+            module.exit_json(**result)
+
+        xiqse   = XIQSE.from_module(module)
+
+        if ip_addresses is not None:
+            module.exit_json(changed=False, versions=get_versions(xiqse, ip_addresses, chunk_size))
+
+        query   = XIQSE.query.network.device.getFirmware()
+        payload = {"ipAddress": ip_address}
         result = xiqse.graphql(query, payload)
 
-        version = result.get("data", {}).get("network", {}).get("device", {}).get("firmware", "Unknown")
+        version = (result.get("data", {}).get("network", {}).get("device") or {}).get("firmware", "Unknown")
         module.exit_json(changed=False, version=version)
     except Exception as e:
         module.fail_json(msg=str(e))
 
+def get_versions(xiqse, ip_addresses, chunk_size):
+    versions = {}
+
+    for chunk in XIQSE.chunks(list(dict.fromkeys(ip_addresses)), chunk_size):
+        query   = XIQSE.query.network.device.getFirmwares(len(chunk))
+        payload = dict((f"ip{i}", ip) for i, ip in enumerate(chunk))
+        result  = xiqse.graphql(query, payload)
+        network = (result.get("data") or {}).get("network")
+
+        if network is None:
+            errors = result.get("errors") or [{}]
+            raise Exception("Unable to get device versions: " + str(errors[0].get("message", "no data returned")))
+
+        for i, ip in enumerate(chunk):
+            versions[ip] = (network.get(f"d{i}") or {}).get("firmware", "Unknown")
+
+    return versions
+
+def get_versions_by_server(module, ip_addresses, chunk_size, ip_address=None):
+    servers     = XIQSE.fan_out(module, lambda xiqse: get_versions(xiqse, ip_addresses, chunk_size))
+    versions    = dict((ip, "Unknown") for ip in ip_addresses)
+    managed_by  = dict((ip, None) for ip in ip_addresses)
+
+    for name, server in servers.items():
+        for ip, version in (server.pop("result", None) or {}).items():
+            if managed_by[ip] is None and version != "Unknown":
+                versions[ip], managed_by[ip] = version, name
+
+    result = dict(changed=False, servers=servers, versions=versions, managed_by=managed_by)
+    if ip_address is not None:
+        result["version"] = versions[ip_address]
+
+    failed = sorted(name for name, server in servers.items() if server["status"] != "SUCCESS")
+    if failed:
+        module.fail_json(msg="No versions from: " + ", ".join(failed), **result)
+    return result
+
 def main():
     run_module()
 
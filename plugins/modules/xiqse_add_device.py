@@ -6,10 +6,59 @@ DOCUMENTATION = r"""
 module: xiqse_add_device
 author:
   - Thibault Chevalleraud (@tchevalleraud)
-short_description: TODO
+short_description: Add devices to XIQ-SE.
 description:
-  - This module performs synchronization between a device and XIQ-SE.
+  - This module adds one or many devices to XIQ-SE with the C(createDevices) GraphQL mutation.
+  - Devices whose IP address is already managed by XIQ-SE are left untouched, so the module is idempotent.
+  - When O(devices) is used, the managed IP addresses are read once with the paginated C(network.devices) query,
+    and the new devices are sent O(chunk_size) at a time in a single C(createDevices) mutation per chunk.
   - It is compatible with ExtremeCloudIQ - Site Engine.
+options:
+  ip_address:
+    description:
+      - Device IP Address.
+      - Mutually exclusive with O(devices).
+    type: str
+  profile_name:
+    description:
+      - Name of the XIQ-SE profile used to discover the device.
+      - Required with O(ip_address). With O(devices), used for the entries without C(profile).
+    type: str
+  site_path:
+    description:
+      - Site the device is added to.
+      - Required with O(ip_address). With O(devices), used for the entries without C(site).
+    type: str
+  devices:
+    description:
+      - List of devices to add in bulk.
+      - Mutually exclusive with O(ip_address).
+    type: list
+    elements: dict
+    suboptions:
+      ip:
+        description:
+          - Device IP Address.
+        type: str
+        required: true
+      profile:
+        description:
+          - Name of the XIQ-SE profile used to discover the device. Defaults to O(profile_name).
+        type: str
+      site:
+        description:
+          - Site the device is added to. Defaults to O(site_path).
+        type: str
+  chunk_size:
+    description:
+      - Maximum number of devices sent by a single C(createDevices) mutation when O(devices) is used.
+    type: int
+    default: 100
+  page_size:
+    description:
+      - Number of devices requested per page when reading the devices already managed by XIQ-SE.
+    type: int
+    default: 500
 extends_documentation_fragment:
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_PROVIDER
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_TIMEOUT
@@ -17,6 +66,39 @@ extends_documentation_fragment:
 
 EXAMPLES = r"""
 - name: Add a device to XIQ-SE
+  tchevalleraud.extremenetworks_xiqse.xiqse_add_device:
+    ip_address: "10.0.0.11"
+    profile_name: "public_v2"
+    site_path: "/World/EU/Paris"
+    provider:
+      host: "{{ ansible_host }}"
+      client_id: "{{ xiqse_client }}"
+      client_secret: "{{ xiqse_secret }}"
+
+- name: Onboard a whole campus
+  tchevalleraud.extremenetworks_xiqse.xiqse_add_device:
+    devices: "{{ groups['campus'] | map('extract', hostvars, 'ansible_host') | map('community.general.dict_kv', 'ip') | list }}"
+    profile_name: "snmp_v3"
+    site_path: "/World/EU/Campus"
+    chunk_size: 200
+    provider:
+      host: "{{ ansible_host }}"
+      client_id: "{{ xiqse_client }}"
+      client_secret: "{{ xiqse_secret }}"
+
+- name: Add devices with their own profile and site
+  tchevalleraud.extremenetworks_xiqse.xiqse_add_device:
+    devices:
+      - ip: "10.0.0.11"
+        profile: "public_v2"
+        site: "/World/EU/Paris"
+      - ip: "10.0.0.12"
+        profile: "snmp_v3"
+        site: "/World/EU/Berlin"
+    provider:
+      host: "{{ ansible_host }}"
+      client_id: "{{ xiqse_client }}"
+      client_secret: "{{ xiqse_secret }}"
 """
 
 RETURN = r"""
@@ -27,10 +109,53 @@ failed:
   sample: false
 
 result:
-  description: The result of the add device operation.
-  returned: always
+  description: The result of the add device operation, V(null) when the device was already present.
+  returned: when O(ip_address) is used
   type: dict
   sample: {}
+
+added:
+  description: IP addresses added, or that would be added in check mode.
+  returned: when O(devices) is used
+  type: list
+  elements: str
+  sample: ["10.0.0.12"]
+
+present:
+  description: IP addresses already managed by XIQ-SE, that were skipped.
+  returned: when O(devices) is used
+  type: list
+  elements: str
+  sample: ["10.0.0.11"]
+
+results:
+  description: The C(createDevices) result of each device sent to XIQ-SE, keyed by IP address.
+  returned: when O(devices) is used
+  type: dict
+  sample: {"10.0.0.12": {"deviceId": 42, "message": "Device added", "status": "SUCCESS"}}
+
+xiqse_metrics:
+  description: Metrics of the XIQ-SE API requests sent by the module, see O(provider.metrics).
+  returned: when O(provider.metrics) is enabled
+  type: dict
+  sample:
+    auth_requests: 0
+    token_cache_hits: 1
+    response_cache_hits: 0
+    retries: 0
+    total_ms: 12.7
+    requests:
+      - operation: "query serverInfo"
+        attempt: 0
+        status: 200
+        total_ms: 12.7
+        connect_ms: 1.2
+        tls_ms: 6.4
+        server_ms: 4.1
+        transfer_ms: 0.3
+        decode_ms: 0.1
+        bytes_out: 95
+        bytes_in: 71
 """
 
 from ansible.module_utils.basic import AnsibleModule
@@ -38,42 +163,101 @@ from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_util
 
 def run_module():
     module_args = dict(
-        ip_address  = XIQSE.params.get_ipAddress(),
-        profile_name= XIQSE.params.get_profile_name(),
+        chunk_size  = XIQSE.params.get_chunk_size(),
+        devices     = XIQSE.params.get_devices(),
+        ip_address  = XIQSE.params.get_ipAddress(required=False),
+        page_size   = XIQSE.params.get_page_size(),
+        profile_name= XIQSE.params.get_profile_name(required=False),
         provider    = XIQSE.params.get_provider(),
-        site_path   = XIQSE.params.get_sitePath(),
+        site_path   = XIQSE.params.get_sitePath(required=False),
         timeout     = XIQSE.params.get_timeout()
     )
-    
+
     module = AnsibleModule(
         argument_spec=module_args,
+        mutually_exclusive=[("ip_address", "devices")],
+        required_one_of=[("ip_address", "devices")],
+        required_by={"ip_address": ("profile_name", "site_path")},
         supports_check_mode=True
     )
-    
+
+    chunk_size      = module.params["chunk_size"]
+    devices         = module.params["devices"]
     ip_address      = module.params["ip_address"]
+    page_size       = module.params["page_size"]
     profile_name    = module.params["profile_name"]
-    provider        = module.params["provider"]
     site_path       = module.params["site_path"]
-    timeout         = module.params["timeout"]
-
-    query   = XIQSE.mutation.network_addDevice()
-    payload = {"deviceIp": ip_address, "profileName": profile_name, "sitePath": site_path}
 
     try:
-        xiqse   = XIQSE(
-            host=provider["host"],
-            client_id=provider["client_id"],
-            client_secret=provider["client_secret"],
-            port=provider["port"],
-            protocol=provider["protocol"],
-            validate_certs=provider["verify"],
-            timeout=timeout
-        )
+        xiqse   = XIQSE.from_module(module)
+
+        if devices is not None:
+            result = add_devices(xiqse, devices, profile_name, site_path, chunk_size, page_size, module.check_mode)
+            failed = sorted(ip for ip, status in result["results"].items() if status.get("status") != "SUCCESS")
+            if failed:
+                module.fail_json(msg="Error during device creation for: " + ", ".join(failed), **result)
+            module.exit_json(**result)
+
+        result  = xiqse.graphql(XIQSE.query.network.device.byIp(), {"ipAddress": ip_address})
+        if ((result.get("data") or {}).get("network") or {}).get("device"):
+            module.exit_json(changed=False, msg="Device " + ip_address + " already present.", result=None)
+        if module.check_mode:
+            module.exit_json(changed=True, msg="Device " + ip_address + " would be added.", result=None)
+
+        query   = XIQSE.mutation.network_addDevice()
+        payload = {"deviceIp": ip_address, "profileName": profile_name, "sitePath": site_path}
         result  = xiqse.graphql(query, payload)
-        module.exit_json(changed=False, result=result)
+        results = (((result.get("data") or {}).get("network") or {}).get("createDevices") or {}).get("results") or []
+
+        if not results or results[0].get("status") != "SUCCESS":
+            module.fail_json(msg="Error during device creation.", result=result)
+        module.exit_json(changed=True, msg="Device " + ip_address + " added.", result=result)
     except Exception as e:
         module.fail_json(msg=str(e))
-    
+
+def add_devices(xiqse, devices, profile_name, site_path, chunk_size, page_size, check_mode):
+    wanted = {}
+    for device in devices:
+        profile = device.get("profile") or profile_name
+        site    = device.get("site") or site_path
+        if not profile or not site:
+            raise Exception("Device " + device["ip"] + " has no profile or site, set them on the entry or with profile_name and site_path.")
+        wanted.setdefault(device["ip"], (profile, site))
+
+    managed = set(device.get("ip") for device in xiqse.iter_devices(["ip"], page_size))
+    present = [ip for ip in wanted if ip in managed]
+    added   = [ip for ip in wanted if ip not in managed]
+    results = {}
+
+    if not check_mode:
+        for chunk in XIQSE.chunks(added, chunk_size):
+            payload = {}
+            for i, ip in enumerate(chunk):
+                payload[f"deviceIp{i}"], (payload[f"profileName{i}"], payload[f"sitePath{i}"]) = ip, wanted[ip]
+
+            result  = xiqse.graphql(XIQSE.mutation.network_addDevices(len(chunk)), payload)
+            entries = (((result.get("data") or {}).get("network") or {}).get("createDevices") or {}).get("results") or []
+            errors  = result.get("errors") or [{}]
+
+            # Results echo the IP address; fall back on the position for entries that do not.
+            for i, ip in enumerate(chunk):
+                entry = next((entry for entry in entries if entry.get("ipAddress") == ip), None)
+                if entry is None and i < len(entries) and not entries[i].get("ipAddress"):
+                    entry = entries[i]
+                if entry is None:
+                    entry = {"status": "ERROR", "message": errors[0].get("message", "no result returned")}
+                results[ip] = dict((key, entry.get(key)) for key in ("deviceId", "message", "status"))
+
+        added = [ip for ip in added if results[ip].get("status") == "SUCCESS"]
+
+    return dict(
+        changed=bool(added),
+        msg=f"{len(added)} device(s) added, {len(present)} already present.",
+        added=added,
+        present=present,
+        results=results
+    )
+
 def main():
     run_module()
 
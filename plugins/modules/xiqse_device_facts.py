@@ -0,0 +1,197 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+DOCUMENTATION = r"""
+---
+module: xiqse_device_facts
+author:
+  - Thibault Chevalleraud (@tchevalleraud)
+short_description: Gather facts about a device managed by XIQ-SE.
+description:
+  - This module reads the fields of a device selected by O(gather_subset) with a single GraphQL query and returns them as facts.
+  - The facts are set under C(xiqse_device) for the host of the task, so that a fact cache plugin such as C(jsonfile) or C(redis)
+    keeps them between runs and later plays can skip the module while the cache is valid.
+  - It is compatible with ExtremeCloudIQ - Site Engine.
+options:
+  ip_address:
+    description:
+      - Device IP Address.
+    type: str
+    required: true
+  gather_subset:
+    description:
+      - Groups of device fields to gather.
+      - V(identity) gives C(deviceId), C(ip), C(sysName), C(nickName) and C(serialNumber).
+      - V(software) gives C(firmware) and C(deviceDisplayFamily).
+      - V(location) gives C(sitePath), C(sysLocation) and C(sysContact).
+      - V(status) gives C(status) and C(sysUpTime).
+      - V(all) selects every group. A group prefixed with V(!) is left out, for example V([all, !status]), and exclusions alone apply to V(all).
+    type: list
+    elements: str
+    default: [all]
+extends_documentation_fragment:
+  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_PROVIDER
+  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_TIMEOUT
+"""
+
+EXAMPLES = r"""
+- name: Gather the XIQ-SE facts of the devices
+  hosts: voss_devices
+  gather_facts: no
+  tasks:
+    - name: Read the identity and software of the device
+      tchevalleraud.extremenetworks_xiqse.xiqse_device_facts:
+        ip_address: "{{ ansible_host }}"
+        gather_subset:
+          - identity
+          - software
+        provider:
+          host: "{{ xiqse_host }}"
+          client_id: "{{ xiqse_client }}"
+          client_secret: "{{ xiqse_secret }}"
+      delegate_to: localhost
+
+    - name: Display the firmware
+      ansible.builtin.debug:
+        msg: "{{ xiqse_device.firmware }}"
+
+# ansible.cfg
+# [defaults]
+# fact_caching = jsonfile
+# fact_caching_connection = ~/.ansible/facts
+# fact_caching_timeout = 3600
+- name: Only ask XIQ-SE when the fact cache has nothing for the device
+  tchevalleraud.extremenetworks_xiqse.xiqse_device_facts:
+    ip_address: "{{ ansible_host }}"
+    provider:
+      host: "{{ xiqse_host }}"
+      client_id: "{{ xiqse_client }}"
+      client_secret: "{{ xiqse_secret }}"
+  delegate_to: localhost
+  when: xiqse_device is not defined
+"""
+
+RETURN = r"""
+changed:
+  description: Indicates if the module caused a change. Always `false` since this is a read-only operation.
+  returned: always
+  type: bool
+  sample: false
+
+failed:
+  description: Indicates if the module failed.
+  returned: failure
+  type: bool
+  sample: false
+
+ansible_facts:
+  description: Facts about the device.
+  returned: success
+  type: dict
+  contains:
+    xiqse_device:
+      description: Fields of the device read from XIQ-SE, limited to the gathered subsets.
+      returned: success
+      type: dict
+      sample:
+        deviceId: 42
+        ip: "10.0.0.11"
+        sysName: "VSP-00042"
+        firmware: "9.1.9.0"
+    xiqse_device_gather_subset:
+      description: Subsets that were gathered.
+      returned: success
+      type: list
+      elements: str
+      sample: ["identity", "software"]
+
+xiqse_metrics:
+  description: Metrics of the XIQ-SE API requests sent by the module, see O(provider.metrics).
+  returned: when O(provider.metrics) is enabled
+  type: dict
+  sample:
+    auth_requests: 0
+    token_cache_hits: 1
+    response_cache_hits: 0
+    retries: 0
+    total_ms: 12.7
+    requests:
+      - operation: "query device"
+        attempt: 0
+        status: 200
+        total_ms: 12.7
+        connect_ms: 1.2
+        tls_ms: 6.4
+        server_ms: 4.1
+        transfer_ms: 0.3
+        decode_ms: 0.1
+        bytes_out: 95
+        bytes_in: 71
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_utils.xiqse import XIQSE
+
+def run_module():
+    module_args = dict(
+        gather_subset   = XIQSE.params.get_gather_subset(),
+        ip_address      = XIQSE.params.get_ipAddress(),
+        provider        = XIQSE.params.get_provider(),
+        timeout         = XIQSE.params.get_timeout()
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+
+    gather_subset   = module.params["gather_subset"]
+    ip_address      = module.params["ip_address"]
+
+    try:
+        subsets = resolve_subsets(gather_subset)
+        fields  = list(dict.fromkeys(field for subset in subsets for field in XIQSE.DEVICE_FACT_SUBSETS[subset]))
+
+        xiqse   = XIQSE.from_module(module)
+        result  = xiqse.graphql(XIQSE.query.network.device.facts(fields), {"ipAddress": ip_address})
+        device  = ((result.get("data") or {}).get("network") or {}).get("device")
+
+        if device is None:
+            errors = result.get("errors") or [{}]
+            raise Exception("Unable to get facts of device "+ip_address+": "+str(errors[0].get("message", "device not found")))
+
+        facts = dict(
+            xiqse_device=dict((field, device.get(field)) for field in fields),
+            xiqse_device_gather_subset=subsets
+        )
+        module.exit_json(changed=False, ansible_facts=facts)
+    except Exception as e:
+        module.fail_json(msg=str(e))
+
+def resolve_subsets(gather_subset):
+    include = set()
+    exclude = set()
+    for subset in gather_subset:
+        name = subset.strip().lstrip("!")
+        if name != "all" and name not in XIQSE.DEVICE_FACT_SUBSETS:
+            raise Exception("Unknown gather_subset "+subset+", expected all or one of: "+", ".join(XIQSE.DEVICE_FACT_SUBSETS))
+        names = set(XIQSE.DEVICE_FACT_SUBSETS) if name == "all" else {name}
+        if subset.strip().startswith("!"):
+            exclude.update(names)
+        else:
+            include.update(names)
+
+    # Exclusions alone apply to all the subsets.
+    if not include:
+        include = set(XIQSE.DEVICE_FACT_SUBSETS)
+
+    subsets = [name for name in XIQSE.DEVICE_FACT_SUBSETS if name in include - exclude]
+    if not subsets:
+        raise Exception("gather_subset selects no field.")
+    return subsets
+
+def main():
+    run_module()
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
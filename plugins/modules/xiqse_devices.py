@@ -0,0 +1,159 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+DOCUMENTATION = r"""
+---
+module: xiqse_devices
+author:
+  - Thibault Chevalleraud (@tchevalleraud)
+short_description: Get the list of devices from XIQ-SE.
+description:
+  - This module retrieves the list of devices managed by XIQ-SE, one page at a time.
+  - Only the requested fields are returned by the GraphQL API, and devices outside of O(site_prefix) are dropped as each page is decoded, so memory stays bounded by the page size and the matching devices.
+  - With O(site_prefix), the sites are read first to build a site index. No device is requested when the site does not exist,
+    and the devices are returned grouped by site, parents before their sub-sites.
+  - When XIQ-SE does not support paging on C(network.devices), the list is retrieved in a single request.
+  - It is compatible with ExtremeCloudIQ - Site Engine.
+  - With O(providers), the devices of several XIQ-SE servers are retrieved concurrently and merged into a single list.
+options:
+  fields:
+    description:
+      - Device fields to return.
+    type: list
+    elements: str
+    default: [ip, sysName, sitePath]
+  page_size:
+    description:
+      - Number of devices requested per GraphQL request.
+    type: int
+    default: 500
+  site_prefix:
+    description:
+      - Only return the devices located in this site or in one of its sub-sites.
+      - An empty list is returned when the site does not exist.
+    type: str
+extends_documentation_fragment:
+  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_PROVIDER
+  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_PROVIDERS
+  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_TIMEOUT
+"""
+
+EXAMPLES = r"""
+- name: Retrieve the IP address and firmware of the devices located in Paris
+  tchevalleraud.extremenetworks_xiqse.xiqse_devices:
+    fields:
+      - ip
+      - firmware
+    site_prefix: "/World/EU/Paris"
+    page_size: 1000
+    provider:
+      host: "{{ xiqse_host }}"
+      client_id: "{{ xiqse_client }}"
+      client_secret: "{{ xiqse_secret }}"
+  register: result
+
+- name: Display the devices
+  ansible.builtin.debug:
+    var: result.devices
+"""
+
+RETURN = r"""
+failed:
+  description: Indicates if the module failed.
+  returned: failure
+  type: bool
+  sample: false
+
+devices:
+  description:
+    - The list of devices, limited to the requested fields.
+    - With O(providers), each device carries the name of its server in C(server).
+  returned: always
+  type: list
+  elements: dict
+  sample: [{"ip": "10.0.0.11", "sysName": "VSP-1", "sitePath": "/World/EU/Paris"}]
+
+servers:
+  description:
+    - State of each server of O(providers), keyed by server name.
+    - C(status) is V(SUCCESS), V(ERROR) or V(TIMEOUT), and C(duration) is the time in seconds the server took to answer.
+  returned: when O(providers) is used
+  type: dict
+  sample: {"emea": {"status": "SUCCESS", "duration": 0.412, "msg": null}, "apac": {"status": "TIMEOUT", "duration": 30.0, "msg": "No answer within 30 seconds."}}
+
+xiqse_metrics:
+  description: Metrics of the XIQ-SE API requests sent by the module, see O(provider.metrics).
+  returned: when O(provider.metrics) is enabled
+  type: dict
+  sample:
+    auth_requests: 0
+    token_cache_hits: 1
+    response_cache_hits: 0
+    retries: 0
+    total_ms: 12.7
+    requests:
+      - operation: "query serverInfo"
+        attempt: 0
+        status: 200
+        total_ms: 12.7
+        connect_ms: 1.2
+        tls_ms: 6.4
+        server_ms: 4.1
+        transfer_ms: 0.3
+        decode_ms: 0.1
+        bytes_out: 95
+        bytes_in: 71
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_utils.xiqse import XIQSE
+
+def run_module():
+    module_args = dict(
+        fields      = XIQSE.params.get_fields(["ip", "sysName", "sitePath"]),
+        page_size   = XIQSE.params.get_page_size(),
+        provider    = XIQSE.params.get_provider(),
+        providers   = XIQSE.params.get_providers(),
+        site_prefix = XIQSE.params.get_site_prefix(),
+        timeout     = XIQSE.params.get_timeout()
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        mutually_exclusive=[("provider", "providers")],
+        supports_check_mode=True
+    )
+
+    fields          = list(dict.fromkeys(module.params["fields"]))
+    page_size       = module.params["page_size"]
+    site_prefix     = module.params["site_prefix"]
+
+    try:
+        if module.params["providers"]:
+            servers = XIQSE.fan_out(module, lambda xiqse: get_devices(xiqse, fields, page_size, site_prefix))
+            devices = [dict(device, server=name) for name, server in servers.items() for device in server.pop("result", None) or []]
+            failed  = sorted(name for name, server in servers.items() if server["status"] != "SUCCESS")
+            if failed:
+                module.fail_json(msg="No devices from: " + ", ".join(failed), servers=servers, devices=devices)
+            module.exit_json(changed=False, servers=servers, devices=devices)
+
+        with XIQSE.from_module(module) as xiqse:
+            devices = get_devices(xiqse, fields, page_size, site_prefix)
+
+        module.exit_json(changed=False, devices=devices)
+
+    except Exception as e:
+        module.fail_json(msg=str(e))
+
+def get_devices(xiqse, fields, page_size, site_prefix):
+    if site_prefix:
+        records = XIQSE.SiteIndex.from_client(xiqse, fields, page_size, site_prefix).devices(site_prefix)
+    else:
+        records = xiqse.iter_devices(fields, page_size)
+    return [dict((field, device.get(field)) for field in fields) for device in records]
+
+def main():
+    run_module()
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,260 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+DOCUMENTATION = r"""
+---
+module: xiqse_inventory_delta
+author:
+  - Thibault Chevalleraud (@tchevalleraud)
+short_description: Return the devices and sites changed in XIQ-SE since the previous run.
+description:
+  - This module reads the devices and sites of XIQ-SE and compares them with the snapshot stored by its previous run.
+  - Only the records added, removed or changed since that run are returned, so that the tasks mirroring XIQ-SE into another system
+    only process the differences.
+  - The snapshot keeps a content hash of each record, keyed by device IP address and site location, and not the records themselves.
+    The devices are read page by page and only their hash is kept in memory.
+  - The first run, without snapshot, returns every record as added.
+  - It is compatible with ExtremeCloudIQ - Site Engine.
+options:
+  snapshot_path:
+    description:
+      - Path of the snapshot file on the host running the module. It is created with C(0600) permissions.
+      - Use one snapshot per XIQ-SE server and per consumer of the delta.
+    type: path
+    required: true
+  include:
+    description:
+      - Records to compare.
+    type: list
+    elements: str
+    choices: [devices, sites]
+    default: [devices, sites]
+  device_fields:
+    description:
+      - Device fields compared and returned. C(ip) is always included.
+      - The snapshot records the fields it was taken with, a snapshot taken with other fields is refused.
+    type: list
+    elements: str
+    default: [ip, sysName, sitePath, firmware, serialNumber]
+  page_size:
+    description:
+      - Number of devices requested per GraphQL request.
+    type: int
+    default: 500
+  update_snapshot:
+    description:
+      - Whether to replace the snapshot with the records read by this run.
+      - The snapshot is never written in check mode.
+    type: bool
+    default: true
+extends_documentation_fragment:
+  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_PROVIDER
+  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_TIMEOUT
+"""
+
+EXAMPLES = r"""
+- name: Get the devices and sites changed since last night
+  tchevalleraud.extremenetworks_xiqse.xiqse_inventory_delta:
+    snapshot_path: "/var/lib/cmdb/xiqse_snapshot.json"
+    provider:
+      host: "{{ xiqse_host }}"
+      client_id: "{{ xiqse_client }}"
+      client_secret: "{{ xiqse_secret }}"
+  register: delta
+
+- name: Update the CMDB with the changed devices only
+  ansible.builtin.uri:
+    url: "https://cmdb.example.com/api/devices/{{ item.ip }}"
+    method: PUT
+    body_format: json
+    body: "{{ item }}"
+  loop: "{{ delta.devices.added + delta.devices.changed }}"
+
+- name: Preview the delta without moving the snapshot forward
+  tchevalleraud.extremenetworks_xiqse.xiqse_inventory_delta:
+    snapshot_path: "/var/lib/cmdb/xiqse_snapshot.json"
+    include:
+      - sites
+    update_snapshot: false
+    provider:
+      host: "{{ xiqse_host }}"
+      client_id: "{{ xiqse_client }}"
+      client_secret: "{{ xiqse_secret }}"
+"""
+
+RETURN = r"""
+changed:
+  description: Indicates if a record was added, removed or changed since the snapshot.
+  returned: always
+  type: bool
+  sample: true
+
+failed:
+  description: Indicates if the module failed.
+  returned: failure
+  type: bool
+  sample: false
+
+devices:
+  description:
+    - Differences of the devices, when O(include) contains V(devices).
+    - C(added) and C(changed) hold the device records limited to O(device_fields), C(removed) holds the IP addresses.
+  returned: when O(include) contains V(devices)
+  type: dict
+  sample:
+    added: [{"ip": "10.0.0.12", "sysName": "VSP-00012", "sitePath": "/World/EU/Paris", "firmware": "9.1.9.0", "serialNumber": "SN00000012"}]
+    changed: []
+    removed: ["10.0.0.11"]
+    total: 12840
+
+sites:
+  description:
+    - Differences of the sites, when O(include) contains V(sites).
+    - C(added) and C(changed) hold the site records, C(removed) holds the site locations.
+  returned: when O(include) contains V(sites)
+  type: dict
+  sample:
+    added: [{"location": "/World/EU/Lyon", "siteName": "Lyon"}]
+    changed: []
+    removed: []
+    total: 214
+
+xiqse_metrics:
+  description: Metrics of the XIQ-SE API requests sent by the module, see O(provider.metrics).
+  returned: when O(provider.metrics) is enabled
+  type: dict
+  sample:
+    auth_requests: 0
+    token_cache_hits: 1
+    response_cache_hits: 0
+    retries: 0
+    total_ms: 12.7
+    requests:
+      - operation: "query devices"
+        attempt: 0
+        status: 200
+        total_ms: 12.7
+        connect_ms: 1.2
+        tls_ms: 6.4
+        server_ms: 4.1
+        transfer_ms: 0.3
+        decode_ms: 0.1
+        bytes_out: 95
+        bytes_in: 71
+"""
+
+import hashlib
+import json
+import os
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_utils.xiqse import XIQSE
+
+SNAPSHOT_VERSION = 1
+
+def run_module():
+    module_args = dict(
+        device_fields   = XIQSE.params.get_fields(["ip", "sysName", "sitePath", "firmware", "serialNumber"]),
+        include         = XIQSE.params.get_include(["devices", "sites"], ["devices", "sites"]),
+        page_size       = XIQSE.params.get_page_size(),
+        provider        = XIQSE.params.get_provider(),
+        snapshot_path   = XIQSE.params.get_snapshot_path(),
+        timeout         = XIQSE.params.get_timeout(),
+        update_snapshot = XIQSE.params.get_update_snapshot()
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+
+    device_fields   = list(dict.fromkeys(["ip"] + module.params["device_fields"]))
+    include         = module.params["include"]
+    page_size       = module.params["page_size"]
+    snapshot_path   = module.params["snapshot_path"]
+    update_snapshot = module.params["update_snapshot"]
+
+    try:
+        store       = XIQSE.FileCache(snapshot_path)
+        snapshot    = load_snapshot(snapshot_path)
+
+        if "devices" in include and "devices" in snapshot and snapshot.get("device_fields") != device_fields:
+            raise Exception("Snapshot "+snapshot_path+" was taken with the device fields "+", ".join(snapshot.get("device_fields") or [])+
+                            ", use another snapshot_path or the same device_fields.")
+
+        result  = dict(changed=False)
+        fresh   = dict(version=SNAPSHOT_VERSION, device_fields=device_fields if "devices" in include else snapshot.get("device_fields"))
+
+        with XIQSE.from_module(module) as xiqse:
+            if "devices" in include:
+                devices = xiqse.iter_devices(device_fields, page_size)
+                result["devices"], fresh["devices"] = compare(snapshot.get("devices"), devices, "ip", device_fields)
+
+            if "sites" in include:
+                response    = xiqse.graphql(XIQSE.query.network.sites())
+                sites       = ((response.get("data") or {}).get("network") or {}).get("sites")
+                if sites is None:
+                    errors = response.get("errors") or [{}]
+                    raise Exception("Unable to get sites: " + str(errors[0].get("message", "no data returned")))
+                result["sites"], fresh["sites"] = compare(snapshot.get("sites"), sites, "location", ("location", "siteName"))
+
+        for name in ("devices", "sites"):
+            delta = result.get(name)
+            if delta and (delta["added"] or delta["changed"] or delta["removed"]):
+                result["changed"] = True
+            # Records left out of this run keep their previous hashes.
+            if name not in fresh and name in snapshot:
+                fresh[name] = snapshot[name]
+
+        if update_snapshot and not module.check_mode:
+            with store.lock(exclusive=True):
+                XIQSE.FileCache.dump(store.path, fresh)
+
+        module.exit_json(**result)
+    except Exception as e:
+        module.fail_json(msg=str(e))
+
+def load_snapshot(path):
+    path = os.path.abspath(os.path.expanduser(path))
+    if not os.path.exists(path):
+        return {}
+
+    try:
+        with open(path, "r") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError) as e:
+        raise Exception("Unable to read the snapshot "+path+": "+str(e))
+
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        raise Exception("Snapshot "+path+" has an unsupported format, remove it to start from an empty snapshot.")
+    return snapshot
+
+def digest(record):
+    return hashlib.sha256(json.dumps(record, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:32]
+
+def compare(previous, records, key, fields):
+    previous    = previous or {}
+    hashes      = {}
+    added       = []
+    changed     = []
+
+    for record in records:
+        record  = dict((field, record.get(field)) for field in fields)
+        name    = record.get(key)
+        if name is None or name in hashes:
+            continue
+
+        hashes[name] = digest(record)
+        if name not in previous:
+            added.append(record)
+        elif previous[name] != hashes[name]:
+            changed.append(record)
+
+    removed = sorted(name for name in previous if name not in hashes)
+    return dict(added=added, changed=changed, removed=removed, total=len(hashes)), hashes
+
+def main():
+    run_module()
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
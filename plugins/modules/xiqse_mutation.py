@@ -10,8 +10,37 @@ short_description: Ansible module that allows you to run a GraphQL mutation in X
 description:
   - This module allows you to execute the mutation provided by the user in the GraphQL API of XIQ-SE
   - It is compatible with ExtremeCloudIQ - Site Engine.
+  - When O(mutations) is used, the operations are merged into aliased GraphQL documents, sent O(batch_size) at a time,
+    and each operation gets back its own data and errors.
+options:
+  mutation:
+    description:
+      - GraphQL mutation for XIQ-SE
+      - Mutually exclusive with O(mutations).
+    type: str
+  mutations:
+    description:
+      - List of GraphQL mutations to run in batches.
+      - Mutually exclusive with O(mutation).
+    type: list
+    elements: dict
+    suboptions:
+      mutation:
+        description:
+          - GraphQL mutation for XIQ-SE. Only the first operation of the document is used, fragments are sent unbatched.
+        type: str
+        required: true
+      variables:
+        description:
+          - Variables of the mutation.
+        type: dict
+        default: {}
+  batch_size:
+    description:
+      - Maximum number of mutations merged into a single GraphQL request when O(mutations) is used.
+    type: int
+    default: 50
 extends_documentation_fragment:
-  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_MUTATION
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_PROVIDER
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_TIMEOUT
 """
@@ -39,12 +68,32 @@ EXAMPLES = r"""
 - name: Display the result
   ansible.builtin.debug:
     var: result
+
+- name: Execute several GraphQL mutations in a few requests
+  tchevalleraud.extremenetworks_xiqse.xiqse_mutation:
+    mutations:
+      - mutation: |
+          mutation Site($sitePath: String!) {
+            network {
+              createSite(input: { siteLocation: $sitePath }) {
+                status
+              }
+            }
+          }
+        variables:
+          sitePath: "/World/EU"
+    batch_size: 100
+    provider:
+      host: "{{ ansible_host }}"
+      client_id: "{{ xiqse_client }}"
+      client_secret: "{{ xiqse_secret }}"
+  register: result
 """
 
 RETURN = r"""
 result:
   description: The full response returned by the GraphQL API of XIQ-SE.
-  returned: always
+  returned: when O(mutation) is used, except in check mode
   type: dict
   sample:
     data:
@@ -53,6 +102,12 @@ result:
           errorCode: 0
           status: "SUCCESS"
 
+results:
+  description: The response of each mutation of O(mutations), in the same order, with the C(data) and C(errors) that belong to it.
+  returned: when O(mutations) is used, except in check mode
+  type: list
+  elements: dict
+
 changed:
   description: Indicates if the mutation caused any changes. Always `false` since mutations are external operations.
   returned: always
@@ -60,10 +115,33 @@ changed:
   sample: false
 
 msg:
-  description: Message detailing any errors encountered.
-  returned: on failure
+  description: Message detailing any errors encountered, or the number of mutations skipped in check mode.
+  returned: on failure or in check mode
   type: str
   sample: "GraphQL mutation failed: Invalid site location."
+
+xiqse_metrics:
+  description: Metrics of the XIQ-SE API requests sent by the module, see O(provider.metrics).
+  returned: when O(provider.metrics) is enabled
+  type: dict
+  sample:
+    auth_requests: 0
+    token_cache_hits: 1
+    response_cache_hits: 0
+    retries: 0
+    total_ms: 12.7
+    requests:
+      - operation: "query serverInfo"
+        attempt: 0
+        status: 200
+        total_ms: 12.7
+        connect_ms: 1.2
+        tls_ms: 6.4
+        server_ms: 4.1
+        transfer_ms: 0.3
+        decode_ms: 0.1
+        bytes_out: 95
+        bytes_in: 71
 """
 
 from ansible.module_utils.basic import AnsibleModule
@@ -71,30 +149,38 @@ from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_util
 
 def run_module():
     module_args = dict(
-        mutation    = XIQSE.params.get_mutation(),
+        batch_size  = XIQSE.params.get_batch_size(),
+        mutation    = XIQSE.params.get_mutation(required=False),
+        mutations   = XIQSE.params.get_mutations(),
         provider    = XIQSE.params.get_provider(),
         timeout     = XIQSE.params.get_timeout()
     )
 
     module = AnsibleModule(
         argument_spec=module_args,
+        mutually_exclusive=[("mutation", "mutations")],
+        required_one_of=[("mutation", "mutations")],
         supports_check_mode=True
     )
 
+    batch_size  = module.params["batch_size"]
     mutation    = module.params["mutation"]
-    provider    = module.params["provider"]
-    timeout     = module.params["timeout"]
+    mutations   = module.params["mutations"]
 
     try:
-        xiqse   = XIQSE(
-            host=provider["host"],
-            client_id=provider["client_id"],
-            client_secret=provider["client_secret"],
-            port=provider["port"],
-            protocol=provider["protocol"],
-            validate_certs=provider["verify"],
-            timeout=timeout
-        )
+        # Mutations are never sent in check mode.
+        if module.check_mode:
+            count = len(mutations) if mutations is not None else 1
+            module.exit_json(changed=False, msg=str(count)+" mutation(s) not sent in check mode.")
+
+        xiqse   = XIQSE.from_module(module)
+
+        if mutations is not None:
+            batch = xiqse.batch(max_operations=batch_size)
+            for operation in mutations:
+                batch.add(operation["mutation"], operation["variables"])
+            module.exit_json(changed=False, results=batch.execute())
+
         result = xiqse.graphql(mutation)
         module.exit_json(changed=False, result=result)
     except Exception as e:
@@ -10,9 +10,56 @@ short_description: Ansible module that allows you to run a GraphQL query in XIQ-
 description:
   - This module allows you to execute the query provided by the user in the GraphQL API of XIQ-SE.
   - It is compatible with ExtremeCloudIQ - Site Engine.
+  - When O(queries) is used, the operations are merged into aliased GraphQL documents, sent O(batch_size) at a time,
+    and each operation gets back its own data and errors.
+options:
+  query:
+    description:
+      - GraphQL query for XIQ-SE
+      - Mutually exclusive with O(queries).
+    type: str
+  queries:
+    description:
+      - List of GraphQL queries to run in batches.
+      - Mutually exclusive with O(query).
+    type: list
+    elements: dict
+    suboptions:
+      query:
+        description:
+          - GraphQL query for XIQ-SE. Only the first operation of the document is used, fragments are sent unbatched.
+        type: str
+        required: true
+      variables:
+        description:
+          - Variables of the query.
+        type: dict
+        default: {}
+  select:
+    description:
+      - Expression evaluated on the GraphQL response before it is returned, so that only the selected data leaves the module.
+      - It is a subset of JMESPath applied to the whole response, for example V(data.network.devices[*].ip).
+      - "Supported are field names separated by dots, V([n]) indexes, V([*]) projections, V([]) flattening,
+        V([?field=='value']) and V([?field!=`null`]) filters, and V({key: path, other}) multi-select hashes."
+      - When the response carries GraphQL errors, they are returned in RV(errors).
+    type: str
+  flatten:
+    description:
+      - Flatten the nested lists of the selected value into a single list.
+    type: bool
+    default: false
+  index_by:
+    description:
+      - Turn the selected list of objects into a dictionary keyed by the value of this field, for example V(ip).
+      - Objects without this field are left out.
+    type: str
+  batch_size:
+    description:
+      - Maximum number of queries merged into a single GraphQL request when O(queries) is used.
+    type: int
+    default: 50
 extends_documentation_fragment:
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_PROVIDER
-  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_QUERY
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_TIMEOUT
 """
 
@@ -37,12 +84,52 @@ EXAMPLES = r"""
 - name: Display the result
   ansible.builtin.debug:
     var: result
+
+- name: Return only the devices of a site, indexed by IP address
+  tchevalleraud.extremenetworks_xiqse.xiqse_query:
+    query: |
+      query {
+        network {
+          devices {
+            ip
+            sysName
+            sitePath
+          }
+        }
+      }
+    select: "data.network.devices[?sitePath=='/World/EU/Paris'].{ip: ip, name: sysName}"
+    index_by: ip
+    provider:
+      host: "{{ ansible_host }}"
+      client_id: "{{ xiqse_client }}"
+      client_secret: "{{ xiqse_secret }}"
+  register: result
+
+- name: Execute several GraphQL queries in a few requests
+  tchevalleraud.extremenetworks_xiqse.xiqse_query:
+    queries:
+      - query: |
+          query Device($ipAddress: String!) {
+            network {
+              device(ip: $ipAddress) {
+                firmware
+              }
+            }
+          }
+        variables:
+          ipAddress: "10.0.0.11"
+    batch_size: 100
+    provider:
+      host: "{{ ansible_host }}"
+      client_id: "{{ xiqse_client }}"
+      client_secret: "{{ xiqse_secret }}"
+  register: result
 """
 
 RETURN = r"""
 result:
-  description: The full response returned by the GraphQL API of XIQ-SE.
-  returned: always
+  description: The full response returned by the GraphQL API of XIQ-SE, or the selected value when O(select), O(flatten) or O(index_by) is used.
+  returned: when O(query) is used
   type: dict
   sample:
     data:
@@ -51,6 +138,19 @@ result:
           upTime: "10234"
           version: "22.5.1.3"
 
+results:
+  description:
+    - The response of each query of O(queries), in the same order, with the C(data) and C(errors) that belong to it.
+    - When O(select), O(flatten) or O(index_by) is used, the selected value of each response.
+  returned: when O(queries) is used
+  type: list
+  elements: dict
+
+errors:
+  description: The GraphQL errors of the response when O(select), O(flatten) or O(index_by) is used. With O(queries), one list per query.
+  returned: when the response has errors and O(select), O(flatten) or O(index_by) is used
+  type: list
+
 changed:
   description: Indicates if the query caused any changes. Always `false` since this is a read-only operation.
   returned: always
@@ -62,42 +162,111 @@ msg:
   returned: on failure
   type: str
   sample: "GraphQL query failed: Invalid request syntax."
+
+xiqse_metrics:
+  description: Metrics of the XIQ-SE API requests sent by the module, see O(provider.metrics).
+  returned: when O(provider.metrics) is enabled
+  type: dict
+  sample:
+    auth_requests: 0
+    token_cache_hits: 1
+    response_cache_hits: 0
+    retries: 0
+    total_ms: 12.7
+    requests:
+      - operation: "query serverInfo"
+        attempt: 0
+        status: 200
+        total_ms: 12.7
+        connect_ms: 1.2
+        tls_ms: 6.4
+        server_ms: 4.1
+        transfer_ms: 0.3
+        decode_ms: 0.1
+        bytes_out: 95
+        bytes_in: 71
 """
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_utils.xiqse import XIQSE
+from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_utils.xiqse_expression import Expression
 
 def run_module():
     module_args = dict(
+        batch_size  = XIQSE.params.get_batch_size(),
+        flatten     = XIQSE.params.get_flatten(),
+        index_by    = XIQSE.params.get_index_by(),
         provider    = XIQSE.params.get_provider(),
-        query       = XIQSE.params.get_query(),
+        queries     = XIQSE.params.get_queries(),
+        query       = XIQSE.params.get_query(required=False),
+        select      = XIQSE.params.get_select(),
         timeout     = XIQSE.params.get_timeout()
     )
 
     module = AnsibleModule(
         argument_spec=module_args,
+        mutually_exclusive=[("query", "queries")],
+        required_one_of=[("query", "queries")],
         supports_check_mode=True
     )
 
-    provider    = module.params["provider"]
-    timeout     = module.params["timeout"]
+    batch_size  = module.params["batch_size"]
+    flatten     = module.params["flatten"]
+    index_by    = module.params["index_by"]
+    queries     = module.params["queries"]
     query       = module.params["query"]
+    select      = module.params["select"]
 
     try:
-        xiqse   = XIQSE(
-            host=provider["host"],
-            client_id=provider["client_id"],
-            client_secret=provider["client_secret"],
-            port=provider["port"],
-            protocol=provider["protocol"],
-            validate_certs=provider["verify"],
-            timeout=timeout
-        )
+        expression  = Expression(select) if select else None
+        project     = bool(select or flatten or index_by)
+        xiqse       = XIQSE.from_module(module)
+
+        if queries is not None:
+            batch = xiqse.batch(max_operations=batch_size)
+            for operation in queries:
+                batch.add(operation["query"], operation["variables"])
+            results = batch.execute()
+
+            if not project:
+                module.exit_json(changed=False, results=results)
+            errors = [result.get("errors") or [] for result in results]
+            if any(errors):
+                module.exit_json(changed=False, results=[projection(result, expression, flatten, index_by) for result in results], errors=errors)
+            module.exit_json(changed=False, results=[projection(result, expression, flatten, index_by) for result in results])
+
         result = xiqse.graphql(query)
-        module.exit_json(changed=False, result=result)
+
+        if not project:
+            module.exit_json(changed=False, result=result)
+        if result.get("errors"):
+            module.exit_json(changed=False, result=projection(result, expression, flatten, index_by), errors=result["errors"])
+        module.exit_json(changed=False, result=projection(result, expression, flatten, index_by))
     except Exception as e:
         module.fail_json(msg=str(e))
 
+def projection(result, expression, flatten, index_by):
+    value = expression.search(result) if expression else result
+
+    if flatten and isinstance(value, list):
+        flat, stack = [], [iter(value)]
+        while stack:
+            for item in stack[-1]:
+                if isinstance(item, list):
+                    stack.append(iter(item))
+                    break
+                flat.append(item)
+            else:
+                stack.pop()
+        value = flat
+
+    if index_by:
+        if not isinstance(value, list):
+            raise Exception("index_by needs the selected value to be a list, got " + type(value).__name__)
+        value = dict((str(item[index_by]), item) for item in value if isinstance(item, dict) and item.get(index_by) is not None)
+
+    return value
+
 def main():
     run_module()
 
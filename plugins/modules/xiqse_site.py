@@ -11,10 +11,44 @@ description:
   - This module allows you to manage sites in the XIQ-SE platform using GraphQL queries and mutations.
   - It supports retrieving, creating, and deleting sites within ExtremeCloudIQ - Site Engine.
   - It is compatible with ExtremeCloudIQ - Site Engine.
+  - When O(site_paths) is used, the whole site tree is read once and compared in memory with the desired paths.
+    The missing or extra sites are then created or deleted with aliased GraphQL mutations, one request per chunk and per tree level,
+    parents being created before their children and children deleted before their parents.
+options:
+  site_path:
+    description:
+      - Full address of the site to manage.
+      - Mutually exclusive with O(site_paths).
+    type: str
+  site_paths:
+    description:
+      - List of site paths to reconcile with the sites existing in XIQ-SE.
+      - Parent sites are implied, V(/World/EU/Paris) also requires V(/World/EU) and V(/World).
+      - Mutually exclusive with O(site_path).
+    type: list
+    elements: str
+  site_prefix:
+    description:
+      - Limit the sites deleted by O(state=replaced) to this site and its descendants.
+    type: str
+  state:
+    description:
+      - Desired state of the site.
+      - V(present), V(absent) and V(gathered) apply to O(site_path).
+      - V(merged), V(replaced), V(deleted) and V(gathered) apply to O(site_paths).
+      - V(merged) creates the missing sites.
+      - V(replaced) creates the missing sites and deletes every other site, except the top-level ones.
+      - V(deleted) deletes the listed sites and all their descendants.
+    type: str
+    default: gathered
+    choices: [present, absent, merged, replaced, deleted, gathered]
+  chunk_size:
+    description:
+      - Maximum number of sites created or deleted by a single GraphQL request when O(site_paths) is used.
+    type: int
+    default: 100
 extends_documentation_fragment:
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_PROVIDER
-  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_SITE_PATH
-  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_STATE_BOOL
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_TIMEOUT
 """
 
@@ -46,6 +80,28 @@ EXAMPLES = r"""
       host: "{{ ansible_host }}"
       client_id: "{{ xiqse_client }}"
       client_secret: "{{ xiqse_secret }}"
+
+- name: Make sure the regional sites exist
+  tchevalleraud.extremenetworks_xiqse.xiqse_site:
+    site_paths:
+      - "/World/EU/Paris"
+      - "/World/EU/Berlin"
+      - "/World/US/Boston"
+    state: merged
+    provider:
+      host: "{{ ansible_host }}"
+      client_id: "{{ xiqse_client }}"
+      client_secret: "{{ xiqse_secret }}"
+
+- name: Make the /World/EU tree match the list exactly
+  tchevalleraud.extremenetworks_xiqse.xiqse_site:
+    site_paths: "{{ eu_sites }}"
+    site_prefix: "/World/EU"
+    state: replaced
+    provider:
+      host: "{{ ansible_host }}"
+      client_id: "{{ xiqse_client }}"
+      client_secret: "{{ xiqse_secret }}"
 """
 
 RETURN = r"""
@@ -69,11 +125,66 @@ site:
     location: "/World/test"
     siteId: "1234"
 
+created:
+  description:
+    - Sites created, or that would be created in check mode, when O(site_paths) is used.
+    - On failure, the sites created before the error.
+  returned: when O(site_paths) is used
+  type: list
+  elements: str
+  sample: ["/World/EU", "/World/EU/Paris"]
+
+deleted:
+  description:
+    - Sites deleted, or that would be deleted in check mode, when O(site_paths) is used.
+    - On failure, the sites deleted before the error.
+  returned: when O(site_paths) is used
+  type: list
+  elements: str
+  sample: ["/World/US/Boston"]
+
+sites:
+  description: Sites of O(site_paths) that exist, when O(state=gathered).
+  returned: when O(site_paths) is used with O(state=gathered)
+  type: list
+  elements: str
+  sample: ["/World/EU/Paris"]
+
+missing:
+  description: Sites of O(site_paths) that do not exist, when O(state=gathered).
+  returned: when O(site_paths) is used with O(state=gathered)
+  type: list
+  elements: str
+  sample: ["/World/EU/Berlin"]
+
 error:
   description: Error message if the operation fails.
   returned: on failure
   type: str
   sample: "Error during site creation."
+
+xiqse_metrics:
+  description: Metrics of the XIQ-SE API requests sent by the module, see O(provider.metrics).
+  returned: when O(provider.metrics) is enabled
+  type: dict
+  sample:
+    auth_requests: 0
+    token_cache_hits: 1
+    response_cache_hits: 0
+    retries: 0
+    total_ms: 12.7
+    requests:
+      - operation: "query serverInfo"
+        attempt: 0
+        status: 200
+        total_ms: 12.7
+        connect_ms: 1.2
+        tls_ms: 6.4
+        server_ms: 4.1
+        transfer_ms: 0.3
+        decode_ms: 0.1
+        bytes_out: 95
+        bytes_in: 71
 """
 
 
@@ -82,35 +193,42 @@ from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_util
 
 def run_module():
     module_args = dict(
+        chunk_size  = XIQSE.params.get_chunk_size(),
         provider    = XIQSE.params.get_provider(),
-        site_path   = XIQSE.params.get_sitePath(),
+        site_path   = XIQSE.params.get_sitePath(required=False),
+        site_paths  = XIQSE.params.get_sitePaths(),
+        site_prefix = XIQSE.params.get_site_prefix(),
         state       = XIQSE.params.get_state(),
         timeout     = XIQSE.params.get_timeout()
     )
 
     module = AnsibleModule(
         argument_spec=module_args,
+        mutually_exclusive=[("site_path", "site_paths")],
+        required_one_of=[("site_path", "site_paths")],
         supports_check_mode=True
     )
 
-    provider        = module.params["provider"]
+    chunk_size      = module.params["chunk_size"]
     site_path       = module.params["site_path"]
+    site_paths      = module.params["site_paths"]
+    site_prefix     = module.params["site_prefix"]
     state           = module.params["state"]
-    timeout         = module.params["timeout"]
 
     query   = XIQSE.query.network.site.byLocation()
     payload = {"sitePath": site_path}
 
     try:
-        xiqse   = XIQSE(
-            host=provider["host"],
-            client_id=provider["client_id"],
-            client_secret=provider["client_secret"],
-            port=provider["port"],
-            protocol=provider["protocol"],
-            validate_certs=provider["verify"],
-            timeout=timeout
-        )
+        xiqse   = XIQSE.from_module(module)
+
+        if site_paths is not None:
+            if state not in ("merged", "replaced", "deleted", "gathered"):
+                raise Exception("State " + state + " is not supported with site_paths.")
+            result = reconcile_sites(xiqse, site_paths, state, site_prefix, chunk_size, module.check_mode)
+            if result.pop("failed", False):
+                module.fail_json(**result)
+            module.exit_json(**result)
+
         result  = xiqse.graphql(query, payload)
         site    = result.get("data", {}).get("network", {}).get("siteByLocation", None)
 
@@ -125,6 +243,9 @@ def run_module():
 
         elif state == "present":
             if not site:
+                if module.check_mode:
+                    module.exit_json(changed=True, msg="Site "+ site_path +" would be created.", site=None)
+
                 result  = xiqse.graphql(XIQSE.mutation.network_createSite(), payload)
                 status  = result.get("data", {}).get("network", {}).get("createSite", {}).get("status", "ERROR")
 
@@ -143,6 +264,9 @@ def run_module():
 
         elif state == "absent":
             if site:
+                if module.check_mode:
+                    module.exit_json(changed=True, msg="Site "+ site_path +" would be deleted.", site=None)
+
                 result  = xiqse.graphql(XIQSE.mutation.network_deleteSite(), payload)
                 status  = result.get("data", {}).get("network", {}).get("deleteSite", {}).get("status", "ERROR")
 
@@ -159,6 +283,72 @@ def run_module():
     except Exception as e:
         module.fail_json(msg=str(e))
 
+def site_depth(site_path):
+    return site_path.count("/")
+
+def site_ancestors(site_path):
+    levels = site_path.strip("/").split("/")
+    return ["/" + "/".join(levels[:depth]) for depth in range(1, len(levels) + 1)]
+
+def reconcile_sites(xiqse, site_paths, state, site_prefix, chunk_size, check_mode):
+    index       = XIQSE.SiteIndex.from_client(xiqse)
+    existing    = set(index.descendants())
+    wanted      = set("/" + path.strip("/") for path in site_paths if path.strip("/"))
+    desired     = set(ancestor for path in wanted for ancestor in site_ancestors(path))
+
+    if state == "gathered":
+        return dict(changed=False, msg="Sites gathered.", sites=sorted(wanted & existing), missing=sorted(wanted - existing))
+
+    create = []
+    delete = []
+    if state in ("merged", "replaced"):
+        create = sorted(desired - existing, key=lambda path: (site_depth(path), path))
+    if state == "replaced":
+        delete = [path for path in index.descendants(site_prefix or "/") if path not in desired and site_depth(path) > 1]
+    if state == "deleted":
+        delete = set(path for target in wanted for path in index.descendants(target))
+    delete = sorted(delete, key=lambda path: (-site_depth(path), path))
+
+    if not check_mode:
+        created = []
+        deleted = []
+        # The sites changed before a failure are reported with it.
+        try:
+            apply_sites(xiqse, XIQSE.mutation.network_deleteSites, "deleteSite", delete, chunk_size, deleted)
+            apply_sites(xiqse, XIQSE.mutation.network_createSites, "createSite", create, chunk_size, created)
+        except Exception as e:
+            return dict(failed=True, changed=bool(created or deleted), msg=str(e), created=created, deleted=deleted)
+
+    return dict(
+        changed=bool(create or delete),
+        msg=f"{len(create)} site(s) created, {len(delete)} site(s) deleted.",
+        created=create,
+        deleted=delete
+    )
+
+def apply_sites(xiqse, mutation, action, site_paths, chunk_size, done):
+    # A site is only created under an existing parent and deleted once it has no children,
+    # so each tree level is completed before the next one is sent.
+    levels = {}
+    for path in site_paths:
+        levels.setdefault(site_depth(path), []).append(path)
+
+    failed = []
+    for depth in sorted(levels, reverse=(action == "deleteSite")):
+        for chunk in XIQSE.chunks(levels[depth], chunk_size):
+            payload = dict((f"sitePath{i}", path) for i, path in enumerate(chunk))
+            result  = xiqse.graphql(mutation(len(chunk)), payload)
+            network = (result.get("data") or {}).get("network") or {}
+
+            for i, path in enumerate(chunk):
+                if (network.get(f"s{i}") or {}).get("status") != "SUCCESS":
+                    failed.append(path)
+                else:
+                    done.append(path)
+
+        if failed:
+            raise Exception(f"Error during {action} for site(s): " + ", ".join(failed))
+
 def main():
     run_module()
 
@@ -10,8 +10,16 @@ short_description: Get the list of sites from XIQ-SE.
 description:
   - This module retrieves the list of sites from XIQ-SE.
   - It is compatible with ExtremeCloudIQ - Site Engine.
+  - With O(providers), the sites of several XIQ-SE servers are retrieved concurrently and merged into a single list.
+options:
+  site_prefix:
+    description:
+      - Only return this site and its sub-sites, parents before their sub-sites.
+      - An empty list is returned when the site does not exist.
+    type: str
 extends_documentation_fragment:
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_PROVIDER
+  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_PROVIDERS
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_TIMEOUT
 """
 
@@ -31,6 +39,15 @@ EXAMPLES = r"""
     - name: Extract existing site paths
       set_fact:
         existing_site_paths: "{{ result.sites | map(attribute='location') | list }}"
+
+    - name: Retrieve the sites of Europe
+      tchevalleraud.extremenetworks_xiqse.xiqse_sites:
+        site_prefix: "/World/EU"
+        provider:
+          host: "{{ xiqse_host }}"
+          client_id: "{{ xiqse_client }}"
+          client_secret: "{{ xiqse_secret }}"
+      register: result
 """
 
 RETURN = r"""
@@ -41,10 +58,43 @@ failed:
   sample: false
 
 sites:
-  description: The list of sites.
+  description:
+    - The list of sites.
+    - With O(providers), each site carries the name of its server in C(server).
   returned: always
   type: list
   sample: []
+
+servers:
+  description:
+    - State of each server of O(providers), keyed by server name.
+    - C(status) is V(SUCCESS), V(ERROR) or V(TIMEOUT), and C(duration) is the time in seconds the server took to answer.
+  returned: when O(providers) is used
+  type: dict
+  sample: {"emea": {"status": "SUCCESS", "duration": 0.412, "msg": null}, "apac": {"status": "TIMEOUT", "duration": 30.0, "msg": "No answer within 30 seconds."}}
+
+xiqse_metrics:
+  description: Metrics of the XIQ-SE API requests sent by the module, see O(provider.metrics).
+  returned: when O(provider.metrics) is enabled
+  type: dict
+  sample:
+    auth_requests: 0
+    token_cache_hits: 1
+    response_cache_hits: 0
+    retries: 0
+    total_ms: 12.7
+    requests:
+      - operation: "query serverInfo"
+        attempt: 0
+        status: 200
+        total_ms: 12.7
+        connect_ms: 1.2
+        tls_ms: 6.4
+        server_ms: 4.1
+        transfer_ms: 0.3
+        decode_ms: 0.1
+        bytes_out: 95
+        bytes_in: 71
 """
 
 from ansible.module_utils.basic import AnsibleModule
@@ -53,37 +103,41 @@ from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_util
 def run_module():
     module_args = dict(
         provider    = XIQSE.params.get_provider(),
+        providers   = XIQSE.params.get_providers(),
+        site_prefix = XIQSE.params.get_site_prefix(),
         timeout     = XIQSE.params.get_timeout()
     )
 
     module = AnsibleModule(
         argument_spec=module_args,
+        mutually_exclusive=[("provider", "providers")],
         supports_check_mode=True
     )
 
-    provider        = module.params["provider"]
-    timeout         = module.params["timeout"]
-
-    query   = XIQSE.query.network.sites()
+    site_prefix     = module.params["site_prefix"]
 
     try:
-        xiqse   = XIQSE(
-            host=provider["host"],
-            client_id=provider["client_id"],
-            client_secret=provider["client_secret"],
-            port=provider["port"],
-            protocol=provider["protocol"],
-            validate_certs=provider["verify"],
-            timeout=timeout
-        )
-        result  = xiqse.graphql(query)
-        sites   = result.get("data", {}).get("network", {}).get("sites", None)
-
-        module.exit_json(changed=False, sites=sites)
+        if module.params["providers"]:
+            servers = XIQSE.fan_out(module, lambda xiqse: get_sites(xiqse, site_prefix))
+            sites   = [dict(site, server=name) for name, server in servers.items() for site in server.pop("result", None) or []]
+            failed  = sorted(name for name, server in servers.items() if server["status"] != "SUCCESS")
+            if failed:
+                module.fail_json(msg="No sites from: " + ", ".join(failed), servers=servers, sites=sites)
+            module.exit_json(changed=False, servers=servers, sites=sites)
+
+        xiqse   = XIQSE.from_module(module)
+        module.exit_json(changed=False, sites=get_sites(xiqse, site_prefix))
 
     except Exception as e:
         module.fail_json(msg=str(e))
 
+def get_sites(xiqse, site_prefix):
+    if site_prefix:
+        return XIQSE.SiteIndex.from_client(xiqse).sites(site_prefix)
+
+    result  = xiqse.graphql(XIQSE.query.network.sites())
+    return result.get("data", {}).get("network", {}).get("sites", None)
+
 def main():
     run_module()
 
@@ -10,8 +10,10 @@ short_description: Retrieves the XIQ-SE system version
 description:
   - This module fetches the system version of XIQ-SE by querying the GraphQL  API.
   - It is compatible with ExtremeCloudIQ - Site Engine.
+  - With O(providers), the versions of several XIQ-SE servers are retrieved concurrently.
 extends_documentation_fragment:
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_PROVIDER
+  - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_PROVIDERS
   - tchevalleraud.extremenetworks_xiqse.fragments.OPTIONS_TIMEOUT
 """
 
@@ -31,6 +33,20 @@ EXAMPLES = r"""
     - name: Displaying the XIQ-SE version
       ansible.builtin.debug:
         msg: "XIQ-SE version: {{ result.version }}"
+
+- name: Audit the version of every regional XIQ-SE
+  tchevalleraud.extremenetworks_xiqse.xiqse_version:
+    providers:
+      - name: emea
+        host: "xiqse-emea.example.com"
+        client_id: "{{ xiqse_client }}"
+        client_secret: "{{ xiqse_secret }}"
+      - name: apac
+        host: "xiqse-apac.example.com"
+        client_id: "{{ xiqse_client }}"
+        client_secret: "{{ xiqse_secret }}"
+        timeout: 10
+  register: result
 """
 
 RETURN = r"""
@@ -48,9 +64,46 @@ failed:
 
 version:
   description: Detected xiqse version.
-  returned: always
+  returned: when O(provider) is used
   type: str
   sample: "24.10.12.14"
+
+versions:
+  description: Detected version of each server of O(providers) that answered, keyed by server name.
+  returned: when O(providers) is used
+  type: dict
+  sample: {"emea": "24.10.12.14", "apac": "24.10.11.8"}
+
+servers:
+  description:
+    - State of each server of O(providers), keyed by server name.
+    - C(status) is V(SUCCESS), V(ERROR) or V(TIMEOUT), and C(duration) is the time in seconds the server took to answer.
+  returned: when O(providers) is used
+  type: dict
+  sample: {"emea": {"status": "SUCCESS", "duration": 0.412, "msg": null}, "apac": {"status": "TIMEOUT", "duration": 30.0, "msg": "No answer within 30 seconds."}}
+
+xiqse_metrics:
+  description: Metrics of the XIQ-SE API requests sent by the module, see O(provider.metrics).
+  returned: when O(provider.metrics) is enabled
+  type: dict
+  sample:
+    auth_requests: 0
+    token_cache_hits: 1
+    response_cache_hits: 0
+    retries: 0
+    total_ms: 12.7
+    requests:
+      - operation: "query serverInfo"
+        attempt: 0
+        status: 200
+        total_ms: 12.7
+        connect_ms: 1.2
+        tls_ms: 6.4
+        server_ms: 4.1
+        transfer_ms: 0.3
+        decode_ms: 0.1
+        bytes_out: 95
+        bytes_in: 71
 """
 
 from ansible.module_utils.basic import AnsibleModule
@@ -59,35 +112,35 @@ from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_util
 def run_module():
     module_args = dict(
         provider    = XIQSE.params.get_provider(),
+        providers   = XIQSE.params.get_providers(),
         timeout     = XIQSE.params.get_timeout()
     )
 
     module = AnsibleModule(
         argument_spec=module_args,
+        mutually_exclusive=[("provider", "providers")],
         supports_check_mode=True
     )
 
-    provider    = module.params["provider"]
-    timeout     = module.params["timeout"]
-    query       = XIQSE.query.administration.serverInfo_version()
-
     try:
-        xiqse   = XIQSE(
-            host=provider["host"],
-            client_id=provider["client_id"],
-            client_secret=provider["client_secret"],
-            port=provider["port"],
-            protocol=provider["protocol"],
-            validate_certs=provider["verify"],
-            timeout=timeout
-        )
-        result = xiqse.graphql(query)
-
-        version = result.get("data", {}).get("administration", {}).get("serverInfo", {}).get("version", "Unknown")
-        module.exit_json(changed=False, version=version)
+        if module.params["providers"]:
+            servers     = XIQSE.fan_out(module, get_version)
+            versions    = dict((name, server.pop("result")) for name, server in servers.items() if "result" in server)
+            failed      = sorted(name for name, server in servers.items() if server["status"] != "SUCCESS")
+            if failed:
+                module.fail_json(msg="No version from: " + ", ".join(failed), servers=servers, versions=versions)
+            module.exit_json(changed=False, servers=servers, versions=versions)
+
+        xiqse   = XIQSE.from_module(module)
+        module.exit_json(changed=False, version=get_version(xiqse))
     except Exception as e:
         module.fail_json(msg=str(e))
 
+def get_version(xiqse):
+    query   = XIQSE.query.administration.serverInfo_version()
+    result  = xiqse.graphql(query)
+    return result.get("data", {}).get("administration", {}).get("serverInfo", {}).get("version", "Unknown")
+
 def main():
     run_module()
 
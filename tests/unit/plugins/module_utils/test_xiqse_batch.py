@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_utils.xiqse import XIQSE
+
+
+class FakeClient:
+    def __init__(self, responder):
+        self.responder  = responder
+        self.calls      = []
+
+    def graphql(self, query, variables=None, cache=True):
+        self.calls.append((query, variables or {}, cache))
+        return self.responder(query, variables or {})
+
+
+def batch_of(responder, operations, **kwargs):
+    client  = FakeClient(responder)
+    batch   = XIQSE.Batch(client, kwargs.pop("max_operations", XIQSE.Batch.MAX_OPERATIONS), kwargs.pop("max_bytes", XIQSE.Batch.MAX_BYTES), **kwargs)
+    for query, variables in operations:
+        batch.add(query, variables)
+    return client, batch.execute()
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("query ($ip: String!) { network { device(ip: $ip) { sysName } } }",
+     ("query", "$b0_ip: String!", "b0_network: network { device(ip: $b0_ip) { sysName } }")),
+    ("{ s: network { sites { location } } }",
+     ("query", "", "b0_s: network { sites { location } }")),
+    ("query Q($x: Boolean!) { network @include(if: $x) { sites { location } } }",
+     ("query", "$b0_x: Boolean!", "b0_network: network @include(if: $b0_x) { sites { location } }")),
+    ('query ($p: String = "$HOME", $q: Input = {path: "$p"}) { network { device(ip: $p) { ip } } }',
+     ("query", '$b0_p: String = "$HOME", $b0_q: Input = {path: "$p"}', "b0_network: network { device(ip: $b0_p) { ip } }")),
+    ("query ($ ip: String) { device(ip: $ ip) { ip } }",
+     ("query", "$ b0_ip: String", "b0_device: device(ip: $ b0_ip) { ip }")),
+    ("# all sites\n{ a { x } b: c(filter: \"a: b\") { y } }",
+     ("query", "", 'b0_a: a { x } b0_b: c(filter: "a: b") { y }')),
+    ('mutation { network { createSite(input: {siteLocation: "/a"}) { status } } }',
+     ("mutation", "", 'b0_network: network { createSite(input: {siteLocation: "/a"}) { status } }')),
+])
+def test_split_aliases_and_renames(query, expected):
+    assert XIQSE.Batch.split(query, "b0_") == expected
+
+
+@pytest.mark.parametrize("query, message", [
+    ("query A { a } query B { b }", "Only one operation per document can be batched"),
+    ("{ ...F } fragment F on Query { a }", "Only one operation per document can be batched"),
+    ("{ ... on Query { a } }", "Fragments can not be batched"),
+    ("# only a comment", "Empty GraphQL document"),
+    ("{ a { b }", "Unbalanced GraphQL document"),
+    ("query ($a: Int)", "Unsupported GraphQL document"),
+])
+def test_split_rejects(query, message):
+    with pytest.raises(ValueError, match=message):
+        XIQSE.Batch.split(query, "b0_")
+
+
+def test_demux():
+    assert XIQSE.Batch.demux("b12_network") == (12, "network")
+    assert XIQSE.Batch.demux("b0_b1_s") == (0, "b1_s")
+    assert XIQSE.Batch.demux("network") == (None, None)
+
+
+DEVICE = "query ($ip: String!) { network { device(ip: $ip) { sysName } } }"
+
+
+def test_execute_merges_and_demuxes_results_and_errors():
+    def responder(query, variables):
+        assert query == ("query Batch($b0_ip: String!, $b1_ip: String!) {\n"
+                         "b0_network: network { device(ip: $b0_ip) { sysName } }\n"
+                         "b1_network: network { device(ip: $b1_ip) { sysName } }\n"
+                         "b2_network: network { sites { location } }\n}")
+        assert variables == {"b0_ip": "10.0.0.1", "b1_ip": "10.0.0.2"}
+        return {
+            "data": {"b0_network": {"device": {"sysName": "core-1"}}, "b1_network": {"device": None}, "b2_network": {"sites": []}},
+            "errors": [{"message": "Device not found", "path": ["b1_network", "device"]}],
+        }
+
+    client, results = batch_of(responder, [(DEVICE, {"ip": "10.0.0.1"}), (DEVICE, {"ip": "10.0.0.2"}), ("{ network { sites { location } } }", None)])
+
+    assert len(client.calls) == 1
+    assert results == [
+        {"data": {"network": {"device": {"sysName": "core-1"}}}},
+        {"data": {"network": {"device": None}}, "errors": [{"message": "Device not found", "path": ["network", "device"]}]},
+        {"data": {"network": {"sites": []}}},
+    ]
+
+
+def test_execute_demuxes_multi_field_operations():
+    def responder(query, variables):
+        return {"data": {"b0_a": 1, "b0_b": 2, "b1_a": 3}}
+
+    client, results = batch_of(responder, [("{ a b: c }", None), ("{ a }", None)])
+    assert results == [{"data": {"a": 1, "b": 2}}, {"data": {"a": 3}}]
+
+
+def test_pathless_error_without_data_runs_operations_one_by_one():
+    def responder(query, variables):
+        if query.startswith("query Batch"):
+            return {"data": None, "errors": [{"message": "Validation error: unknown field"}]}
+        if "bad" in query:
+            return {"data": None, "errors": [{"message": "Validation error: unknown field bad"}]}
+        return {"data": {"network": {"device": {"sysName": variables["ip"]}}}}
+
+    bad = "query ($ip: String!) { network { device(ip: $ip) { bad } } }"
+    client, results = batch_of(responder, [(DEVICE, {"ip": "10.0.0.1"}), (bad, {"ip": "10.0.0.2"})])
+
+    assert [call[0] for call in client.calls[1:]] == [DEVICE, bad]
+    assert results == [
+        {"data": {"network": {"device": {"sysName": "10.0.0.1"}}}},
+        {"data": None, "errors": [{"message": "Validation error: unknown field bad"}]},
+    ]
+
+
+def test_pathless_error_with_data_is_reported_to_every_operation():
+    def responder(query, variables):
+        return {"data": {"b0_a": 1, "b1_a": 2}, "errors": [{"message": "Partial outage"}]}
+
+    client, results = batch_of(responder, [("{ a }", None), ("{ a }", None)])
+    assert len(client.calls) == 1
+    assert results == [
+        {"data": {"a": 1}, "errors": [{"message": "Partial outage"}]},
+        {"data": {"a": 2}, "errors": [{"message": "Partial outage"}]},
+    ]
+
+
+def test_null_data_stays_null():
+    def responder(query, variables):
+        return {"data": None, "errors": [{"message": "Forbidden", "path": ["b0_a"]}]}
+
+    client, results = batch_of(responder, [("{ a }", None), ("{ b }", None)])
+    assert results == [{"data": None, "errors": [{"message": "Forbidden", "path": ["a"]}]}, {"data": None}]
+
+
+def test_queries_and_mutations_are_sent_apart_and_unbatchable_documents_alone():
+    def responder(query, variables):
+        return {"data": {}}
+
+    fragment = "{ ...F } fragment F on Query { a }"
+    client, results = batch_of(responder, [
+        ("{ a }", None), ("mutation { m1 }", None), ("{ b }", None), (fragment, None), ("mutation { m2 }", None),
+    ])
+
+    assert len(results) == 5
+    assert sorted(call[0] for call in client.calls) == sorted([
+        fragment,
+        "query {\nb0_a: a\nb1_b: b\n}",
+        "mutation {\nb0_m1: m1\nb1_m2: m2\n}",
+    ])
+
+
+def test_chunks_respect_max_operations_and_max_bytes():
+    def responder(query, variables):
+        if not query.startswith("query {"):
+            return {"data": {"a": 0}}
+        return {"data": dict((line.split(":")[0], 0) for line in query.splitlines()[1:-1])}
+
+    client, results = batch_of(responder, [("{ a }", None)] * 5, max_operations=2)
+    assert [call[0] for call in client.calls] == ["query {\nb0_a: a\nb1_a: a\n}"] * 2 + ["{ a }"]
+    assert results == [{"data": {"a": 0}}] * 5
+
+    client, results = batch_of(responder, [("{ a }", None)] * 3, max_bytes=10)
+    assert [call[0] for call in client.calls] == ["query {\nb0_a: a\nb1_a: a\n}", "{ a }"]
+    assert results == [{"data": {"a": 0}}] * 3
+
+
+def test_single_operation_is_sent_unchanged_and_cache_flag_is_passed():
+    def responder(query, variables):
+        return {"data": {"network": {"device": None}}}
+
+    client, results = batch_of(responder, [(DEVICE, {"ip": "10.0.0.1"})], cache=False)
+    assert client.calls == [(DEVICE, {"ip": "10.0.0.1"}, False)]
+    assert results == [{"data": {"network": {"device": None}}}]
\ No newline at end of file
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_utils.xiqse_expression import Expression
+
+DATA = {
+    "network": {
+        "devices": [
+            {"ip": "10.0.0.1", "sysName": "core-1", "status": "UP", "ports": [{"name": "1/1"}, {"name": "1/2"}]},
+            {"ip": "10.0.0.2", "sysName": "core-2", "status": "DOWN", "ports": [{"name": "2/1"}]},
+            {"ip": "10.0.0.3", "sysName": None, "status": "UP", "ports": []},
+        ],
+        "matrix": [[1, 2], [3], 4],
+    }
+}
+
+
+def search(expression, data=DATA):
+    return Expression(expression).search(data)
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("network.devices[*].ip", ["10.0.0.1", "10.0.0.2", "10.0.0.3"]),
+    ("network.devices[*].sysName", ["core-1", "core-2"]),
+    ("network.devices[*].missing", []),
+    ("network.devices[0].ip", "10.0.0.1"),
+    ("network.devices[-1].ip", "10.0.0.3"),
+    ("network.devices[-3].ip", "10.0.0.1"),
+    ("network.devices[3]", None),
+    ("network.devices[-4]", None),
+    ("network.devices.ip", None),
+    ("network.missing[*].ip", None),
+])
+def test_projections_and_indexes(expression, expected):
+    assert search(expression) == expected
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("network.matrix[]", [1, 2, 3, 4]),
+    ("network.devices[].ports[].name", ["1/1", "1/2", "2/1"]),
+    ("network.devices[*].ports[*].name", [["1/1", "1/2"], ["2/1"], []]),
+    ("network.devices[*].ports[*].name[]", ["1/1", "1/2", "2/1"]),
+    ("network.devices[*].ports[0].name", ["1/1", "2/1"]),
+])
+def test_flattening(expression, expected):
+    assert search(expression) == expected
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("network.devices[?status == 'UP'].ip", ["10.0.0.1", "10.0.0.3"]),
+    ("network.devices[?status != 'UP'].ip", ["10.0.0.2"]),
+    ("network.devices[?sysName == `null`].ip", ["10.0.0.3"]),
+    ("network.devices[?ports[0].name == '2/1'].sysName", ["core-2"]),
+    ("network.devices[?status == 'UNKNOWN'].ip", []),
+    # Like JMESPath, an index after a filter or a flatten applies to each element of the projection.
+    ("network.devices[?status == 'UP'][0].ip", []),
+    ("network.devices[?status == 'UP'][][0].ip", []),
+])
+def test_filters(expression, expected):
+    assert search(expression) == expected
+
+
+def test_filter_with_number_and_escaped_string():
+    data = {"items": [{"id": 1, "name": "it's"}, {"id": 2, "name": "plain"}]}
+    assert search("items[?id == `2`].name", data) == ["plain"]
+    assert search("items[?id == 1].name", data) == ["it's"]
+    assert search("items[?name == 'it\\'s'].id", data) == [1]
+
+
+def test_multiselect():
+    assert search("network.devices[*].{address: ip, name: sysName}") == [
+        {"address": "10.0.0.1", "name": "core-1"},
+        {"address": "10.0.0.2", "name": "core-2"},
+        {"address": "10.0.0.3", "name": None},
+    ]
+    assert search("network.devices[0].{ip, first: ports[0].name}") == {"ip": "10.0.0.1", "first": "1/1"}
+    assert search("network.devices[?status == 'DOWN'].{ip, ports: ports[*].name}") == [{"ip": "10.0.0.2", "ports": ["2/1"]}]
+
+
+def test_non_list_projection_is_null():
+    assert search("network[*].ip") is None
+    assert search("network.devices[0][]") is None
+
+
+@pytest.mark.parametrize("expression, message", [
+    ("network.devices | [0]", "pipes '|' are not supported"),
+    ("a && b", "'&&' conditions are not supported"),
+    ("devices[?@ == 'x']", "current node references '@' are not supported"),
+    ("devices[?uptime > `10`]", "ordering comparisons are not supported"),
+    ("network.", "expected a field name after '.'"),
+    ("network..devices", "expected a field name after '.'"),
+    ("devices[", "unexpected end of expression"),
+    ("devices[?status = 'UP']", "unexpected character '='"),
+    ("devices[?status == ip]", "filters compare with a 'string', a number or a `literal`"),
+    ("devices[?status]", "filters compare with == or !="),
+    ("devices['x']", "unexpected 'x' in brackets"),
+    ("{'key': ip}", "expected a key in '{...}'"),
+    ("devices]", "unexpected ']'"),
+    ("`not json`", "invalid literal `not json`"),
+])
+def test_parse_errors(expression, message):
+    with pytest.raises(ValueError) as error:
+        Expression(expression)
+    assert str(error.value) == f"Invalid select expression {expression!r}: {message}"
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from ansible_collections.tchevalleraud.extremenetworks_xiqse.plugins.module_utils.xiqse import XIQSE
+
+
+URL = "https://xiqse.example.com:8443/nbi/graphql"
+
+
+class FakeTransport:
+    def __init__(self, outcomes):
+        self.outcomes   = list(outcomes)
+        self.calls      = 0
+
+    def post(self, url, body, headers, auth=None):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return XIQSE.Response(url, outcome, "", {}, b"{}", 0.0, 0)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+
+
+def client_for(outcomes, retries=3, circuit_breaker=None, circuit_threshold=5):
+    client              = XIQSE("xiqse.example.com", "id", "secret", transport="stdlib", retries=retries, retry_backoff=0,
+                                circuit_breaker=circuit_breaker, circuit_threshold=circuit_threshold)
+    client.transport    = FakeTransport(outcomes)
+    return client
+
+
+@pytest.mark.parametrize("idempotent, first, retried", [
+    (True, 429, True),
+    (True, 502, True),
+    (True, 503, True),
+    (True, 504, True),
+    (True, 500, False),
+    (True, 404, False),
+    (False, 429, True),
+    (False, 503, True),
+    (False, 502, False),
+    (False, 504, False),
+    (False, 500, False),
+])
+def test_retry_statuses(idempotent, first, retried):
+    client      = client_for([first, 200])
+    response    = client.post(URL, idempotent=idempotent)
+
+    assert client.transport.calls == (2 if retried else 1)
+    assert response.status_code == (200 if retried else first)
+
+
+@pytest.mark.parametrize("idempotent, error, retried", [
+    (True, XIQSE.ConnectError("refused"), True),
+    (False, XIQSE.ConnectError("refused"), True),
+    (True, XIQSE.ConnectionAborted("reset"), True),
+    (False, XIQSE.ConnectionAborted("reset"), False),
+    (True, XIQSE.ReadTimeout("timed out"), True),
+    (False, XIQSE.ReadTimeout("timed out"), False),
+    (True, XIQSE.TransportError("invalid URL"), False),
+    (False, XIQSE.TransportError("invalid URL"), False),
+])
+def test_retry_errors(idempotent, error, retried):
+    client = client_for([error, 200])
+
+    if retried:
+        assert client.post(URL, idempotent=idempotent).status_code == 200
+        assert client.transport.calls == 2
+    else:
+        with pytest.raises(type(error)):
+            client.post(URL, idempotent=idempotent)
+        assert client.transport.calls == 1
+
+
+def test_retries_are_bounded():
+    client = client_for([503], retries=2)
+    assert client.post(URL).status_code == 503
+    assert client.transport.calls == 3
+
+    client = client_for([XIQSE.ConnectError("refused")], retries=2)
+    with pytest.raises(XIQSE.ConnectError):
+        client.post(URL)
+    assert client.transport.calls == 3
+
+
+def test_circuit_opens_after_consecutive_failures(tmp_path):
+    path    = str(tmp_path / "circuit.json")
+    client  = client_for([500], retries=0, circuit_breaker=path, circuit_threshold=2)
+
+    assert client.post(URL).status_code == 500
+    assert client.post(URL).status_code == 500
+    with pytest.raises(XIQSE.ConnectError, match="Circuit breaker open"):
+        client.post(URL)
+    assert client.transport.calls == 2
+
+    # The state is shared on disk with the other clients of the same server.
+    other = client_for([200], circuit_breaker=path, circuit_threshold=2)
+    with pytest.raises(XIQSE.ConnectError, match="Circuit breaker open"):
+        other.post(URL)
+    assert other.transport.calls == 0
+
+
+@pytest.mark.parametrize("outcomes, is_open", [
+    ([500, 200, 500], False),
+    ([500, 502, 0], True),
+    ([XIQSE.ConnectError("refused"), 500, 0], True),
+    ([429, 429, 500], False),
+    ([500, 404, 500], False),
+])
+def test_circuit_counts_failures(tmp_path, outcomes, is_open):
+    client = client_for([outcome for outcome in outcomes if outcome != 0], retries=0, circuit_breaker=str(tmp_path / "circuit.json"), circuit_threshold=2)
+
+    # 0 marks a request that must be refused by the open circuit.
+    for outcome in outcomes:
+        if outcome == 0:
+            with pytest.raises(XIQSE.ConnectError, match="Circuit breaker open"):
+                client.post(URL)
+        elif isinstance(outcome, Exception):
+            with pytest.raises(type(outcome)):
+                client.post(URL)
+        else:
+            assert client.post(URL).status_code == outcome
+
+    client.transport = FakeTransport([200])
+    if is_open:
+        with pytest.raises(XIQSE.ConnectError, match="Circuit breaker open"):
+            client.post(URL)
+    else:
+        assert client.post(URL).status_code == 200
\ No newline at end of file